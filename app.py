@@ -1,78 +1,75 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from datetime import datetime
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, send_file, jsonify, abort, stream_with_context
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
+from flask_migrate import Migrate, upgrade
 import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+import click
 from werkzeug.security import generate_password_hash, check_password_hash
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, HRFlowable, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-
-# Add Rupee symbol constant
-RUPEE_SYMBOL = '₹'
+from models import db, User, Customer, Device, Ticket, Service, Invoice
+from queries import device_query, ticket_query, service_query, invoice_query, service_total, service_totals
+from money import to_decimal, invoice_total
+from pagination import paginate
+from stats import DashboardStat, TRACKED_MODELS, get_dashboard_stats, reconcile_stats, start_reconciler
+from query_plans import HOT_QUERIES, explain, scans
+from search import SEARCH_TABLES, search, rebuild_search_index
+from intake import lookup
+from reporting import (PERIODS, ensure_rollups, rebuild_reports, revenue_report, technician_report,
+                       average_turnaround_hours, unpaid_aging)
+from invoice_pdf import invoice_pdf_data
+from pdf_cache import pdf_cache
+from page_cache import page_cache
+from profiling import request_profiler
+from exports import EXPORTABLE, FORMATS, export_stream
+from pdf_jobs import pdf_queue, latest_job, PdfJob, JOB_DONE, JOB_FAILED
+from deletes import delete_customers_where, delete_devices_where, delete_tickets_where
+from pdf_export import export_invoices_zip, invoice_export_query, parse_invoice_ids
+from legacy_import import LegacyImporter, DEFAULT_CHUNK_SIZE
+import sqlite_tuning
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this to a secure secret key
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///repair_center.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
+app.config['DB_PROFILE'] = 'production'  # 'default' for SQLite's stock settings
+app.config['PAGE_SIZE'] = 50  # Rows per page on the list views
+app.config['MAX_PAGE_SIZE'] = 200
+app.config['STATS_RECONCILE_INTERVAL'] = 3600  # Seconds between dashboard counter rebuilds, 0 to disable
+app.config['PDF_WORKERS'] = 2  # Processes rendering invoice PDFs, 0 to render inline
+app.config['PDF_MAX_ATTEMPTS'] = 3
+app.config['PDF_CACHE_DIR'] = os.path.join('invoices', 'cache')
+app.config['PDF_CACHE_MAX_BYTES'] = 512 * 1024 * 1024  # Least recently used PDFs are evicted beyond this
+app.config['EXPORT_WORKERS'] = None  # Processes for bulk PDF export, None for one per CPU
+app.config['PAGE_CACHE_BACKEND'] = 'memory'  # 'redis' to share the cache between workers, 'none' to disable
+app.config['PAGE_CACHE_TTL'] = 300  # Seconds; bounds staleness from writes in other processes
+app.config['PAGE_CACHE_MAX_ENTRIES'] = 1000
+app.config['PAGE_CACHE_REDIS_URL'] = 'redis://localhost:6379/0'
+app.config['PROFILING_ENABLED'] = True  # Server-Timing headers and request metrics on /metrics
+app.config['PROFILE_SAMPLE_RATE'] = 0.0  # Fraction of requests run under cProfile
+app.config['PROFILE_SLOW_MS'] = 500  # Sampled requests slower than this have their profile saved
+
+# Deployment overrides: a Python config file named by REPAIR_CENTER_SETTINGS,
+# then DATABASE_URL / DB_PROFILE from the environment
+app.config.from_envvar('REPAIR_CENTER_SETTINGS', silent=True)
+if os.environ.get('DATABASE_URL'):
+    # Some hosts hand out postgres:// URLs, which SQLAlchemy no longer accepts
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['DATABASE_URL'].replace('postgres://', 'postgresql://', 1)
+app.config['DB_PROFILE'] = os.environ.get('DB_PROFILE', app.config['DB_PROFILE'])
+app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', sqlite_tuning.engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], app.config['DB_PROFILE']))
+
+db.init_app(app)
+sqlite_tuning.init_app(app, db)
+# Schema changes live in migrations/; apply them with `flask db upgrade`
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'), render_as_batch=True)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
-
-# Database Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    role = db.Column(db.String(20), nullable=False, default='technician')
-
-class Customer(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    phone = db.Column(db.String(20))
-    email = db.Column(db.String(120))
-    address = db.Column(db.String(200))
-    devices = db.relationship('Device', backref='customer', lazy=True)
-
-class Device(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
-    brand = db.Column(db.String(50), nullable=False)
-    model = db.Column(db.String(50), nullable=False)
-    serial_number = db.Column(db.String(50))
-    issue = db.Column(db.Text)
-    tickets = db.relationship('Ticket', backref='device', lazy=True)
-
-class Ticket(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    device_id = db.Column(db.Integer, db.ForeignKey('device.id'), nullable=False)
-    technician_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    status = db.Column(db.String(20), nullable=False, default='Received')
-    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    services = db.relationship('Service', backref='ticket', lazy=True)
-    invoice = db.relationship('Invoice', backref='ticket', uselist=False)
-    technician = db.relationship('User', backref='tickets')
-
-class Service(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
-    description = db.Column(db.Text, nullable=False)
-    cost = db.Column(db.Float, nullable=False)
-
-class Invoice(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
-    total_amount = db.Column(db.Float, nullable=False)
-    paid_status = db.Column(db.String(20), nullable=False, default='Unpaid')
-    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
-    tax_rate = db.Column(db.Float, default=0)
-    discount = db.Column(db.Float, default=0)
+pdf_cache.init_app(app)
+page_cache.init_app(app)
+request_profiler.init_app(app)
+pdf_queue.init_app(app)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -105,30 +102,131 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    # Get summary statistics
-    total_customers = Customer.query.count()
-    total_devices = Device.query.count()
-    total_tickets = Ticket.query.count()
-    completed_tickets = Ticket.query.filter_by(status='Completed').count()
-    total_invoices = Invoice.query.count()
-    
-    # Calculate total revenue
-    total_revenue = db.session.query(db.func.sum(Invoice.total_amount)).scalar() or 0
-    
-    return render_template('dashboard.html',
-                         total_customers=total_customers,
-                         total_devices=total_devices,
-                         total_tickets=total_tickets,
-                         completed_tickets=completed_tickets,
-                         total_invoices=total_invoices,
-                         total_revenue=total_revenue)
+    # Summary statistics are kept up to date by the session hooks in stats.py
+    stats = page_cache.get_or_set('dashboard_stats', TRACKED_MODELS + (DashboardStat,), get_dashboard_stats)
+    return render_template('dashboard.html', **stats)
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """Rebuild the dashboard counters and report any drift"""
+    drift = reconcile_stats()
+    if not drift:
+        print("Dashboard stats are in sync.")
+    for key, (stored, actual) in drift.items():
+        print(f"{key}: stored {stored}, actual {actual}")
+
+@app.route('/reports')
+@login_required
+def reports():
+    # Served from the daily rollup tables kept current by reporting.py
+    ensure_rollups()
+    period = request.args.get('period', 'week')
+    if period not in PERIODS:
+        period = 'week'
+    today = datetime.utcnow().date()
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else today
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=90)
+    except ValueError:
+        flash('Invalid date range')
+        return redirect(url_for('reports'))
+    return render_template('reports.html', period=period, periods=PERIODS, start=start, end=end,
+                           revenue=revenue_report(start, end, period),
+                           technicians=technician_report(start, end),
+                           turnaround=average_turnaround_hours(start, end),
+                           aging=unpaid_aging(today))
+
+@app.cli.command('rebuild-reports')
+def rebuild_reports_command():
+    """Recompute the report rollup tables from invoices and tickets"""
+    started = time.perf_counter()
+    rebuild_reports()
+    db.session.commit()
+    print(f"Report rollups rebuilt in {time.perf_counter() - started:.2f}s")
+
+@app.route('/search')
+@login_required
+def search_page():
+    query = request.args.get('q', '').strip()
+    results = search(query) if query else {kind: [] for kind in SEARCH_TABLES}
+    if request.args.get('format') == 'json':
+        return jsonify(
+            query=query,
+            customers=[{'id': c.id, 'name': c.name, 'phone': c.phone, 'email': c.email,
+                        'url': url_for('edit_customer', customer_id=c.id)} for c in results['customers']],
+            devices=[{'id': d.id, 'brand': d.brand, 'model': d.model, 'serial_number': d.serial_number,
+                      'customer': d.customer.name, 'url': url_for('edit_device', device_id=d.id)}
+                     for d in results['devices']],
+            services=[{'id': s.id, 'description': s.description, 'ticket_id': s.ticket_id,
+                       'url': url_for('edit_service', service_id=s.id)} for s in results['services']],
+        )
+    return render_template('search.html', query=query, results=results)
+
+@app.route('/intake/lookup')
+@login_required
+def intake_lookup():
+    # Everything the intake screen needs for a phone number or serial, in one response
+    query = request.args.get('q', '').strip()
+    customers, matched_device_ids = lookup(query)
+    return jsonify(query=query, customers=[{
+        'id': customer.id,
+        'name': customer.name,
+        'phone': customer.phone,
+        'email': customer.email,
+        'address': customer.address,
+        'url': url_for('edit_customer', customer_id=customer.id),
+        'devices': [{
+            'id': device.id,
+            'brand': device.brand,
+            'model': device.model,
+            'serial_number': device.serial_number,
+            'issue': device.issue,
+            'matched': device.id in matched_device_ids,
+            'url': url_for('edit_device', device_id=device.id),
+            'open_tickets': [{
+                'id': ticket.id,
+                'status': ticket.status,
+                'technician': ticket.technician.username,
+                'created_date': ticket.created_date.isoformat(),
+                'url': url_for('edit_ticket', ticket_id=ticket.id),
+            } for ticket in device.tickets],
+        } for device in customer.devices],
+    } for customer in customers])
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Refill and optimize the SQLite full-text search indexes"""
+    started = time.perf_counter()
+    if rebuild_search_index():
+        print(f"Search index rebuilt in {time.perf_counter() - started:.2f}s")
+    else:
+        print("PostgreSQL maintains the search indexes itself; nothing to do.")
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot query would scan a whole table"""
+    if db.engine.dialect.name not in ('sqlite', 'postgresql'):
+        raise SystemExit(f"check-query-plans does not support {db.engine.dialect.name}")
+    failures = 0
+    for name, build in HOT_QUERIES.items():
+        plan = explain(build())
+        failures += scans(plan)
+        print(f"{'SCAN' if scans(plan) else 'ok':<5} {name}")
+        for step in plan:
+            print(f"        {step}")
+    if failures:
+        raise SystemExit(f"{failures} hot queries scan a whole table; run `flask db upgrade`")
 
 # Customer routes
 @app.route('/customers')
 @login_required
+@page_cache.cached_view(Customer)
 def customers():
-    customers = Customer.query.all()
-    return render_template('customers.html', customers=customers)
+    page = paginate(Customer.query, Customer.id, {
+        'id': Customer.id,
+        'name': Customer.name,
+    })
+    return render_template('customers.html', customers=page.items, page=page)
 
 @app.route('/customers/add', methods=['GET', 'POST'])
 @login_required
@@ -164,20 +262,10 @@ def edit_customer(customer_id):
 @login_required
 def delete_customer(customer_id):
     try:
-        customer = Customer.query.get_or_404(customer_id)
+        Customer.query.get_or_404(customer_id)
         
-        # First delete all related services
-        for device in customer.devices:
-            for ticket in device.tickets:
-                Service.query.filter_by(ticket_id=ticket.id).delete()
-                Invoice.query.filter_by(ticket_id=ticket.id).delete()
-                Ticket.query.filter_by(id=ticket.id).delete()
-        
-        # Then delete all devices
-        Device.query.filter_by(customer_id=customer_id).delete()
-        
-        # Finally delete the customer
-        db.session.delete(customer)
+        # One DELETE per table, however many devices and tickets the customer has
+        delete_customers_where(Customer.id == customer_id)
         db.session.commit()
         flash('Customer and all related records deleted successfully!', 'success')
     except Exception as e:
@@ -190,9 +278,14 @@ def delete_customer(customer_id):
 # Device routes
 @app.route('/devices')
 @login_required
+@page_cache.cached_view(Device, Customer)
 def devices():
-    devices = Device.query.all()
-    return render_template('devices.html', devices=devices)
+    page = paginate(device_query(), Device.id, {
+        'id': Device.id,
+        'brand': Device.brand,
+        'model': Device.model,
+    })
+    return render_template('devices.html', devices=page.items, page=page)
 
 @app.route('/devices/add', methods=['GET', 'POST'])
 @login_required
@@ -244,8 +337,8 @@ def edit_device(device_id):
 @app.route('/devices/<int:device_id>/delete', methods=['POST'])
 @login_required
 def delete_device(device_id):
-    device = Device.query.get_or_404(device_id)
-    db.session.delete(device)
+    Device.query.get_or_404(device_id)
+    delete_devices_where(Device.id == device_id)
     db.session.commit()
     flash('Device deleted successfully!', 'success')
     return redirect(url_for('devices'))
@@ -254,8 +347,12 @@ def delete_device(device_id):
 @app.route('/tickets')
 @login_required
 def tickets():
-    tickets = Ticket.query.all()
-    return render_template('tickets.html', tickets=tickets)
+    page = paginate(ticket_query(), Ticket.id, {
+        'id': Ticket.id,
+        'status': Ticket.status,
+        'created_date': Ticket.created_date,
+    }, default_sort='created_date', default_direction='desc')
+    return render_template('tickets.html', tickets=page.items, page=page)
 
 @app.route('/tickets/add', methods=['GET', 'POST'])
 @login_required
@@ -287,8 +384,8 @@ def edit_ticket(ticket_id):
 @app.route('/tickets/<int:ticket_id>/delete', methods=['POST'])
 @login_required
 def delete_ticket(ticket_id):
-    ticket = Ticket.query.get_or_404(ticket_id)
-    db.session.delete(ticket)
+    Ticket.query.get_or_404(ticket_id)
+    delete_tickets_where(Ticket.id == ticket_id)
     db.session.commit()
     flash('Ticket deleted successfully!', 'success')
     return redirect(url_for('tickets'))
@@ -296,10 +393,14 @@ def delete_ticket(ticket_id):
 # Service routes
 @app.route('/services')
 @login_required
+@page_cache.cached_view(Service, Ticket, Device, Customer)
 def services():
-    services = Service.query.all()
-    print("Services:", [(s.id, s.description) for s in services])  # Debug print
-    return render_template('services.html', services=services)
+    page = paginate(service_query(), Service.id, {
+        'id': Service.id,
+        'description': Service.description,
+        'cost': Service.cost,
+    })
+    return render_template('services.html', services=page.items, page=page)
 
 @app.route('/services/add', methods=['GET', 'POST'])
 @login_required
@@ -308,7 +409,7 @@ def add_service():
         service = Service(
             ticket_id=request.form['ticket_id'],
             description=request.form['description'],
-            cost=float(request.form['cost'])
+            cost=to_decimal(request.form['cost'])
         )
         db.session.add(service)
         db.session.commit()
@@ -323,7 +424,7 @@ def edit_service(service_id):
     service = Service.query.get_or_404(service_id)
     if request.method == 'POST':
         service.description = request.form['description']
-        service.cost = float(request.form['cost'])
+        service.cost = to_decimal(request.form['cost'])
         db.session.commit()
         flash('Service updated successfully!', 'success')
         return redirect(url_for('services'))
@@ -341,9 +442,20 @@ def delete_service(service_id):
 # Invoice routes
 @app.route('/invoices')
 @login_required
+@page_cache.cached_view(Invoice, Ticket, Device, Customer, Service)
 def invoices():
-    invoices = Invoice.query.all()
-    return render_template('invoices.html', invoices=invoices)
+    page = paginate(invoice_query(), Invoice.id, {
+        'id': Invoice.id,
+        'date': Invoice.date,
+        'total_amount': Invoice.total_amount,
+        'paid_status': Invoice.paid_status,
+    }, default_sort='date', default_direction='desc')
+    subtotals = service_totals([invoice.ticket_id for invoice in page.items])
+    taxes = {
+        invoice.id: invoice_total(subtotals.get(invoice.ticket_id, 0), invoice.tax_rate, invoice.discount)[0]
+        for invoice in page.items
+    }
+    return render_template('invoices.html', invoices=page.items, page=page, subtotals=subtotals, taxes=taxes)
 
 @app.route('/invoices/generate', methods=['GET', 'POST'])
 @login_required
@@ -352,27 +464,27 @@ def generate_invoice():
         ticket_id = request.form['ticket_id']
         ticket = Ticket.query.get_or_404(ticket_id)
         
-        # Calculate total from services
-        total_amount = sum(service.cost for service in ticket.services)
-        tax_rate = float(request.form['tax_rate'])
-        discount = float(request.form['discount'])
-        
-        # Calculate final total
-        tax_amount = total_amount * (tax_rate / 100)
-        final_total = total_amount + tax_amount - discount
+        # Calculate final total from the services' costs, summed in SQL
+        tax_rate = to_decimal(request.form['tax_rate'])
+        discount = to_decimal(request.form['discount'])
+        tax_amount, final_total = invoice_total(service_total(ticket.id), tax_rate, discount)
         
         invoice = Invoice(
-            ticket_id=ticket_id,
+            ticket_id=ticket.id,
             total_amount=final_total,
             paid_status=request.form['paid_status'],
             tax_rate=tax_rate,
             discount=discount
         )
         db.session.add(invoice)
+        # The INSERT hands back the new id (RETURNING where the database
+        # supports it), so it is read here rather than reloaded after commit
+        db.session.flush()
+        invoice_id = invoice.id
         db.session.commit()
         
-        # Generate PDF
-        generate_invoice_pdf(invoice.id)
+        # Render the PDF in the background
+        pdf_queue.enqueue(invoice_id)
         
         flash('Invoice generated successfully')
         return redirect(url_for('invoices'))
@@ -386,13 +498,12 @@ def edit_invoice(invoice_id):
     invoice = Invoice.query.get_or_404(invoice_id)
     if request.method == 'POST':
         invoice.paid_status = request.form['paid_status']
-        invoice.tax_rate = float(request.form['tax_rate'])
-        invoice.discount = float(request.form['discount'])
+        invoice.tax_rate = to_decimal(request.form['tax_rate'])
+        invoice.discount = to_decimal(request.form['discount'])
         
         # Recalculate total amount
-        total_amount = sum(service.cost for service in invoice.ticket.services)
-        tax_amount = total_amount * (invoice.tax_rate / 100)
-        invoice.total_amount = total_amount + tax_amount - invoice.discount
+        tax_amount, invoice.total_amount = invoice_total(
+            service_total(invoice.ticket_id), invoice.tax_rate, invoice.discount)
         
         db.session.commit()
         flash('Invoice updated successfully!', 'success')
@@ -403,176 +514,153 @@ def edit_invoice(invoice_id):
 @login_required
 def delete_invoice(invoice_id):
     invoice = Invoice.query.get_or_404(invoice_id)
+    PdfJob.query.filter_by(invoice_id=invoice_id).delete()
     db.session.delete(invoice)
     db.session.commit()
     flash('Invoice deleted successfully!', 'success')
     return redirect(url_for('invoices'))
 
-def generate_invoice_pdf(invoice_id):
-    invoice = Invoice.query.get_or_404(invoice_id)
-    ticket = invoice.ticket
-    device = ticket.device
-    customer = device.customer
-    
-    # Create PDF file
-    pdf_file = f"invoices/invoice_{invoice_id}.pdf"
-    doc = SimpleDocTemplate(pdf_file, pagesize=letter)
-    elements = []
-    
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        alignment=TA_CENTER,
-        spaceAfter=30,
-        fontSize=24,
-        textColor=colors.HexColor('#2c3e50')
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Heading2'],
-        alignment=TA_CENTER,
-        spaceAfter=20,
-        fontSize=16,
-        textColor=colors.HexColor('#34495e')
-    )
-    
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        spaceAfter=12,
-        fontSize=12,
-        textColor=colors.HexColor('#2c3e50')
-    )
-    
-    # Add company header
-    elements.append(Paragraph("Repair Center", title_style))
-    elements.append(Paragraph("Professional Device Repair Services", subtitle_style))
-    
-    # Add horizontal line
-    elements.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor('#bdc3c7'), spaceBefore=10, spaceAfter=20))
-    
-    # Create two columns for invoice info and customer details
-    invoice_info = [
-        Paragraph(f"<b>Invoice #:</b> {invoice_id}", info_style),
-        Paragraph(f"<b>Date:</b> {invoice.date.strftime('%B %d, %Y')}", info_style),
-        Paragraph(f"<b>Status:</b> {invoice.paid_status}", info_style)
-    ]
-    
-    # Create customer info with proper indentation and spacing
-    customer_info = [
-        Paragraph("<b>Bill To:</b>", info_style),
-        Paragraph(f"<b>{customer.name}</b>", info_style),
-        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;{customer.address}", info_style),
-        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;Phone: {customer.phone}", info_style),
-        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;Email: {customer.email}", info_style)
-    ]
-    
-    # Create two column layout with adjusted widths
-    col1_width = 200
-    col2_width = 300
-    col1 = [Paragraph(p.text, p.style) for p in invoice_info]
-    col2 = [Paragraph(p.text, p.style) for p in customer_info]
-    
-    # Add columns to document with proper spacing
-    elements.append(Table([[col1, col2]], colWidths=[col1_width, col2_width], style=[
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elements.append(Spacer(1, 20))
-    
-    # Add device information
-    elements.append(Paragraph("<b>Device Information:</b>", info_style))
-    device_info = [
-        f"Brand: {device.brand}",
-        f"Model: {device.model}",
-        f"Serial Number: {device.serial_number}",
-        f"Issue: {device.issue}"
-    ]
-    for info in device_info:
-        elements.append(Paragraph(info, info_style))
-    
-    elements.append(Spacer(1, 20))
-    
-    # Add services table with fancy styling
-    services_data = [['Description', 'Cost']]
-    subtotal = 0
-    for service in ticket.services:
-        services_data.append([service.description, f"{RUPEE_SYMBOL} {service.cost:.2f}"])
-        subtotal += service.cost
-    
-    # Calculate tax and total
-    tax_amount = subtotal * (invoice.tax_rate / 100)
-    final_total = subtotal + tax_amount - invoice.discount
+@app.route('/invoices/download/<int:invoice_id>')
+@login_required
+def download_invoice(invoice_id):
+    invoice = invoice_query().filter_by(id=invoice_id).first_or_404()
     
-    # Add summary rows
-    services_data.append(['', ''])  # Empty row for spacing
-    services_data.append(['Subtotal', f"{RUPEE_SYMBOL} {subtotal:.2f}"])
-    services_data.append(['Tax', f"{RUPEE_SYMBOL} {tax_amount:.2f}"])
-    services_data.append(['Discount', f"-{RUPEE_SYMBOL} {invoice.discount:.2f}"])
-    services_data.append(['Total', f"{RUPEE_SYMBOL} {final_total:.2f}"])
+    # The cache key covers every input of the PDF, so edits to the invoice,
+    # its services, customer or device all lead to a fresh render
+    key = pdf_cache.key_for(invoice_pdf_data(invoice))
+    pdf_file = pdf_cache.lookup(key)
+    job = None
+    if pdf_file is None:
+        job = latest_job(invoice.id)
+        if job is None or job.content_key != key or job.status in (JOB_DONE, JOB_FAILED):
+            pdf_queue.enqueue(invoice.id)
+            job = latest_job(invoice.id)
+        pdf_file = pdf_cache.lookup(key)
     
-    # Create table with fancy styling
-    table = Table(services_data, colWidths=[400, 100])
-    table.setStyle(TableStyle([
-        # Header styling
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    if pdf_file is not None:
+        return send_file(pdf_file, as_attachment=True, download_name=f"invoice_{invoice.id}.pdf", etag=key)
+    if job.status == JOB_FAILED:
+        flash(f'Invoice #{invoice.id} could not be rendered. Please try again.', 'error')
+    else:
+        flash(f'Invoice #{invoice.id} is still rendering. Please try again in a moment.')
+    return redirect(url_for('invoices'))
+
+@app.route('/invoices/<int:invoice_id>/pdf-status')
+@login_required
+def invoice_pdf_status(invoice_id):
+    invoice = invoice_query().filter_by(id=invoice_id).first_or_404()
+    key = pdf_cache.key_for(invoice_pdf_data(invoice))
+    job = latest_job(invoice.id)
+    if pdf_cache.lookup(key) is not None:
+        status = JOB_DONE
+    elif job is not None and job.content_key == key:
+        status = job.status
+    else:
+        # Never rendered, or the inputs changed since the last render
+        status = None
+    return jsonify(invoice_id=invoice.id, status=status,
+                   attempts=job.attempts if job else 0, error=job.error if job else None)
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus text format; restrict who can reach it at the reverse proxy
+    return Response(request_profiler.metrics_text() + page_cache.metrics_text(),
+                    mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/cache')
+@login_required
+def cache_stats():
+    if current_user.role != 'admin':
+        abort(403)
+    return jsonify(page_cache.stats())
+
+@app.route('/admin/invoices/export', methods=['GET', 'POST'])
+@login_required
+def export_invoices():
+    if current_user.role != 'admin':
+        abort(403)
+    if request.method == 'POST':
+        try:
+            start = request.form.get('start_date')
+            end = request.form.get('end_date')
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+            end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+            invoice_ids = parse_invoice_ids(request.form.get('invoice_ids', ''))
+        except ValueError:
+            flash('Enter dates as YYYY-MM-DD and invoice IDs as numbers separated by commas.', 'error')
+            return redirect(url_for('export_invoices'))
         
-        # Body styling
-        ('BACKGROUND', (0, 1), (-1, -5), colors.white),
-        ('TEXTCOLOR', (0, 1), (-1, -5), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, 1), (-1, -5), 'LEFT'),
-        ('FONTNAME', (0, 1), (-1, -5), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -5), 10),
-        ('GRID', (0, 0), (-1, -5), 1, colors.HexColor('#bdc3c7')),
+        # The archive is built on disk and streamed from there
+        fd, out_path = tempfile.mkstemp(suffix='.zip')
+        os.close(fd)
+        count = export_invoices_zip(invoice_export_query(start, end, invoice_ids), out_path,
+                                    workers=app.config['EXPORT_WORKERS'], cache=pdf_cache)
+        if not count:
+            os.remove(out_path)
+            flash('No invoices match those filters.')
+            return redirect(url_for('export_invoices'))
         
-        # Summary section styling
-        ('BACKGROUND', (0, -4), (-1, -1), colors.HexColor('#f8f9fa')),
-        ('TEXTCOLOR', (0, -4), (-1, -1), colors.HexColor('#2c3e50')),
-        ('ALIGN', (0, -4), (-1, -1), 'RIGHT'),
-        ('FONTNAME', (0, -4), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -4), (-1, -1), 10),
-        ('GRID', (0, -4), (-1, -1), 1, colors.HexColor('#bdc3c7')),
+        def stream_archive():
+            try:
+                with open(out_path, 'rb') as f:
+                    while True:
+                        chunk = f.read(64 * 1024)
+                        if not chunk:
+                            break
+                        yield chunk
+            finally:
+                os.remove(out_path)
         
-        # Total row styling
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#2ecc71')),
-        ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -1), (-1, -1), 12),
-    ]))
-    elements.append(table)
-    
-    # Add footer
-    elements.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        alignment=TA_CENTER,
-        fontSize=10,
-        textColor=colors.HexColor('#7f8c8d')
-    )
-    elements.append(Paragraph("Thank you for choosing our services!", footer_style))
-    elements.append(Paragraph("For any queries, please contact us at support@repaircenter.com", footer_style))
-    
-    # Build PDF
-    doc.build(elements)
+        filename = f"invoices_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(stream_archive(), mimetype='application/zip', headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'Content-Length': str(os.path.getsize(out_path)),
+        })
+    return render_template('export_invoices.html')
+
+@app.cli.command('export-invoices')
+@click.argument('out_path')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), help='First invoice date to include')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last invoice date to include')
+@click.option('--ids', default='', help='Comma separated invoice IDs')
+@click.option('--workers', type=int, default=None, help='Render processes, defaults to one per CPU')
+def export_invoices_command(out_path, start, end, ids, workers):
+    """Render invoice PDFs into a ZIP archive"""
+    query = invoice_export_query(start.date() if start else None,
+                                 end.date() if end else None,
+                                 parse_invoice_ids(ids))
+    started = time.perf_counter()
+    count = export_invoices_zip(query, out_path, workers=workers, cache=pdf_cache)
+    print(f"Exported {count} invoices to {out_path} in {time.perf_counter() - started:.1f}s")
+
+@app.cli.command('import-legacy')
+@click.option('--data-dir', default='data', help='Directory holding the desktop app CSV files')
+@click.option('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per transaction')
+@click.option('--technician', default=None, help='Username for tickets whose technician has no account')
+def import_legacy_command(data_dir, chunk_size, technician):
+    """Import the desktop app's CSV files; safe to re-run after an interruption"""
+    upgrade()
+    started = time.perf_counter()
+    results = LegacyImporter(data_dir, chunk_size, technician).run()
+    total = sum(result['imported'] for result in results.values())
+    elapsed = time.perf_counter() - started
+    print(f"Imported {total} rows in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)")
+    # The bulk inserts bypass the ORM hooks that maintain the dashboard counters,
+    # the report rollups and the page cache
+    reconcile_stats()
+    rebuild_reports()
+    db.session.commit()
+    page_cache.invalidate([model.__table__.name for model in (Customer, Device, Ticket, Service, Invoice)])
 
-@app.route('/invoices/download/<int:invoice_id>')
+@app.route('/export/<name>.<fmt>')
 @login_required
-def download_invoice(invoice_id):
-    pdf_file = f"invoices/invoice_{invoice_id}.pdf"
-    return send_file(pdf_file, as_attachment=True)
+def export_data(name, fmt):
+    if name not in EXPORTABLE or fmt not in FORMATS:
+        abort(404)
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    return Response(stream_with_context(export_stream(EXPORTABLE[name], fmt)), mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+    })
 
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
@@ -617,8 +705,16 @@ if __name__ == '__main__':
     if not os.path.exists('invoices'):
         os.makedirs('invoices')
     
-    # Create database tables
+    # Bring the database schema up to date
     with app.app_context():
-        db.create_all()
+        upgrade()
+    
+    # Pick up PDF renders that were interrupted by the last shutdown
+    with app.app_context():
+        pdf_queue.resume_pending()
+    
+    # Periodically rebuild the dashboard counters from scratch
+    if app.config['STATS_RECONCILE_INTERVAL']:
+        start_reconciler(app, app.config['STATS_RECONCILE_INTERVAL'])
     
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Benchmark of the desktop app's CSV storage modes.
+
+Builds a synthetic data directory, then times the two mutating operations
+the desktop app performs on existing rows:
+
+* marking an invoice paid (an update), and
+* deleting a customer with their devices, tickets, services and invoices
+  (a cascading delete across all five files).
+
+Both are measured in rewrite mode, where every change rewrites the affected
+CSV files, and in journal mode, where every change is one fsynced line in
+data/journal.log. Run from the project root:
+
+    python benchmarks/bench_csv_store.py --sizes 10000,100000,1000000 --ops 20
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_store import CsvStore, SCHEMAS  # noqa: E402
+
+
+def build_data(data_dir, rows):
+    """Write ``rows`` rows spread evenly over the five files"""
+    per_table = max(rows // 5, 1)
+    generators = {
+        'customers': lambda n: [n, f'Customer {n}', '98450 12345', f'c{n}@example.com', 'MG Road'],
+        'devices': lambda n: [n, n, 'Lenovo', 'ThinkPad T14', f'SN{n:08d}', 'No power'],
+        'tickets': lambda n: [n, n, 'Jane Smith', 'Completed', '2024-01-15 10:30:00'],
+        'services': lambda n: [n, 'Board repair', '1500.0'],
+        'invoices': lambda n: [n, n, '1770.0', 'Unpaid', '2024-01-16 12:00:00', '18.0', '0.0'],
+    }
+    os.makedirs(data_dir, exist_ok=True)
+    for name, (_, fields, _) in SCHEMAS.items():
+        with open(os.path.join(data_dir, f'{name}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(generators[name](n) for n in range(1, per_table + 1))
+    return per_table
+
+
+def time_ops(store, per_table, ops, seed):
+    rng = random.Random(seed)
+    updates, deletes = [], []
+    for invoice_id in rng.sample(range(1, per_table + 1), ops):
+        start = time.perf_counter()
+        store.invoices.update(invoice_id, paid_status='Paid')
+        updates.append(time.perf_counter() - start)
+    for customer_id in rng.sample(range(1, per_table + 1), ops):
+        start = time.perf_counter()
+        store.delete_customer(customer_id)
+        deletes.append(time.perf_counter() - start)
+    return updates, deletes
+
+
+def report(label, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"    {label:<16} mean {statistics.mean(ms):9.2f} ms   median {statistics.median(ms):9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma separated total row counts')
+    parser.add_argument('--ops', type=int, default=20, help='operations of each kind per run')
+    parser.add_argument('--no-sync', action='store_true', help='skip fsync on journal writes')
+    args = parser.parse_args()
+
+    for size in [int(s) for s in args.sizes.split(',')]:
+        print(f"{size} rows")
+        with tempfile.TemporaryDirectory() as tmp:
+            base = os.path.join(tmp, 'base')
+            per_table = build_data(base, size)
+            ops = min(args.ops, per_table // 2)
+            for mode in ('rewrite', 'journal'):
+                data_dir = os.path.join(tmp, mode)
+                shutil.copytree(base, data_dir)
+                store = CsvStore(data_dir, journal=mode == 'journal', compact_after=10 ** 9, sync=not args.no_sync)
+                store.initialize()
+
+                start = time.perf_counter()
+                for table in store.tables.values():
+                    table.all()
+                load = time.perf_counter() - start
+
+                updates, deletes = time_ops(store, per_table, ops, seed=size)
+                print(f"  {mode} (load {load:.2f}s)")
+                report('invoice update', updates)
+                report('customer delete', deletes)
+                if mode == 'journal':
+                    start = time.perf_counter()
+                    store.compact()
+                    print(f"    compaction       {(time.perf_counter() - start) * 1000:9.2f} ms")
+                del store
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Scaling benchmark of the desktop app's data paths.
+
+Builds data directories of increasing size (``--sizes`` tickets, with
+customers, devices, services and invoices in proportion) and times the
+desktop_data.py code behind each tab, plus the cascading deletes, in the
+journal mode the app runs in. Loads are timed warm, with the tables
+already in memory, as they are when a tab is refreshed. The summary is
+timed computed and served from its cache.
+
+For each operation the times are fitted to time ~ size ** k, and k is
+checked against the operation's bound in OPERATIONS: listing rows must
+stay linear (k <= 1.5, well short of the 2 of a quadratic path) and a
+delete must not depend on the table sizes (k <= 0.5). The script exits
+with status 1 if any operation scales worse than its bound;
+tests/test_desktop_scaling.py runs the same check at small sizes. Run from
+the project root:
+
+    python benchmarks/bench_desktop.py --sizes 1000,10000,100000 --repeat 5
+"""
+import argparse
+import csv
+import gc
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from csv_store import CsvStore, SCHEMAS  # noqa: E402
+from desktop_data import DesktopData  # noqa: E402
+
+LINEAR = 1.5
+CONSTANT = 0.5
+
+# name: (function of (data, rng), largest acceptable scaling exponent)
+OPERATIONS = {
+    'load_customers': (lambda data, rng: data.customer_rows(), LINEAR),
+    'load_devices': (lambda data, rng: data.device_rows(), LINEAR),
+    'load_tickets': (lambda data, rng: data.ticket_rows(), LINEAR),
+    'load_services': (lambda data, rng: data.service_rows(), LINEAR),
+    'load_invoices': (lambda data, rng: data.invoice_rows(), LINEAR),
+    'load_invoice_ticket_combo': (lambda data, rng: data.invoice_ticket_choices([]), LINEAR),
+    'update_summary_stats': (lambda data, rng: data.compute_summary(), LINEAR),
+    'update_summary_stats (cached)': (lambda data, rng: data.summary_stats(), CONSTANT),
+    'delete_customer': (lambda data, rng: data.store.delete_customer(_pick(data.store.customers, rng)), CONSTANT),
+    'delete_device': (lambda data, rng: data.store.delete_devices({_pick(data.store.devices, rng)}), CONSTANT),
+    'delete_ticket': (lambda data, rng: data.store.delete_tickets({_pick(data.store.tickets, rng)}), CONSTANT),
+    'delete_invoice': (lambda data, rng: data.store.invoices.delete(invoice_id=_pick(data.store.invoices, rng)),
+                       CONSTANT),
+}
+
+
+def _pick(table, rng):
+    """The ID of a random row that still exists"""
+    while True:
+        row_id = str(rng.randint(1, len(table._by_id) * 2))
+        if table.get(row_id) is not None:
+            return row_id
+
+
+def build_data(data_dir, tickets, rng):
+    """Write linked CSV files: 2.5 tickets per customer, 1.6 per device, 1-3 services per ticket"""
+    customers = max(1, tickets * 2 // 5)
+    devices = max(customers, tickets * 5 // 8)
+    rows = {name: [] for name in SCHEMAS}
+    for n in range(1, customers + 1):
+        rows['customers'].append([n, f'Customer {n}', f'98450{n % 100000:05d}', f'c{n}@example.com', 'MG Road'])
+    for n in range(1, devices + 1):
+        owner = n if n <= customers else rng.randint(1, customers)
+        rows['devices'].append([n, owner, 'Lenovo', 'ThinkPad T14', f'SN{n:08d}', 'No power'])
+    invoice_id = 0
+    for n in range(1, tickets + 1):
+        status = 'Completed' if rng.random() < 0.8 else 'In Progress'
+        rows['tickets'].append([n, rng.randint(1, devices), 'Jane Smith', status, '2024-01-15 10:30:00'])
+        for _ in range(rng.randint(1, 3)):
+            rows['services'].append([n, 'Board repair', f'{rng.randint(3, 60) * 50}.0'])
+        if status == 'Completed' and rng.random() < 0.9:
+            invoice_id += 1
+            rows['invoices'].append([invoice_id, n, '1770.0', rng.choice(['Paid', 'Unpaid']),
+                                     '2024-01-16 12:00:00', '18.0', '0.0'])
+    os.makedirs(data_dir, exist_ok=True)
+    for name, (_, fields, _) in SCHEMAS.items():
+        with open(os.path.join(data_dir, f'{name}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            writer.writerows(rows[name])
+
+
+def median_ms(fn, repeat):
+    # Collection pauses land on whichever run allocates past the threshold; keep them out, as timeit does
+    gc.collect()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return statistics.median(timings) * 1000
+
+
+def exponent(sizes, timings):
+    """Least-squares slope of log(time) against log(size)"""
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(ms, 1e-6)) for ms in timings]
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def measure(sizes, repeat, seed=1, sync=False):
+    """Median milliseconds of each operation at each size: name -> [ms per size]"""
+    results = {name: [] for name in OPERATIONS}
+    for size in sizes:
+        rng = random.Random(seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            build_data(tmp, size, rng)
+            # A large compact_after keeps compaction, which is O(size), out of the delete timings
+            store = CsvStore(tmp, journal=True, compact_after=10 ** 9, sync=sync)
+            store.initialize()
+            data = DesktopData(store)
+            for table in store.tables.values():
+                table.all()
+            for name, (operation, _) in OPERATIONS.items():
+                results[name].append(median_ms(lambda: operation(data, rng), repeat))
+    return results
+
+
+def scaling(sizes, results):
+    """Fitted exponent and bound of each operation: name -> (k, bound)"""
+    return {name: (exponent(sizes, results[name]), bound) for name, (_, bound) in OPERATIONS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated ticket counts')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per operation and size')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--sync', action='store_true',
+                        help='fsync journal commits as the app does (adds a constant cost per delete)')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    if len(sizes) < 2:
+        parser.error('--sizes needs at least two sizes to fit the scaling')
+
+    results = measure(sizes, args.repeat, args.seed, args.sync)
+    print(f"{'operation':<32}" + ''.join(f'{size:>12,}' for size in sizes) + f"{'k':>7}{'bound':>7}")
+    failures = []
+    for name, (k, bound) in scaling(sizes, results).items():
+        ok = k <= bound
+        if not ok:
+            failures.append(name)
+        print(f'{name:<32}' + ''.join(f'{ms:>10.2f}ms' for ms in results[name])
+              + f"{k:>7.2f}{bound:>7.2f}{'' if ok else '  FAIL'}")
+    if failures:
+        print(f"Scaling worse than the bound: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
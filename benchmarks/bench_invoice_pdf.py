@@ -0,0 +1,73 @@
+"""Micro-benchmark for invoice PDF rendering.
+
+Renders the same synthetic invoice repeatedly and reports the time per
+invoice. Run from the project root:
+
+    python benchmarks/bench_invoice_pdf.py --count 200 --services 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from invoice_pdf import render_invoice_pdf  # noqa: E402
+
+
+def sample_invoice(invoice_id, services):
+    return {
+        'invoice_id': invoice_id,
+        'date': datetime(2024, 1, 15, 10, 30),
+        'paid_status': 'Unpaid',
+        'tax_rate': 18.0,
+        'discount': 50.0,
+        'customer': {
+            'name': 'Asha Verma',
+            'address': '12 MG Road, Bengaluru',
+            'phone': '98450 12345',
+            'email': 'asha@example.com',
+        },
+        'device': {
+            'brand': 'Lenovo',
+            'model': 'ThinkPad T14',
+            'serial_number': 'PF3XK2LM',
+            'issue': 'Does not power on after liquid spill',
+        },
+        'services': [
+            {'description': f'Service line {n}', 'cost': 150.0 + n}
+            for n in range(services)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100, help='invoices to render')
+    parser.add_argument('--services', type=int, default=5, help='service lines per invoice')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed renders first')
+    args = parser.parse_args()
+
+    timings = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n in range(args.warmup + args.count):
+            data = sample_invoice(n + 1, args.services)
+            pdf_file = os.path.join(out_dir, f'invoice_{n + 1}.pdf')
+            start = time.perf_counter()
+            render_invoice_pdf(data, pdf_file)
+            if n >= args.warmup:
+                timings.append(time.perf_counter() - start)
+
+    ms = sorted(t * 1000 for t in timings)
+    print(f"Rendered {args.count} invoices with {args.services} service lines each")
+    print(f"  mean   {statistics.mean(ms):8.2f} ms/invoice")
+    print(f"  median {statistics.median(ms):8.2f} ms/invoice")
+    print(f"  p95    {ms[int(len(ms) * 0.95) - 1]:8.2f} ms/invoice")
+    print(f"  total  {sum(ms) / 1000:8.2f} s")
+
+
+if __name__ == '__main__':
+    main()
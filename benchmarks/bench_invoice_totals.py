@@ -0,0 +1,86 @@
+"""Benchmark of invoice total calculation for tickets with many service lines.
+
+Creates a scratch SQLite database with one ticket per requested size and
+times the two ways of adding up a ticket's services before an invoice is
+written:
+
+* python: load every Service row through the ORM and sum() the costs, which
+  is what generate_invoice and edit_invoice used to do, and
+* sql: a single SELECT SUM(cost) (queries.service_total).
+
+Each run also prints the float total next to the exact paise total, to
+show the drift the old Float columns accumulated. Run from the project
+root:
+
+    python benchmarks/bench_invoice_totals.py --lines 100,500,2000 --repeat 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, models, lines, rng):
+    User, Customer, Device, Ticket, Service = models
+    db.session.add(User(id=1, username='tech', password_hash='x', email='tech@example.com', role='technician'))
+    ticket_ids = {}
+    for n, count in enumerate(lines, start=1):
+        db.session.add(Customer(id=n, name=f'Customer {n}'))
+        db.session.add(Device(id=n, customer_id=n, brand='Lenovo', model='ThinkPad T14'))
+        db.session.add(Ticket(id=n, device_id=n, technician_id=1, status='Completed', created_date=datetime.utcnow()))
+        db.session.add_all(Service(ticket_id=n, description=f'Part {i}', cost=f'{rng.randint(1, 500000) / 100:.2f}')
+                           for i in range(count))
+        ticket_ids[count] = n
+    db.session.commit()
+    return ticket_ids
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lines', default='100,500,2000', help='comma separated service lines per ticket')
+    parser.add_argument('--repeat', type=int, default=50, help='timed runs per method')
+    args = parser.parse_args()
+    lines = [int(n) for n in args.lines.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from flask_migrate import upgrade
+        from app import app
+        from models import db, User, Customer, Device, Ticket, Service
+        from queries import service_total
+
+        with app.app_context():
+            upgrade()
+            ticket_ids = seed(db, (User, Customer, Device, Ticket, Service), lines, random.Random(1))
+
+            def python_total(ticket_id):
+                db.session.expire_all()
+                return sum(float(service.cost) for service in db.session.get(Ticket, ticket_id).services)
+
+            print(f"{'lines':>6} {'python':>10} {'sql':>10} {'speedup':>8}   float total vs exact total")
+            for count, ticket_id in ticket_ids.items():
+                python_ms = median_ms(lambda: python_total(ticket_id), args.repeat)
+                sql_ms = median_ms(lambda: service_total(ticket_id), args.repeat)
+                print(f"{count:>6} {python_ms:>8.2f}ms {sql_ms:>8.2f}ms {python_ms / sql_ms:>7.1f}x"
+                      f"   {python_total(ticket_id)!r} vs {service_total(ticket_id)}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
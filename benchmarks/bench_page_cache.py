@@ -0,0 +1,111 @@
+"""Benchmark of the page cache on the list pages and the dashboard.
+
+Seeds a scratch SQLite database, logs in with the test client and times
+GET requests for each cached page three ways:
+
+* off: PAGE_CACHE_BACKEND = 'none', every request queries and renders,
+* miss: a request right after one of the page's tables was invalidated, and
+* hit: a repeated request served from the in-process cache.
+
+Run from the project root:
+
+    python benchmarks/bench_page_cache.py --rows 20000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAGES = {
+    '/dashboard': 'Customer',
+    '/customers': 'Customer',
+    '/devices': 'Device',
+    '/services': 'Service',
+    '/invoices': 'Invoice',
+}
+
+
+def seed(db, models, rows):
+    User, Customer, Device, Ticket, Service, Invoice = models
+    from werkzeug.security import generate_password_hash
+    conn = db.session.connection()
+    conn.execute(insert(User), [{'id': 1, 'username': 'admin', 'password_hash': generate_password_hash('admin123'),
+                                 'email': 'admin@example.com', 'role': 'admin'}])
+    now = datetime.utcnow()
+    for first in range(1, rows + 1, 10000):
+        ids = range(first, min(first + 10000, rows + 1))
+        conn.execute(insert(Customer), [{'id': n, 'name': f'Customer {n}', 'phone': f'98450{n:05d}'} for n in ids])
+        conn.execute(insert(Device), [{'id': n, 'customer_id': n, 'brand': 'Lenovo', 'model': 'ThinkPad'} for n in ids])
+        conn.execute(insert(Ticket), [{'id': n, 'device_id': n, 'technician_id': 1, 'status': 'Completed',
+                                       'created_date': now} for n in ids])
+        conn.execute(insert(Service), [{'id': n, 'ticket_id': n, 'description': 'Repair', 'cost': 150000} for n in ids])
+        conn.execute(insert(Invoice), [{'id': n, 'ticket_id': n, 'total_amount': 177000, 'paid_status': 'Paid',
+                                        'date': now, 'tax_rate': 1800, 'discount': 0} for n in ids])
+    db.session.commit()
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000, help='customers, devices, tickets, services and invoices')
+    parser.add_argument('--repeat', type=int, default=50, help='timed requests per page and mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from flask_migrate import upgrade
+        from app import app
+        from models import db, User, Customer, Device, Ticket, Service, Invoice
+        from page_cache import page_cache
+
+        app.config['STATS_RECONCILE_INTERVAL'] = 0
+        with app.app_context():
+            upgrade()
+            seed(db, (User, Customer, Device, Ticket, Service, Invoice), args.rows)
+            db.session.remove()
+
+        client = app.test_client()
+        client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+        def get(path):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+
+        def touch(table):
+            # Bump the table's version as a commit to it would, so the next request misses
+            page_cache.invalidate([table])
+
+        print(f"{'page':<12} {'off':>9} {'miss':>9} {'hit':>9}")
+        for path, model in PAGES.items():
+            table = model.lower()
+            app.config['PAGE_CACHE_BACKEND'] = 'none'
+            page_cache.init_app(app)
+            off = median_ms(lambda: get(path), args.repeat)
+            app.config['PAGE_CACHE_BACKEND'] = 'memory'
+            page_cache.init_app(app)
+            miss = median_ms(lambda: (touch(table), get(path)), args.repeat)
+            get(path)
+            hit = median_ms(lambda: get(path), args.repeat)
+            print(f"{path:<12} {off:>7.2f}ms {miss:>7.2f}ms {hit:>7.2f}ms")
+        print(page_cache.stats())
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark of the reports served from the daily rollups.
+
+Seeds a scratch SQLite database with tickets and invoices spread over
+three years, builds the rollups, then times each report two ways:
+
+* rollup: the functions in reporting.py, which read daily_*_stat rows, and
+* raw: the same figures aggregated over the invoice and ticket tables.
+
+It also times committing one new invoice, which includes refreshing that
+day's rollup row. Run from the project root:
+
+    python benchmarks/bench_reports.py --invoices 200000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DAYS = 3 * 365
+
+
+def seed(db, models, count, rng):
+    User, Customer, Device, Ticket, Invoice = models
+    now = datetime.utcnow()
+    conn = db.session.connection()
+    conn.execute(insert(User), [{'id': n, 'username': f'tech{n}', 'password_hash': 'x',
+                                 'email': f'tech{n}@example.com', 'role': 'technician'} for n in range(1, 6)])
+    conn.execute(insert(Customer), [{'id': 1, 'name': 'Customer'}])
+    conn.execute(insert(Device), [{'id': 1, 'customer_id': 1, 'brand': 'Lenovo', 'model': 'ThinkPad T14'}])
+    for first in range(1, count + 1, 10000):
+        tickets, invoices = [], []
+        for n in range(first, min(first + 10000, count + 1)):
+            created = now - timedelta(days=rng.randint(0, DAYS), minutes=rng.randint(0, 1440))
+            completed = created + timedelta(hours=rng.randint(1, 240))
+            tickets.append({'id': n, 'device_id': 1, 'technician_id': rng.randint(1, 5), 'status': 'Completed',
+                            'created_date': created, 'completed_date': completed})
+            invoices.append({'id': n, 'ticket_id': n, 'total_amount': rng.randint(100, 500000) / 100,
+                             'paid_status': rng.choice(['Paid', 'Paid', 'Unpaid']), 'date': completed,
+                             'tax_rate': 18, 'discount': 0})
+        conn.execute(insert(Ticket), tickets)
+        conn.execute(insert(Invoice), invoices)
+    db.session.commit()
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--invoices', type=int, default=200000, help='tickets and invoices to seed')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per report')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from flask_migrate import upgrade
+        from app import app
+        from models import db, User, Customer, Device, Ticket, Invoice
+        import reporting
+
+        with app.app_context():
+            upgrade()
+            started = time.perf_counter()
+            seed(db, (User, Customer, Device, Ticket, Invoice), args.invoices, random.Random(1))
+            print(f"Seeded {args.invoices} tickets and invoices in {time.perf_counter() - started:.1f}s")
+            started = time.perf_counter()
+            reporting.rebuild_reports()
+            db.session.commit()
+            print(f"Built rollups in {time.perf_counter() - started:.2f}s")
+
+            end = datetime.utcnow().date()
+            start = end - timedelta(days=365)
+            unpaid = Invoice.paid_status != 'Paid'
+            raw_queries = {
+                'revenue by month': lambda: db.session.execute(
+                    select(func.strftime('%Y-%m', Invoice.date), func.count(), func.sum(Invoice.total_amount),
+                           func.sum(case((unpaid, Invoice.total_amount), else_=0)))
+                    .where(Invoice.date >= start).group_by(func.strftime('%Y-%m', Invoice.date))).all(),
+                'technician throughput': lambda: db.session.execute(
+                    select(Ticket.technician_id, func.count(),
+                           func.avg(func.julianday(Ticket.completed_date) - func.julianday(Ticket.created_date)))
+                    .where(Ticket.completed_date >= start).group_by(Ticket.technician_id)).all(),
+                'unpaid aging': lambda: db.session.execute(
+                    select(func.date(Invoice.date), func.count(), func.sum(Invoice.total_amount))
+                    .where(unpaid).group_by(func.date(Invoice.date))).all(),
+            }
+            rollup_queries = {
+                'revenue by month': lambda: reporting.revenue_report(start, end, 'month'),
+                'technician throughput': lambda: reporting.technician_report(start, end),
+                'unpaid aging': lambda: reporting.unpaid_aging(),
+            }
+            print(f"{'report':<24} {'raw':>10} {'rollup':>10}")
+            for name in rollup_queries:
+                raw_ms = median_ms(raw_queries[name], args.repeat)
+                rollup_ms = median_ms(rollup_queries[name], args.repeat)
+                print(f"{name:<24} {raw_ms:>8.2f}ms {rollup_ms:>8.2f}ms")
+
+            def add_invoice():
+                db.session.add(Invoice(ticket_id=1, total_amount='118.00', paid_status='Unpaid', tax_rate=18, discount=0))
+                db.session.commit()
+            print(f"{'commit one invoice':<24} {median_ms(add_invoice, args.repeat):>19.2f}ms (includes rollup refresh)")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
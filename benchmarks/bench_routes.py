@@ -0,0 +1,302 @@
+"""Load benchmark of the main pages, recorded for regression comparison.
+
+Builds a SQLite database of ``--tickets`` synthetic tickets with
+synthetic_data.py (or reuses the one at ``--database``, generating it there
+the first time; each run works on a copy), logs in as admin and times:
+
+* GET /dashboard,
+* GET /invoices and GET /tickets, cycling through their sort orders,
+* POST /invoices/generate for completed tickets that have no invoice yet,
+* GET /invoices/download/<id> for PDFs not rendered yet (render), then the
+  same invoices again (cached).
+
+Requests go through the Flask test client (``--mode client``) or over HTTP
+to a local threaded WSGI server with ``--concurrency`` clients (``--mode
+server``). PDFs render inline and the page cache is off unless
+``--page-cache memory`` is given, so the figures follow the queries and
+templates. p50/p95/p99 latency and throughput per route are printed and,
+with ``--output``, written to a JSON file; ``--compare`` checks a run
+against such a file and exits with status 1 if a route's p95 got more than
+``--tolerance`` slower. Run from the project root:
+
+    python benchmarks/bench_routes.py --tickets 100000 --database /tmp/bench-100k.db --output before.json
+    python benchmarks/bench_routes.py --tickets 100000 --database /tmp/bench-100k.db --compare before.json
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import platform
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+INVOICE_URLS = ['/invoices', '/invoices?sort=total_amount&dir=desc', '/invoices?sort=paid_status&dir=asc',
+                '/invoices?sort=id&dir=asc']
+TICKET_URLS = ['/tickets', '/tickets?sort=status&dir=asc', '/tickets?sort=id&dir=desc', '/tickets?per_page=200']
+
+
+def build_database(app, tickets, seed):
+    """Migrate the app's empty database and fill it with synthetic data"""
+    from flask_migrate import upgrade
+    from models import db
+    from synthetic_data import generate
+    with app.app_context():
+        upgrade()
+        generate(tickets, seed=seed)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def plan(args):
+    """The requests of each route: name -> list of (method, path, form data, expected status)"""
+    from models import db, Ticket, Invoice
+    routes = {
+        'GET /dashboard': [('GET', '/dashboard', None, 200)] * args.requests,
+        'GET /invoices': [('GET', INVOICE_URLS[n % len(INVOICE_URLS)], None, 200) for n in range(args.requests)],
+        'GET /tickets': [('GET', TICKET_URLS[n % len(TICKET_URLS)], None, 200) for n in range(args.requests)],
+    }
+    pending = db.session.scalars(
+        select(Ticket.id).outerjoin(Invoice).where(Ticket.status == 'Completed', Invoice.id.is_(None))
+        .order_by(Ticket.id.desc()).limit(args.requests)
+    ).all()
+    routes['POST /invoices/generate'] = [
+        ('POST', '/invoices/generate', {'ticket_id': ticket_id, 'tax_rate': '18', 'discount': '0',
+                                        'paid_status': 'Unpaid'}, 302)
+        for ticket_id in pending
+    ]
+    # Older invoices than the ones just generated, so the renders include a variety of tickets
+    invoice_ids = db.session.scalars(select(Invoice.id).order_by(Invoice.id.desc())
+                                     .offset(len(pending)).limit(args.downloads)).all()
+    downloads = [('GET', f'/invoices/download/{invoice_id}', None, 200) for invoice_id in invoice_ids]
+    routes['GET /invoices/download (render)'] = downloads
+    routes['GET /invoices/download (cached)'] = downloads
+    return routes
+
+
+class TestClientDriver:
+    """Sends requests through Flask's test client, one at a time"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+
+    def send(self, method, path, data):
+        response = self.client.open(path, method=method, data=data)
+        response.get_data()
+        return response.status_code
+
+    def run(self, requests_):
+        return [timed(self.send, request) for request in requests_]
+
+    def close(self):
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # Report the 302 itself rather than following it
+
+
+class ServerDriver:
+    """Sends requests over HTTP to a threaded WSGI server, from several clients at once"""
+
+    def __init__(self, app, concurrency):
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # No access log line per request
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.concurrency = concurrency
+        # One logged-in session per client, logged in up front so the password hashing is not timed
+        self.openers = queue.Queue()
+        for _ in range(concurrency):
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                                 _NoRedirect)
+            self._open(opener, 'POST', '/login', {'username': 'admin', 'password': 'admin123'})
+            self.openers.put(opener)
+
+    def _open(self, opener, method, path, data):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with opener.open(urllib.request.Request(self.base + path, data=body, method=method)) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    def send(self, method, path, data):
+        opener = self.openers.get()
+        try:
+            return self._open(opener, method, path, data)
+        finally:
+            self.openers.put(opener)
+
+    def run(self, requests_):
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            return list(pool.map(lambda request: timed(self.send, request), requests_))
+
+    def close(self):
+        self.server.shutdown()
+
+
+def timed(send, request):
+    method, path, data, expected = request
+    start = time.perf_counter()
+    status = send(method, path, data)
+    return time.perf_counter() - start, status == expected
+
+
+def summarize(results, wall):
+    timings = [seconds * 1000 for seconds, _ in results]
+    if len(timings) > 1:
+        cuts = statistics.quantiles(timings, n=100, method='inclusive')
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = timings[0]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok in results if not ok),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'throughput_rps': round(len(results) / wall, 2),
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Print p95 changes per route; return the routes that slowed down beyond ``tolerance``"""
+    for key in ('tickets', 'mode', 'concurrency', 'page_cache'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"Note: {key} differs from the baseline ({baseline['meta'].get(key)} vs {current['meta'].get(key)})")
+    regressions = []
+    print(f"\n{'route':<34} {'base p95':>10} {'p95':>10} {'change':>8}")
+    for route, figures in current['routes'].items():
+        before = baseline['routes'].get(route)
+        if before is None or not before['p95_ms']:
+            continue
+        change = figures['p95_ms'] / before['p95_ms'] - 1
+        flag = '  REGRESSION' if change > tolerance else ''
+        print(f"{route:<34} {before['p95_ms']:>8.2f}ms {figures['p95_ms']:>8.2f}ms {change:>+7.0%}{flag}")
+        if flag:
+            regressions.append(route)
+    return regressions
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=10000, help='synthetic tickets (1000 to 1000000)')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the synthetic data')
+    parser.add_argument('--database', help='SQLite file holding the synthetic data; generated if missing')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per route')
+    parser.add_argument('--downloads', type=int, default=20, help='invoice PDFs rendered, then downloaded again')
+    parser.add_argument('--mode', choices=['client', 'server'], default='client')
+    parser.add_argument('--concurrency', type=int, default=4, help='simultaneous clients in server mode')
+    parser.add_argument('--page-cache', choices=['none', 'memory'], default='none')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown before failing, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Runs write invoices, so each one works on a copy of the generated data
+        path = os.path.join(tmp, 'bench.db')
+        reuse = args.database and os.path.exists(args.database)
+        if reuse:
+            shutil.copyfile(args.database, path)
+        os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+        from app import app
+        from models import db, Ticket
+        from page_cache import page_cache
+        from pdf_cache import pdf_cache
+
+        if not reuse:
+            print(f'Generating {args.tickets} tickets')
+            build_database(app, args.tickets, args.seed)
+            if args.database:
+                shutil.copyfile(path, args.database)
+        app.config.update(STATS_RECONCILE_INTERVAL=0, PDF_WORKERS=0, PAGE_CACHE_BACKEND=args.page_cache,
+                          PDF_CACHE_DIR=os.path.join(tmp, 'pdf-cache'))
+        pdf_cache.init_app(app)
+        page_cache.init_app(app)
+
+        with app.app_context():
+            tickets = db.session.scalar(select(func.count()).select_from(Ticket))
+            routes = plan(args)
+            db.session.remove()
+
+        driver = TestClientDriver(app) if args.mode == 'client' else ServerDriver(app, args.concurrency)
+        for path_ in ['/dashboard'] + INVOICE_URLS + TICKET_URLS:
+            driver.send('GET', path_, None)  # Warm up templates and the database's page cache
+
+        report = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'git_commit': git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'database': 'sqlite',
+                'tickets': tickets,
+                'mode': args.mode,
+                'concurrency': args.concurrency if args.mode == 'server' else 1,
+                'page_cache': args.page_cache,
+            },
+            'routes': {},
+        }
+        print(f"{'route':<34} {'n':>5} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8}")
+        for route, requests_ in routes.items():
+            if not requests_:
+                print(f'{route:<34} skipped, nothing to request')
+                continue
+            start = time.perf_counter()
+            results = driver.run(requests_)
+            figures = summarize(results, time.perf_counter() - start)
+            report['routes'][route] = figures
+            print(f"{route:<34} {figures['requests']:>5} {figures['errors']:>4} {figures['p50_ms']:>7.2f}ms "
+                  f"{figures['p95_ms']:>7.2f}ms {figures['p99_ms']:>7.2f}ms {figures['throughput_rps']:>8.1f}")
+        driver.close()
+        with app.app_context():
+            db.engine.dispose()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"p95 regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
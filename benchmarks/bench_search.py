@@ -0,0 +1,121 @@
+"""Benchmark of full-text search at a million rows.
+
+Seeds a scratch SQLite database with customers, devices and services
+(``--rows`` in total, split 2:2:1) and times search.search() for a set of
+queries: whole names, short prefixes, serial number and phone fragments and
+common issue words that match a large part of the table. For comparison it
+also times the LIKE '%term%' filter a search box would otherwise run. Run
+from the project root:
+
+    python benchmarks/bench_search.py --rows 1000000 --repeat 20
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, or_
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST = ['Asha', 'Rahul', 'Priya', 'Vikram', 'Neha', 'Arjun', 'Kavya', 'Rohan', 'Meera', 'Sanjay',
+         'Divya', 'Karan', 'Pooja', 'Amit', 'Sneha', 'Nikhil', 'Anita', 'Suresh', 'Lakshmi', 'Manoj']
+LAST = ['Verma', 'Sharma', 'Iyer', 'Reddy', 'Patel', 'Nair', 'Gupta', 'Rao', 'Singh', 'Das',
+        'Menon', 'Joshi', 'Kulkarni', 'Bose', 'Pillai', 'Chopra', 'Mehta', 'Shetty', 'Dubey', 'Kapoor']
+DEVICES = [('Lenovo', 'ThinkPad T14'), ('Dell', 'Latitude 5420'), ('HP', 'EliteBook 840'), ('Apple', 'MacBook Air'),
+           ('Samsung', 'Galaxy S21'), ('Apple', 'iPhone 13'), ('OnePlus', 'Nord 2'), ('Asus', 'ZenBook 14')]
+ISSUES = ['cracked screen', 'battery drains fast', 'does not power on', 'keyboard keys stuck',
+          'water damage', 'charging port loose', 'overheating under load', 'no display output']
+SERVICES = ['Screen replacement', 'Battery replacement', 'Motherboard repair', 'Keyboard replacement',
+            'Charging port repair', 'Thermal paste and cleaning', 'Data recovery', 'OS reinstall']
+QUERIES = ['asha verma', 'kulkarni', 'ka', 'lenovo thinkpad', 'SN7A3', '98450', 'screen', 'water damage',
+           'thermal paste', 'zzz no such word']
+
+
+def seed(db, models, rows, rng):
+    User, Customer, Device, Ticket, Service = models
+    customers, devices, services = rows * 2 // 5, rows * 2 // 5, rows // 5
+    conn = db.session.connection()
+    conn.execute(insert(User), [{'id': 1, 'username': 'tech', 'password_hash': 'x',
+                                 'email': 'tech@example.com', 'role': 'technician'}])
+    for first in range(1, customers + 1, 10000):
+        batch = []
+        for n in range(first, min(first + 10000, customers + 1)):
+            name = f'{rng.choice(FIRST)} {rng.choice(LAST)}'
+            batch.append({'id': n, 'name': name, 'phone': f'+91 {rng.randint(70000, 99999)} {rng.randint(10000, 99999)}',
+                          'email': f"{name.lower().replace(' ', '.')}{n}@example.com"})
+        conn.execute(insert(Customer), batch)
+    for first in range(1, devices + 1, 10000):
+        batch = []
+        for n in range(first, min(first + 10000, devices + 1)):
+            brand, model = rng.choice(DEVICES)
+            batch.append({'id': n, 'customer_id': rng.randint(1, customers), 'brand': brand, 'model': model,
+                          'serial_number': f'SN{rng.getrandbits(40):010X}', 'issue': rng.choice(ISSUES)})
+        conn.execute(insert(Device), batch)
+    conn.execute(insert(Ticket), [{'id': n, 'device_id': n, 'technician_id': 1, 'status': 'Completed',
+                                   'created_date': datetime.utcnow()} for n in range(1, 1001)])
+    for first in range(1, services + 1, 10000):
+        conn.execute(insert(Service), [
+            {'id': n, 'ticket_id': rng.randint(1, 1000), 'description': f'{rng.choice(SERVICES)} #{n}', 'cost': 1500}
+            for n in range(first, min(first + 10000, services + 1))])
+    db.session.commit()
+
+
+def timings_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000, help='customers, devices and services to seed in total')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per query')
+    parser.add_argument('--skip-like', action='store_true', help='do not time the LIKE baseline')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from flask_migrate import upgrade
+        from app import app
+        from models import db, User, Customer, Device, Ticket, Service
+        import search
+
+        with app.app_context():
+            upgrade()
+            started = time.perf_counter()
+            seed(db, (User, Customer, Device, Ticket, Service), args.rows, random.Random(1))
+            print(f"Seeded {args.rows} rows (search index maintained by triggers) in {time.perf_counter() - started:.1f}s")
+            started = time.perf_counter()
+            search.rebuild_search_index()
+            print(f"Rebuilt and optimized the search index in {time.perf_counter() - started:.1f}s")
+
+            def like(query):
+                term = f'%{query}%'
+                Customer.query.filter(or_(Customer.name.ilike(term), Customer.phone.ilike(term),
+                                          Customer.email.ilike(term))).limit(search.DEFAULT_LIMIT).all()
+                Device.query.filter(or_(Device.brand.ilike(term), Device.model.ilike(term),
+                                        Device.serial_number.ilike(term), Device.issue.ilike(term))
+                                    ).limit(search.DEFAULT_LIMIT).all()
+                Service.query.filter(Service.description.ilike(term)).limit(search.DEFAULT_LIMIT).all()
+
+            print(f"{'query':<20} {'hits':>5} {'fts median':>11} {'fts max':>9} {'like median':>12}")
+            for query in QUERIES:
+                hits = sum(len(rows) for rows in search.search(query).values())
+                db.session.expunge_all()
+                median, worst = timings_ms(lambda: (search.search(query), db.session.expunge_all()), args.repeat)
+                baseline = '' if args.skip_like else f"{timings_ms(lambda: like(query), 3)[0]:>10.1f}ms"
+                print(f"{query:<20} {hits:>5} {median:>9.1f}ms {worst:>7.1f}ms {baseline:>12}")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
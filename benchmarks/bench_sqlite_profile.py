@@ -0,0 +1,150 @@
+"""Concurrent load test of the SQLite connection profiles.
+
+Seeds a fresh database, then runs several threads against it at once, each
+mixing the reads and writes of a busy counter:
+
+* read: the first page of unpaid invoices with ticket, device and customer,
+* write: a new ticket with a service line and its invoice in one
+  transaction, or marking an invoice paid.
+
+Every profile in sqlite_tuning.SQLITE_PROFILES is run against its own copy
+of the same data, and the report shows throughput, latency percentiles and
+how many operations failed with "database is locked". Run from the project
+root:
+
+    python benchmarks/bench_sqlite_profile.py --threads 8 --seconds 10 --writes 0.3
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, User, Customer, Device, Ticket, Service, Invoice  # noqa: E402
+import sqlite_tuning  # noqa: E402
+
+
+def open_engine(path, profile):
+    url = f'sqlite:///{path}'
+    engine = create_engine(url, **sqlite_tuning.engine_options(url, profile))
+    sqlite_tuning.apply_pragmas(engine, sqlite_tuning.SQLITE_PROFILES[profile])
+    return engine
+
+
+def seed(path, customers):
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    now = datetime(2024, 1, 15, 10, 30)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{'id': 1, 'username': 'tech', 'password_hash': 'x',
+                                     'email': 'tech@example.com', 'role': 'technician'}])
+        conn.execute(insert(Customer), [{'id': n, 'name': f'Customer {n}', 'phone': '98450 12345'}
+                                        for n in range(1, customers + 1)])
+        conn.execute(insert(Device), [{'id': n, 'customer_id': n, 'brand': 'Lenovo', 'model': 'ThinkPad T14'}
+                                      for n in range(1, customers + 1)])
+        conn.execute(insert(Ticket), [{'id': n, 'device_id': n, 'technician_id': 1, 'status': 'Completed',
+                                       'created_date': now} for n in range(1, customers + 1)])
+        conn.execute(insert(Service), [{'ticket_id': n, 'description': 'Board repair', 'cost': 1500.0}
+                                       for n in range(1, customers + 1)])
+        conn.execute(insert(Invoice), [{'id': n, 'ticket_id': n, 'total_amount': 1770.0, 'paid_status': 'Unpaid',
+                                        'date': now, 'tax_rate': 18.0, 'discount': 0.0}
+                                       for n in range(1, customers + 1)])
+    engine.dispose()
+
+
+def read(conn, rng, customers):
+    conn.execute(
+        select(Invoice, Ticket, Device, Customer)
+        .join(Ticket, Invoice.ticket_id == Ticket.id)
+        .join(Device, Ticket.device_id == Device.id)
+        .join(Customer, Device.customer_id == Customer.id)
+        .where(Invoice.paid_status == 'Unpaid')
+        .order_by(Invoice.date.desc(), Invoice.id.desc())
+        .limit(50)
+    ).all()
+    conn.rollback()
+
+
+def write(conn, rng, customers):
+    if rng.random() < 0.5:
+        conn.execute(update(Invoice).where(Invoice.id == rng.randint(1, customers)).values(paid_status='Paid'))
+    else:
+        now = datetime.utcnow()
+        device_id = rng.randint(1, customers)
+        ticket_id = conn.execute(insert(Ticket).values(device_id=device_id, technician_id=1, status='Received',
+                                                       created_date=now)).inserted_primary_key[0]
+        conn.execute(insert(Service).values(ticket_id=ticket_id, description='Screen replacement', cost=4200.0))
+        conn.execute(insert(Invoice).values(ticket_id=ticket_id, total_amount=4956.0, paid_status='Unpaid',
+                                            date=now, tax_rate=18.0, discount=0.0))
+    conn.commit()
+
+
+def worker(engine, seed_value, args, deadline, results):
+    rng = random.Random(seed_value)
+    timings, locked = [], 0
+    while time.perf_counter() < deadline:
+        op = write if rng.random() < args.writes else read
+        start = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                op(conn, rng, args.customers)
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+            continue
+        timings.append(time.perf_counter() - start)
+    results.append((timings, locked))
+
+
+def run(path, profile, args):
+    engine = open_engine(path, profile)
+    results = []
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=worker, args=(engine, n, args, deadline, results))
+               for n in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    ms = sorted(t * 1000 for timings, _ in results for t in timings)
+    locked = sum(count for _, count in results)
+    print(f"  {profile}")
+    print(f"    throughput {len(ms) / args.seconds:9.1f} ops/s   ({len(ms)} ok, {locked} database is locked)")
+    if ms:
+        print(f"    latency    median {statistics.median(ms):8.2f} ms   p95 {ms[int(len(ms) * 0.95) - 1]:8.2f} ms"
+              f"   p99 {ms[int(len(ms) * 0.99) - 1]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--seconds', type=float, default=10, help='duration of each run')
+    parser.add_argument('--writes', type=float, default=0.3, help='fraction of operations that write')
+    parser.add_argument('--customers', type=int, default=5000, help='customers (with one invoice each) to seed')
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.writes:.0%} writes, {args.seconds:g}s per profile")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, 'base.db')
+        seed(base, args.customers)
+        for profile in sqlite_tuning.SQLITE_PROFILES:
+            path = os.path.join(tmp, f'{profile}.db')
+            shutil.copy(base, path)
+            run(path, profile, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""Synthetic repair shop data for load tests and benchmarks.
+
+Fills the customer, device, ticket, service and invoice tables of an
+empty, migrated database with ``--tickets`` tickets (1k to 1M) and the rows
+around them, shaped like a real shop's history:
+
+* tickets spread over ``--days`` days, busier recent months, quieter Sundays,
+* returning customers (about 2.5 tickets each) and devices that come back,
+* a few brands and technicians doing most of the work,
+* older tickets nearly all Completed or Cancelled, recent ones mostly open,
+* one to several service lines per ticket with lognormal prices,
+* invoices for most completed tickets (some are left for /invoices/generate),
+  mostly paid, with 18% tax and the odd discount.
+
+The same ``--seed`` gives the same data. Rows go in with chunked Core
+inserts, so the dashboard counters and report rollups are rebuilt at the
+end. Run from the project root against the configured database:
+
+    python benchmarks/synthetic_data.py --tickets 100000
+
+bench_routes.py calls ``generate`` to build its own scratch database.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNK = 10000
+TAX_RATE = Decimal('18')
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Rohan', 'Ishaan', 'Kabir', 'Rahul', 'Amit', 'Suresh',
+               'Priya', 'Ananya', 'Diya', 'Kavya', 'Meera', 'Neha', 'Pooja', 'Sneha', 'Lakshmi', 'Fatima',
+               'Mohammed', 'Imran', 'Joseph', 'Thomas', 'Gurpreet', 'Harpreet', 'Deepak', 'Vikram', 'Sanjay', 'Asha']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Patel', 'Reddy', 'Nair', 'Iyer', 'Rao', 'Singh', 'Kumar',
+              'Das', 'Bose', 'Mehta', 'Shah', 'Khan', 'Fernandes', 'Pillai', 'Joshi', 'Kulkarni', 'Menon']
+CITIES = ['Bengaluru', 'Mumbai', 'Delhi', 'Chennai', 'Hyderabad', 'Pune', 'Kolkata', 'Ahmedabad', 'Jaipur', 'Kochi']
+STREETS = ['MG Road', 'Brigade Road', 'Station Road', 'Temple Street', 'Park Avenue', 'Lake View Road', 'Main Road']
+
+# (brand, models, weight): a few brands bring in most of the devices
+BRANDS = [
+    ('Samsung', ['Galaxy S23', 'Galaxy A54', 'Galaxy M34', 'Galaxy Tab S8'], 24),
+    ('Apple', ['iPhone 13', 'iPhone 14', 'iPhone 15', 'MacBook Air M1', 'iPad 9'], 18),
+    ('Xiaomi', ['Redmi Note 12', 'Redmi 12C', 'Poco X5'], 15),
+    ('Lenovo', ['ThinkPad T14', 'IdeaPad 3', 'Legion 5'], 10),
+    ('HP', ['Pavilion 15', 'Victus 16', 'EliteBook 840', 'LaserJet M126'], 9),
+    ('Dell', ['Inspiron 15', 'Latitude 5420', 'Vostro 3510'], 8),
+    ('OnePlus', ['Nord CE 3', 'OnePlus 11'], 7),
+    ('Vivo', ['Y16', 'V27'], 5),
+    ('Asus', ['VivoBook 15', 'ROG Strix G15'], 4),
+]
+ISSUES = ['Cracked screen', 'Battery drains quickly', 'Does not power on', 'Charging port loose',
+          'Water damage', 'Overheating', 'Keyboard keys not working', 'No display', 'Speaker not working',
+          'Slow performance', 'Camera not focusing', 'Network issues', 'Hinge broken', 'Paper jam']
+# (description, typical price in rupees, weight)
+SERVICES = [
+    ('Diagnosis', 300, 30), ('Screen replacement', 6500, 14), ('Battery replacement', 2200, 12),
+    ('Charging port repair', 900, 10), ('Software reinstall', 800, 10), ('Data backup', 600, 6),
+    ('Keyboard replacement', 2500, 5), ('Motherboard repair', 5500, 4), ('Water damage cleaning', 1500, 4),
+    ('Hinge repair', 1800, 3), ('Thermal paste and cleaning', 700, 5), ('Speaker replacement', 1200, 4),
+    ('Camera module replacement', 3500, 3), ('Printer head cleaning', 500, 2),
+]
+TECHNICIAN_WEIGHTS = [30, 22, 16, 10, 8, 6, 5, 3]
+
+
+def _phone(rng):
+    number = f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}"
+    style = rng.random()
+    if style < 0.5:
+        return number
+    if style < 0.7:
+        return f'+91 {number[:5]} {number[5:]}'
+    if style < 0.85:
+        return f'{number[:5]}-{number[5:]}'
+    return f'0{number}'
+
+
+def _serial(rng, brand):
+    letters = 'ABCDEFGHJKLMNPQRSTUVWXYZ'
+    body = ''.join(rng.choice(letters + '0123456789') for _ in range(10))
+    return f'{brand[:2].upper()}{body}' if rng.random() < 0.8 else f'{brand[:2].upper()}-{body[:5]}-{body[5:]}'
+
+
+def _created_dates(rng, count, start, end):
+    """Sorted ticket dates between ``start`` and ``end``; quieter on Sundays, shop hours only"""
+    dates = []
+    for _ in range(count):
+        while True:
+            day = start + (end - start) * rng.random()
+            if day.weekday() != 6 or rng.random() < 0.3:
+                break
+        dates.append(min(end, day.replace(hour=rng.randint(9, 19), minute=rng.randrange(60),
+                                          second=rng.randrange(60), microsecond=0)))
+    dates.sort()
+    return dates
+
+
+def _status(rng, age_days):
+    draw = rng.random()
+    if age_days > 14:
+        return 'Completed' if draw < 0.93 else 'Cancelled' if draw < 0.98 else 'In Progress'
+    if age_days > 3:
+        return 'Completed' if draw < 0.55 else 'In Progress' if draw < 0.85 else 'Received' if draw < 0.97 else 'Cancelled'
+    return 'Received' if draw < 0.5 else 'In Progress' if draw < 0.85 else 'Completed'
+
+
+def _service_lines(rng):
+    count = 1
+    while count < 6 and rng.random() < 0.45:
+        count += 1
+    lines = []
+    for description, price, _ in rng.choices(SERVICES, weights=[s[2] for s in SERVICES], k=count):
+        cost = Decimal(max(100, round(price * rng.lognormvariate(0, 0.3) / 10) * 10))
+        lines.append((description, cost))
+    return lines
+
+
+def _ensure_users(conn, User):
+    """The admin login and the technicians; returns the technician ids"""
+    from werkzeug.security import generate_password_hash
+    if conn.scalar(select(func.count()).select_from(User).where(User.username == 'admin')) == 0:
+        conn.execute(insert(User), [{'username': 'admin', 'password_hash': generate_password_hash('admin123'),
+                                     'email': 'admin@repaircenter.com', 'role': 'admin'}])
+    password = generate_password_hash('tech123')
+    for n in range(1, len(TECHNICIAN_WEIGHTS) + 1):
+        if conn.scalar(select(func.count()).select_from(User).where(User.username == f'tech{n}')) == 0:
+            conn.execute(insert(User), [{'username': f'tech{n}', 'password_hash': password,
+                                         'email': f'tech{n}@repaircenter.com', 'role': 'technician'}])
+    return [conn.scalar(select(User.id).where(User.username == f'tech{n}'))
+            for n in range(1, len(TECHNICIAN_WEIGHTS) + 1)]
+
+
+def generate(tickets, seed=1, days=730, report=print):
+    """Fill the empty tables of the app's database; call inside an app context.
+
+    Returns the row count of each table written.
+    """
+    from intake import normalize_phone, normalize_serial
+    from models import db, User, Customer, Device, Ticket, Service, Invoice
+    from money import invoice_total
+    from reporting import rebuild_reports
+    from stats import reconcile_stats
+
+    rng = random.Random(seed)
+    conn = db.session.connection()
+    if any(conn.scalar(select(func.count()).select_from(model)) for model in (Customer, Device, Ticket)):
+        raise RuntimeError('The database already has customers or tickets; synthetic data needs an empty one')
+    technicians = _ensure_users(conn, User)
+    started = time.perf_counter()
+    now = datetime.utcnow().replace(microsecond=0)
+    customers = max(1, tickets * 2 // 5)
+    devices = max(customers, tickets * 5 // 8)
+    counts = {'customer': customers, 'device': devices, 'ticket': tickets, 'service': 0, 'invoice': 0}
+
+    for first in range(1, customers + 1, CHUNK):
+        rows = []
+        for n in range(first, min(first + CHUNK, customers + 1)):
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            phone = _phone(rng)
+            email = f"{name.lower().replace(' ', '.')}{n}@example.com" if rng.random() < 0.7 else None
+            address = f'{rng.randint(1, 400)}, {rng.choice(STREETS)}, {rng.choice(CITIES)}' if rng.random() < 0.8 else None
+            rows.append({'id': n, 'name': name, 'phone': phone, 'phone_key': normalize_phone(phone),
+                         'email': email, 'address': address})
+        conn.execute(insert(Customer), rows)
+    report(f'  customers: {customers}')
+
+    brand_weights = [brand[2] for brand in BRANDS]
+    for first in range(1, devices + 1, CHUNK):
+        rows = []
+        for n in range(first, min(first + CHUNK, devices + 1)):
+            # Every customer has a device; extra devices go mostly to the early, loyal customers
+            owner = n if n <= customers else 1 + int(customers * rng.random() ** 2)
+            brand, models, _ = rng.choices(BRANDS, weights=brand_weights)[0]
+            serial = _serial(rng, brand) if rng.random() < 0.9 else None
+            rows.append({'id': n, 'customer_id': owner, 'brand': brand, 'model': rng.choice(models),
+                         'serial_number': serial, 'serial_key': normalize_serial(serial),
+                         'issue': rng.choice(ISSUES)})
+        conn.execute(insert(Device), rows)
+    report(f'  devices: {devices}')
+
+    service_id = invoice_id = last_device = 0
+    for first in range(1, tickets + 1, CHUNK):
+        size = min(CHUNK, tickets + 1 - first)
+        # Each chunk covers its own slice of the date range, so ids rise with dates. The
+        # power spreads early tickets thin and recent ones dense: the shop has grown.
+        start, end = ((first - 1) / tickets) ** 0.7, ((first - 1 + size) / tickets) ** 0.7
+        dates = _created_dates(rng, size, now - timedelta(days=days * (1 - start)),
+                               now - timedelta(days=days * (1 - end)))
+        ticket_rows, service_rows, invoice_rows = [], [], []
+        for offset, created in enumerate(dates):
+            n = first + offset
+            age_days = (now - created).days
+            status = _status(rng, age_days)
+            completed = None
+            if status == 'Completed':
+                completed = min(now, created + timedelta(hours=rng.lognormvariate(3.4, 0.9)))
+            # Devices come back: a new device is drawn just often enough to use them all
+            if last_device < devices and rng.random() * (tickets - n + 1) < devices - last_device:
+                last_device += 1
+                device = last_device
+            else:
+                device = rng.randint(1, max(1, last_device))
+            ticket_rows.append({'id': n, 'device_id': device, 'status': status, 'created_date': created,
+                                'completed_date': completed,
+                                'technician_id': rng.choices(technicians, weights=TECHNICIAN_WEIGHTS)[0]})
+            if status == 'Cancelled':
+                continue
+            subtotal = Decimal(0)
+            for description, cost in _service_lines(rng):
+                service_id += 1
+                subtotal += cost
+                service_rows.append({'id': service_id, 'ticket_id': n, 'description': description, 'cost': cost})
+            # About one completed ticket in twenty is still waiting for its invoice
+            if status != 'Completed' or rng.random() < 0.05:
+                continue
+            discount = Decimal(round(subtotal * Decimal(rng.choice([5, 10])) / 1000) * 10) if rng.random() < 0.1 else Decimal(0)
+            _, total = invoice_total(subtotal, TAX_RATE, discount)
+            invoice_age = (now - completed).days
+            paid = rng.random() < (0.97 if invoice_age > 30 else 0.7)
+            invoice_id += 1
+            invoice_rows.append({'id': invoice_id, 'ticket_id': n, 'total_amount': total,
+                                 'paid_status': 'Paid' if paid else 'Unpaid',
+                                 'date': min(now, completed + timedelta(minutes=rng.randint(5, 240))),
+                                 'tax_rate': TAX_RATE, 'discount': discount})
+        conn.execute(insert(Ticket), ticket_rows)
+        if service_rows:
+            conn.execute(insert(Service), service_rows)
+        if invoice_rows:
+            conn.execute(insert(Invoice), invoice_rows)
+        counts['service'], counts['invoice'] = service_id, invoice_id
+        report(f'  tickets: {first + size - 1} of {tickets} ({time.perf_counter() - started:.1f}s)')
+
+    if conn.dialect.name == 'postgresql':
+        # Explicit ids do not advance the id sequences; move them past the new rows
+        for model in (Customer, Device, Ticket, Service, Invoice):
+            table = model.__table__
+            last_id = conn.scalar(select(func.max(table.c.id)))
+            if last_id:
+                conn.execute(select(func.setval(func.pg_get_serial_sequence(table.name, 'id'), last_id)))
+    db.session.commit()
+
+    # Core inserts bypass the session hooks that keep these up to date
+    rebuild_reports()
+    db.session.commit()
+    reconcile_stats()
+    report(f'Generated {counts} in {time.perf_counter() - started:.1f}s')
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=10000, help='tickets to generate (1000 to 1000000)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed; the same seed gives the same data')
+    parser.add_argument('--days', type=int, default=730, help='days of history the tickets are spread over')
+    args = parser.parse_args()
+
+    from flask_migrate import upgrade
+    from app import app
+
+    with app.app_context():
+        upgrade()
+        try:
+            generate(args.tickets, seed=args.seed, days=args.days)
+        except RuntimeError as exc:
+            sys.exit(str(exc))
+
+
+if __name__ == '__main__':
+    main()
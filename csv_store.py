@@ -0,0 +1,400 @@
+"""In-memory indexes over the desktop app's CSV files.
+
+Each file is parsed once into rows plus dicts keyed by its ID column and by
+its foreign keys, so "the services of ticket 7" is a dict lookup instead of
+a scan of services.csv. A table re-reads its file only when the file's
+mtime or size changes, which also picks up edits made outside the app.
+
+Every change is a list of records (insert, delete or update) passed to
+``CsvStore.commit``. There are two storage modes:
+
+* rewrite (the default): inserts are appended to the CSV file, and deletes
+  and updates rewrite the whole file. Each such change costs O(table size).
+* journal: every commit is one JSON line appended to ``journal.log`` and
+  fsynced. The CSV files are only a checkpoint, and the journal is replayed
+  on top of them when they are loaded. A commit costs O(change), whatever
+  the table size. A cascading delete spans several tables but is still a
+  single line, so it is all-or-nothing: a line torn by a crash is dropped
+  on the next start.
+
+``compact`` folds the journal back into the CSV files. It writes every file
+to ``<name>.csv.tmp``, records ``compaction.json`` as the commit point, and
+only then renames the files into place and empties the journal. A crash
+after the commit point is finished by ``recover`` on the next start. A
+crash before it leaves the old files and the journal untouched.
+"""
+import csv
+import json
+import os
+
+DATA_DIR = 'data'
+JOURNAL = 'journal.log'
+COMPACTION_MARKER = 'compaction.json'
+COMPACT_AFTER = 1000
+
+# name: (id column, columns, foreign key columns)
+SCHEMAS = {
+    'customers': ('customer_id', ['customer_id', 'name', 'phone', 'email', 'address'], []),
+    'devices': ('device_id', ['device_id', 'customer_id', 'brand', 'model', 'serial_number', 'issue'], ['customer_id']),
+    'tickets': ('ticket_id', ['ticket_id', 'device_id', 'technician', 'status', 'created_date'], ['device_id']),
+    'services': (None, ['ticket_id', 'description', 'cost'], ['ticket_id']),
+    'invoices': ('invoice_id', ['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'], ['ticket_id']),
+}
+
+
+def _text(value):
+    # Store values the way they read back from the CSV file
+    return '' if value is None else str(value)
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _values(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sorted(_text(v) for v in value)
+    return [_text(value)]
+
+
+def _write_csv(path, fields, rows):
+    """Write a complete CSV file and atomically move it to ``path``"""
+    tmp_path = f"{path}.tmp"
+    _write_tmp_csv(tmp_path, fields, rows)
+    os.replace(tmp_path, path)
+
+
+def _write_tmp_csv(tmp_path, fields, rows):
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class CsvTable:
+    """One CSV file held in memory with an ID index and foreign key indexes"""
+
+    def __init__(self, store, name, key, fields, foreign_keys=()):
+        self.store = store
+        self.name = name
+        self.path = os.path.join(store.data_dir, f"{name}.csv")
+        self.key = key
+        self.fields = fields
+        self.foreign_keys = list(foreign_keys)
+        self._signature = None
+        self._reset()
+
+    def _reset(self):
+        # Rows live in a dict keyed by an internal row number, which keeps
+        # file order and makes deleting a row O(1)
+        self._next_rowid = 0
+        self._rows = {}
+        self._list = None
+        self._by_id = {}
+        self._by_fk = {field: {} for field in self.foreign_keys}
+
+    def refresh(self):
+        """Reload if the file or the journal changed since the last load"""
+        signature = (_signature(self.path), self.store.journal_signature())
+        if signature == self._signature:
+            return
+        self._reset()
+        if signature[0] is not None:
+            with open(self.path, 'r', newline='') as f:
+                for row in csv.DictReader(f):
+                    self._add(row)
+        for record in self.store.journal_records(self.name):
+            self.apply(record)
+        self._signature = signature
+
+    def signature(self):
+        """Changes whenever the rows do: the mtime and size of the file and of the journal"""
+        self.refresh()
+        return self._signature
+
+    def _add(self, row):
+        rowid = self._next_rowid
+        self._next_rowid += 1
+        self._rows[rowid] = row
+        self._index(rowid, row)
+        self._list = None
+
+    def _index(self, rowid, row):
+        if self.key:
+            self._by_id[row[self.key]] = rowid
+        for field in self.foreign_keys:
+            self._by_fk[field].setdefault(row[field], {})[rowid] = row
+
+    def _unindex(self, rowid, row):
+        if self.key and self._by_id.get(row[self.key]) == rowid:
+            del self._by_id[row[self.key]]
+        for field in self.foreign_keys:
+            bucket = self._by_fk[field].get(row[field], {})
+            bucket.pop(rowid, None)
+            if not bucket:
+                self._by_fk[field].pop(row[field], None)
+
+    def _matching(self, where):
+        """Row numbers of the rows whose columns take one of the given values"""
+        where = {field: set(values) for field, values in where.items()}
+        if self.key in where:
+            candidates = [self._by_id[v] for v in where[self.key] if v in self._by_id]
+        else:
+            field = next((f for f in self.foreign_keys if f in where), None)
+            if field is None:
+                candidates = list(self._rows)
+            else:
+                candidates = [rowid for v in where[field] for rowid in self._by_fk[field].get(v, {})]
+        return [rowid for rowid in candidates
+                if all(self._rows[rowid][field] in values for field, values in where.items())]
+
+    def apply(self, record):
+        """Apply one insert/delete/update record to the in-memory rows; returns rows affected"""
+        if record['op'] == 'insert':
+            self._add(dict(record['row']))
+            return 1
+        matching = self._matching(record['where'])
+        for rowid in matching:
+            row = self._rows[rowid]
+            self._unindex(rowid, row)
+            if record['op'] == 'delete':
+                del self._rows[rowid]
+            else:
+                row = dict(row, **record['set'])
+                self._rows[rowid] = row
+                self._index(rowid, row)
+        self._list = None
+        return len(matching)
+
+    def all(self):
+        """All rows in file order"""
+        self.refresh()
+        if self._list is None:
+            self._list = list(self._rows.values())
+        return self._list
+
+    def get(self, row_id):
+        """The row with this ID, or None"""
+        self.refresh()
+        rowid = self._by_id.get(str(row_id))
+        return None if rowid is None else self._rows[rowid]
+
+    def where(self, field, value):
+        """Rows whose foreign key ``field`` equals ``value``"""
+        self.refresh()
+        return list(self._by_fk[field].get(str(value), {}).values())
+
+    def next_id(self):
+        """ID for a new row: one more than the last row's"""
+        self.refresh()
+        if not self._rows:
+            return "1"
+        return str(int(next(reversed(self._rows.values()))[self.key]) + 1)
+
+    def insert_record(self, row):
+        return {'op': 'insert', 'table': self.name,
+                'row': {field: _text(row.get(field)) for field in self.fields}}
+
+    def delete_record(self, **where):
+        return {'op': 'delete', 'table': self.name,
+                'where': {field: _values(value) for field, value in where.items()}}
+
+    def update_record(self, changes, **where):
+        return {'op': 'update', 'table': self.name,
+                'where': {field: _values(value) for field, value in where.items()},
+                'set': {field: _text(value) for field, value in changes.items()}}
+
+    def append(self, row):
+        """Add a row"""
+        record = self.insert_record(row)
+        self.store.commit([record])
+        return record['row']
+
+    def delete(self, **where):
+        """Delete the rows whose columns match ``where`` (a value or a collection of values)"""
+        self.store.commit([self.delete_record(**where)])
+
+    def update(self, row_id, **changes):
+        """Change columns of the row with this ID; returns False if there is none"""
+        if self.get(row_id) is None:
+            return False
+        self.store.commit([self.update_record(changes, **{self.key: row_id})])
+        return True
+
+
+class CsvStore:
+    """The desktop app's five tables, each a ``CsvTable``"""
+
+    def __init__(self, data_dir=DATA_DIR, journal=False, compact_after=COMPACT_AFTER, sync=True):
+        self.data_dir = data_dir
+        self.journal_path = os.path.join(data_dir, JOURNAL) if journal else None
+        self.marker_path = os.path.join(data_dir, COMPACTION_MARKER)
+        self.compact_after = compact_after
+        self.sync = sync
+        self._journal_length = 0
+        self.tables = {}
+        for name, (key, fields, foreign_keys) in SCHEMAS.items():
+            table = CsvTable(self, name, key, fields, foreign_keys)
+            self.tables[name] = table
+            setattr(self, name, table)
+
+    def initialize(self):
+        """Create the data directory and any missing file, then recover the journal"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        for table in self.tables.values():
+            if not os.path.exists(table.path):
+                _write_csv(table.path, table.fields, [])
+        if self.journal_path:
+            self.recover()
+
+    # Journal
+
+    def journal_signature(self):
+        return _signature(self.journal_path) if self.journal_path else None
+
+    def journal_records(self, name):
+        """Records for table ``name``, in commit order"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # torn by a crash mid-write
+                for record in json.loads(line):
+                    if record['table'] == name:
+                        yield record
+
+    def recover(self):
+        """Finish an interrupted compaction and drop a torn journal line"""
+        if os.path.exists(self.marker_path):
+            self._finish_compaction()
+        else:
+            for table in self.tables.values():
+                if os.path.exists(f"{table.path}.tmp"):
+                    os.remove(f"{table.path}.tmp")
+
+        if not os.path.exists(self.journal_path):
+            open(self.journal_path, 'w').close()
+        with open(self.journal_path, 'rb+') as f:
+            data = f.read()
+            complete = data.rfind(b'\n') + 1
+            if complete != len(data):
+                f.truncate(complete)
+            self._journal_length = data.count(b'\n')
+
+    def commit(self, records):
+        """Apply a list of records as one change"""
+        # A delete or update over an empty set of values matches nothing
+        records = [record for record in records if record['op'] == 'insert' or all(record['where'].values())]
+        if not records:
+            return
+        names = {record['table'] for record in records}
+        for name in names:
+            self.tables[name].refresh()
+        if self.journal_path:
+            self._append_journal(records)
+        else:
+            self._rewrite(records, names)
+
+    def _append_journal(self, records):
+        before = self.journal_signature()
+        line = json.dumps(records, separators=(',', ':')) + '\n'
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        after = self.journal_signature()
+
+        # Tables that had seen the whole journal stay current without a reload
+        for table in self.tables.values():
+            if table._signature is not None and table._signature[1] == before:
+                table._signature = (table._signature[0], after)
+        for record in records:
+            self.tables[record['table']].apply(record)
+
+        self._journal_length += 1
+        if self._journal_length >= self.compact_after:
+            self.compact()
+
+    def _rewrite(self, records, names):
+        changed = dict.fromkeys(names, 0)
+        for record in records:
+            changed[record['table']] += self.tables[record['table']].apply(record)
+        for name in names:
+            if not changed[name]:
+                continue
+            table = self.tables[name]
+            ops = [record for record in records if record['table'] == name]
+            if all(record['op'] == 'insert' for record in ops):
+                with open(table.path, 'a', newline='') as f:
+                    csv.DictWriter(f, fieldnames=table.fields).writerows(record['row'] for record in ops)
+            else:
+                _write_csv(table.path, table.fields, table._rows.values())
+            table._signature = (_signature(table.path), None)
+
+    def compact(self):
+        """Fold the journal into the CSV files and start an empty journal"""
+        if not self.journal_path or not self._journal_length:
+            return
+        for table in self.tables.values():
+            table.refresh()
+            _write_tmp_csv(f"{table.path}.tmp", table.fields, table._rows.values())
+
+        # Commit point: from here on recover() completes the compaction
+        tmp_marker = f"{self.marker_path}.tmp"
+        with open(tmp_marker, 'w') as f:
+            json.dump({'tables': list(self.tables)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_marker, self.marker_path)
+        self._finish_compaction()
+
+    def _finish_compaction(self):
+        for table in self.tables.values():
+            if os.path.exists(f"{table.path}.tmp"):
+                os.replace(f"{table.path}.tmp", table.path)
+        open(self.journal_path, 'w').close()
+        os.remove(self.marker_path)
+        self._journal_length = 0
+
+        journal = self.journal_signature()
+        for table in self.tables.values():
+            if table._signature is not None:
+                table._signature = (_signature(table.path), journal)
+
+    # Cascading deletes
+
+    def ticket_ids_for_devices(self, device_ids):
+        return {row['ticket_id'] for device_id in device_ids for row in self.tickets.where('device_id', device_id)}
+
+    def _ticket_records(self, ticket_ids):
+        return [
+            self.tickets.delete_record(ticket_id=ticket_ids),
+            self.services.delete_record(ticket_id=ticket_ids),
+            self.invoices.delete_record(ticket_id=ticket_ids),
+        ]
+
+    def delete_tickets(self, ticket_ids):
+        """Delete tickets with their services and invoices"""
+        self.commit(self._ticket_records(ticket_ids))
+
+    def delete_devices(self, device_ids):
+        """Delete devices with their tickets, services and invoices"""
+        ticket_ids = self.ticket_ids_for_devices(device_ids)
+        self.commit([self.devices.delete_record(device_id=device_ids)] + self._ticket_records(ticket_ids))
+
+    def delete_customer(self, customer_id):
+        """Delete a customer and everything recorded against them"""
+        device_ids = {row['device_id'] for row in self.devices.where('customer_id', customer_id)}
+        ticket_ids = self.ticket_ids_for_devices(device_ids)
+        self.commit([
+            self.customers.delete_record(customer_id=customer_id),
+            self.devices.delete_record(device_id=device_ids),
+        ] + self._ticket_records(ticket_ids))
@@ -0,0 +1,73 @@
+"""Set-based cascading deletes.
+
+Deleting a customer used to walk ``customer.devices`` and ``device.tickets``
+in Python and issue three DELETEs per ticket. The helpers here delete each
+level of the hierarchy with a single statement whose WHERE clause selects
+the rows of the level above (``DELETE FROM service WHERE ticket_id IN
+(SELECT ticket.id FROM ticket WHERE device_id IN (...))``). Removing a
+customer therefore takes the same handful of statements whether they own
+one device or five hundred.
+
+Children are deleted before their parents, so the statements work whether
+or not SQLite enforces foreign keys. They bypass the unit of work: commit
+right after calling them. The commit expires whatever the session still
+holds.
+
+Bulk statements also bypass the session hooks that keep the dashboard
+counters and the report rollups current. Before deleting a level the
+helpers therefore count its rows (and sum the revenue of its invoices)
+with the same WHERE clause and take the counts off the counters through
+``stats.apply_deltas``; the ticket level also looks up the invoice and
+ticket days it is about to delete and recomputes just those days'
+rollups afterwards.
+"""
+from sqlalchemy import case, delete, func, select
+
+from models import db, Customer, Device, Ticket, Service, Invoice
+from pdf_jobs import PdfJob
+from reporting import days_where, refresh_days
+from stats import apply_deltas
+
+
+def _delete(model, criterion):
+    db.session.execute(delete(model).where(criterion).execution_options(synchronize_session=False))
+
+
+def delete_tickets_where(criterion):
+    """Delete the tickets matching ``criterion`` with their services, invoices and PDF jobs"""
+    ticket_ids = select(Ticket.id).where(criterion)
+    invoice_ids = select(Invoice.id).where(Invoice.ticket_id.in_(ticket_ids))
+    tickets, completed = db.session.execute(
+        select(func.count(Ticket.id), func.sum(case((Ticket.status == 'Completed', 1), else_=0))).where(criterion)
+    ).one()
+    invoices, revenue = db.session.execute(
+        select(func.count(Invoice.id), func.sum(Invoice.total_amount)).where(Invoice.ticket_id.in_(ticket_ids))
+    ).one()
+    days = days_where(db.session, Invoice.ticket_id.in_(ticket_ids), criterion)
+    _delete(PdfJob, PdfJob.invoice_id.in_(invoice_ids))
+    _delete(Service, Service.ticket_id.in_(ticket_ids))
+    _delete(Invoice, Invoice.ticket_id.in_(ticket_ids))
+    _delete(Ticket, criterion)
+    refresh_days(db.session, *days)
+    apply_deltas(db.session, {
+        'total_tickets': -tickets,
+        'completed_tickets': -(completed or 0),
+        'total_invoices': -invoices,
+        'total_revenue': -(revenue or 0),
+    })
+
+
+def delete_devices_where(criterion):
+    """Delete the devices matching ``criterion`` and everything under them"""
+    devices = db.session.scalar(select(func.count(Device.id)).where(criterion))
+    delete_tickets_where(Ticket.device_id.in_(select(Device.id).where(criterion)))
+    _delete(Device, criterion)
+    apply_deltas(db.session, {'total_devices': -devices})
+
+
+def delete_customers_where(criterion):
+    """Delete the customers matching ``criterion`` with their devices, tickets, services and invoices"""
+    customers = db.session.scalar(select(func.count(Customer.id)).where(criterion))
+    delete_devices_where(Device.customer_id.in_(select(Customer.id).where(criterion)))
+    _delete(Customer, criterion)
+    apply_deltas(db.session, {'total_customers': -customers})
@@ -0,0 +1,278 @@
+"""The desktop app's data logic, without Tk.
+
+main.py's tabs display what these methods return: tree rows as tuples in
+column order, combo box choices as strings, and the summary figures as a
+dict. Nothing here touches a widget, so benchmarks/bench_desktop.py can
+time the same code on generated data.
+"""
+from datetime import datetime
+
+
+class DesktopData:
+    """Rows, choices and figures for the desktop app's tabs, read from a ``CsvStore``"""
+
+    def __init__(self, store):
+        self.store = store
+        self._summary = None
+        self._summary_key = None
+
+    # Lookups
+
+    def device_info(self, device_id):
+        """Device record, or placeholders if there is none"""
+        row = self.store.devices.get(device_id)
+        if row is not None:
+            return row
+        print(f"No device found for device_id: {device_id}")
+        return {'brand': 'Unknown', 'model': 'Unknown', 'customer_id': 'Unknown'}
+
+    def customer_info(self, customer_id):
+        """Customer record, or placeholders if there is none"""
+        row = self.store.customers.get(customer_id)
+        if row is not None:
+            return row
+        print(f"No customer found for customer_id: {customer_id}")
+        return {'name': 'Unknown'}
+
+    def customer_name(self, customer_id):
+        return self.customer_info(customer_id)['name']
+
+    def ticket_info(self, ticket_id):
+        """Customer name, device and status of a ticket"""
+        # Follow ticket -> device -> customer through the ID indexes
+        row = self.store.tickets.get(ticket_id)
+        device = self.store.devices.get(row['device_id']) if row else None
+        customer = self.store.customers.get(device['customer_id']) if device else None
+        if customer is not None:
+            return {
+                'customer': customer['name'],
+                'device': f"{device['brand']} {device['model']}",
+                'status': row['status']
+            }
+        return {'customer': 'Unknown', 'device': 'Unknown', 'status': 'Unknown'}
+
+    def _ticket_label(self, row):
+        device = self.device_info(row['device_id'])
+        customer_name = self.customer_name(device['customer_id'])
+        return f"Ticket #{row['ticket_id']} - {device['brand']} {device['model']} ({customer_name})"
+
+    # Tree rows
+
+    def customer_rows(self):
+        return [(row['customer_id'], row['name'], row['phone'], row['email'], row['address'])
+                for row in self.store.customers.all()]
+
+    def device_rows(self):
+        rows = []
+        for row in self.store.devices.all():
+            customer = self.store.customers.get(row['customer_id'])
+            customer_name = customer['name'] if customer else "Unknown"
+            rows.append((row['device_id'], customer_name, row['brand'], row['model'],
+                         row['serial_number'], row['issue']))
+        return rows
+
+    def ticket_rows(self):
+        rows = []
+        for row in self.store.tickets.all():
+            device = self.device_info(row['device_id'])
+            rows.append((row['ticket_id'], f"{device['brand']} {device['model']}",
+                         self.customer_name(device['customer_id']), row['technician'],
+                         row['status'], row['created_date']))
+        return rows
+
+    def service_rows(self):
+        rows = []
+        for row in self.store.services.all():
+            ticket = self.ticket_info(row['ticket_id'])
+            rows.append((f"Ticket #{row['ticket_id']}", ticket['device'], ticket['customer'],
+                         row['description'], f"₹{float(row['cost']):.2f}"))
+        return rows
+
+    def invoice_rows(self):
+        """Invoice rows with the total recomputed from the ticket's services"""
+        rows = []
+        for row in self.store.invoices.all():
+            try:
+                ticket = self.ticket_info(row['ticket_id'])
+                total_amount = 0
+                try:
+                    for service in self.store.services.where('ticket_id', row['ticket_id']):
+                        total_amount += float(service['cost'])
+                except Exception as e:
+                    print(f"Error calculating total amount: {str(e)}")
+
+                try:
+                    tax_rate = float(row.get('tax_rate', 0))
+                    discount = float(row.get('discount', 0))
+                    final_total = max(0, total_amount + total_amount * (tax_rate / 100) - discount)
+                    formatted_amount = f"₹{final_total:.2f}"
+                except Exception as e:
+                    print(f"Error calculating final total: {str(e)}")
+                    formatted_amount = f"₹{total_amount:.2f}"
+
+                rows.append((row['invoice_id'], f"Ticket #{row['ticket_id']}", ticket['customer'],
+                             formatted_amount, row['paid_status'], row['date']))
+            except Exception as e:
+                print(f"Error processing invoice row: {str(e)}")
+        return rows
+
+    # Combo box choices
+
+    def customer_choices(self):
+        return [f"{row['name']} (ID: {row['customer_id']})" for row in self.store.customers.all()]
+
+    def device_choices(self):
+        choices = []
+        for row in self.store.devices.all():
+            customer = self.store.customers.get(row['customer_id'])
+            customer_name = customer['name'] if customer else "Unknown"
+            choices.append(f"{row['brand']} {row['model']} - {customer_name} (ID: {row['device_id']})")
+        return choices
+
+    def ticket_choices(self):
+        return [self._ticket_label(row) for row in self.store.tickets.all()]
+
+    def invoice_ticket_choices(self, debug_info=None):
+        """Completed tickets with services and no invoice yet.
+
+        Returns ``(choices, status_counts)``. A list passed as ``debug_info``
+        collects why each ticket was or was not offered.
+        """
+        log = debug_info.append if debug_info is not None else (lambda line: None)
+        tickets = self.store.tickets.all()
+        log(f"Total tickets found: {len(tickets)}")
+        status_counts = {}
+        for ticket in tickets:
+            status_counts[ticket['status']] = status_counts.get(ticket['status'], 0) + 1
+        log("\nTicket Status Counts:")
+        for status, count in status_counts.items():
+            log(f"- {status}: {count}")
+
+        choices = []
+        for row in tickets:
+            log(f"\nChecking Ticket #{row['ticket_id']}:")
+            log(f"- Status: {row['status']}")
+            if row['status'] != 'Completed':
+                log("- Not added: Status is not 'Completed'")
+                continue
+            device = self.device_info(row['device_id'])
+            log(f"- Device: {device['brand']} {device['model']}")
+            log(f"- Customer: {self.customer_name(device['customer_id'])}")
+            if self.store.invoices.where('ticket_id', row['ticket_id']):
+                log("- Already has an invoice")
+                continue
+            service_count = len(self.store.services.where('ticket_id', row['ticket_id']))
+            log(f"- Services found: {service_count}")
+            if service_count:
+                label = self._ticket_label(row)
+                choices.append(label)
+                log(f"- Added to available tickets list: {label}")
+            else:
+                log("- Not added: No services found")
+        return choices, status_counts
+
+    # Summary
+
+    def summary_stats(self):
+        """``compute_summary()``, cached until one of the CSV files or the journal changes"""
+        key = tuple(table.signature() for table in self.store.tables.values())
+        if key != self._summary_key:
+            self._summary = self.compute_summary()
+            self._summary_key = key
+        return self._summary
+
+    def compute_summary(self):
+        """Every summary figure in one pass over each table.
+
+        Revenue is the cost of the services of invoiced tickets; the
+        services are totalled per ticket first, so each invoice adds its
+        ticket's total with one dict lookup.
+        """
+        ticket_totals = {}
+        for service in self.store.services.all():
+            try:
+                cost = float(service['cost'])
+            except (TypeError, ValueError) as e:
+                print(f"Error calculating revenue: {str(e)}")
+                continue
+            ticket_totals[service['ticket_id']] = ticket_totals.get(service['ticket_id'], 0.0) + cost
+
+        status_counts = {}
+        for ticket in self.store.tickets.all():
+            status_counts[ticket['status']] = status_counts.get(ticket['status'], 0) + 1
+
+        total_invoices = 0
+        total_revenue = 0.0
+        payments = {}  # paid status -> [invoices, revenue]
+        for invoice in self.store.invoices.all():
+            amount = ticket_totals.get(invoice['ticket_id'], 0.0)
+            total_invoices += 1
+            total_revenue += amount
+            payment = payments.setdefault(invoice['paid_status'], [0, 0.0])
+            payment[0] += 1
+            payment[1] += amount
+
+        return {
+            'total_customers': len(self.store.customers.all()),
+            'total_devices': len(self.store.devices.all()),
+            'total_tickets': sum(status_counts.values()),
+            'completed_tickets': status_counts.get('Completed', 0),
+            'status_counts': status_counts,
+            'total_invoices': total_invoices,
+            'total_revenue': total_revenue,
+            'payments': {status: tuple(figures) for status, figures in payments.items()},
+        }
+
+    # Invoices
+
+    def ticket_services(self, ticket_id):
+        """The ticket's services as (subtotal, [{'description', 'cost'}])"""
+        total_amount = 0
+        services = []
+        for row in self.store.services.where('ticket_id', ticket_id):
+            cost = float(row['cost'])
+            total_amount += cost
+            services.append({'description': row['description'], 'cost': cost})
+        return total_amount, services
+
+    def create_invoice(self, ticket_id, subtotal, tax_rate, discount, payment_status):
+        """Record an invoice for the ticket; returns (invoice_id, final_total, date)"""
+        final_total = max(0, subtotal + subtotal * (tax_rate / 100) - discount)
+        invoice_id = self.store.invoices.next_id()
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.store.invoices.append({
+            'invoice_id': invoice_id,
+            'ticket_id': ticket_id,
+            'total_amount': str(final_total),
+            'paid_status': payment_status,
+            'date': date,
+            'tax_rate': str(tax_rate),
+            'discount': str(discount)
+        })
+        return invoice_id, final_total, date
+
+    def invoice_pdf_data(self, invoice_id, ticket_id, tax_rate, discount, payment_status, date, services):
+        """The snapshot invoice_pdf.render_invoice_pdf lays out"""
+        ticket = self.store.tickets.get(ticket_id)
+        device = self.device_info(ticket['device_id'] if ticket else None)
+        customer = self.customer_info(device['customer_id'])
+        return {
+            'invoice_id': invoice_id,
+            'date': datetime.strptime(date, "%Y-%m-%d %H:%M:%S"),
+            'paid_status': payment_status,
+            'tax_rate': tax_rate,
+            'discount': discount,
+            'customer': {
+                'name': customer.get('name', 'Unknown'),
+                'address': customer.get('address', ''),
+                'phone': customer.get('phone', ''),
+                'email': customer.get('email', ''),
+            },
+            'device': {
+                'brand': device.get('brand', 'Unknown'),
+                'model': device.get('model', 'Unknown'),
+                'serial_number': device.get('serial_number', ''),
+                'issue': device.get('issue', ''),
+            },
+            'services': services,
+        }
@@ -0,0 +1,115 @@
+"""Background threads for the desktop app, so the window keeps responding.
+
+Tk widgets may only be touched from the thread running the main loop. The
+work behind a tab (reading the CSV store, building rows, computing the
+summary, rendering a PDF) runs on worker threads instead, and each result
+is put on a queue that the main loop drains every ``POLL_MS`` through
+``root.after``. The callbacks that update widgets therefore always run on
+the Tk thread.
+
+There are two workers:
+
+* the data thread runs every read and write of the ``CsvStore``, one at a
+  time and in the order they were submitted, so the store never needs a
+  lock and a refresh submitted after a change sees that change;
+* the render thread lays out invoice PDFs from snapshots taken on the data
+  thread, so a slow render does not hold up the next tab load.
+
+``fill_tree`` replaces a Treeview's rows in chunks of ``TREE_CHUNK``: the
+first chunk shows at once and the rest are inserted in later turns of the
+main loop, between which the window handles input.
+"""
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_MS = 20
+TREE_CHUNK = 500
+
+
+class BackgroundWorker:
+    """Runs data work and PDF renders off the Tk thread and hands the results back to it"""
+
+    def __init__(self, root):
+        self.root = root
+        self._data = ThreadPoolExecutor(max_workers=1, thread_name_prefix='desktop-data')
+        self._render = ThreadPoolExecutor(max_workers=1, thread_name_prefix='desktop-render')
+        self._results = queue.SimpleQueue()
+        self._fills = {}
+        self._closed = False
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(self, work, on_done=None, on_error=None):
+        """Run ``work()`` on the data thread, then ``on_done(result)`` or ``on_error(exc)`` on the Tk thread"""
+        return self._run(self._data, work, on_done, on_error)
+
+    def render(self, work, on_done=None, on_error=None):
+        """Like ``submit``, on the render thread; ``work`` must not touch the store"""
+        return self._run(self._render, work, on_done, on_error)
+
+    def _run(self, executor, work, on_done, on_error):
+        def task():
+            try:
+                result = work()
+            except Exception as e:
+                self._results.put((on_error, e))
+            else:
+                self._results.put((on_done, result))
+        return executor.submit(task)
+
+    def _poll(self):
+        # Scheduled first: a callback that opens a dialog runs a nested main loop, which keeps polling
+        if not self._closed:
+            self.root.after(POLL_MS, self._poll)
+        self._deliver()
+
+    def _deliver(self):
+        """Run the callbacks of finished work; returns how many results were waiting"""
+        delivered = 0
+        while True:
+            try:
+                callback, value = self._results.get_nowait()
+            except queue.Empty:
+                return delivered
+            delivered += 1
+            if callback is not None:
+                try:
+                    callback(value)
+                except Exception as e:
+                    print(f"Error in background callback: {str(e)}")
+
+    def fill_tree(self, tree, rows):
+        """Replace the rows of ``tree``; a later fill of the same tree cancels the rest of this one"""
+        token = object()
+        self._fills[tree] = token
+        tree.delete(*tree.get_children())
+
+        def insert_chunk(start):
+            if self._fills.get(tree) is not token:
+                return
+            for values in rows[start:start + TREE_CHUNK]:
+                tree.insert('', 'end', values=values)
+            if start + TREE_CHUNK < len(rows):
+                self.root.after(1, insert_chunk, start + TREE_CHUNK)
+            else:
+                del self._fills[tree]
+
+        insert_chunk(0)
+
+    def shutdown(self):
+        """Finish submitted work, run its callbacks and stop the threads.
+
+        Called on the Tk thread while the window closes, after polling has
+        stopped, so results are delivered here: an invoice created just
+        before closing still gets its PDF rendered and its confirmation
+        shown. Callbacks may submit more work, so this repeats until a
+        round finds nothing left to deliver.
+        """
+        self._closed = True
+        while True:
+            # Everything submitted before these no-ops has finished once they have
+            self._data.submit(lambda: None).result()
+            self._render.submit(lambda: None).result()
+            if not self._deliver():
+                break
+        self._data.shutdown(wait=True)
+        self._render.shutdown(wait=True)
@@ -0,0 +1,74 @@
+"""Streaming CSV and JSON Lines exports of the main tables.
+
+Rows are read with ``yield_per`` so the driver fetches them in chunks from
+a server-side cursor (a plain cursor with fetchmany on SQLite). Each chunk
+is encoded and handed to the response as soon as it is read. An export of
+any size holds one chunk in memory and starts sending bytes right away.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from models import db, Customer, Device, Ticket, Service, Invoice
+
+YIELD_PER = 1000
+
+EXPORTABLE = {
+    'customers': Customer,
+    'devices': Device,
+    'tickets': Ticket,
+    'services': Service,
+    'invoices': Invoice,
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Amounts go out as exact strings, never through a float
+        return str(value.quantize(Decimal('0.01')))
+    return value
+
+
+def iter_chunks(model):
+    """Yield lists of rows from ``model``'s table in primary key order"""
+    columns = list(model.__table__.columns)
+    stmt = select(*columns).order_by(model.__table__.c.id).execution_options(yield_per=YIELD_PER)
+    result = db.session.execute(stmt)
+    for partition in result.partitions():
+        yield partition
+
+
+def csv_stream(model):
+    columns = [column.name for column in model.__table__.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in iter_chunks(model):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_plain(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+
+
+def jsonl_stream(model):
+    for rows in iter_chunks(model):
+        yield ''.join(
+            json.dumps({key: _plain(value) for key, value in row._mapping.items()}) + '\n'
+            for row in rows
+        )
+
+
+def export_stream(model, fmt):
+    return csv_stream(model) if fmt == 'csv' else jsonl_stream(model)
@@ -1,10 +1,11 @@
 from app import app, db, User
 from werkzeug.security import generate_password_hash
+from flask_migrate import upgrade
 
 def init_db():
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create or migrate all tables
+        upgrade()
         
         # Check if admin user exists
         admin = User.query.filter_by(username='admin').first()
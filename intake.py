@@ -0,0 +1,73 @@
+"""Walk-in intake lookups by phone number or device serial number.
+
+Phone numbers and serials are typed every which way ("98450-12345",
+"+91 98450 12345", "sn 7a3-b"), so each is also stored as a normalized
+key in an indexed column, ``Customer.phone_key`` and ``Device.serial_key``.
+The keys are set here whenever ``phone`` or ``serial_number`` is assigned
+through the ORM; the legacy import, which inserts with Core statements,
+calls the same functions.
+
+``lookup`` finds the customers matching a typed value and loads them with
+their devices, the open tickets of those devices and each ticket's
+technician in a single SELECT, which is what the intake screen shows.
+"""
+import re
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import joinedload
+
+from models import db, Customer, Device, Ticket
+
+CLOSED_STATUSES = ('Completed', 'Cancelled')
+_PHONE_CHARS = re.compile(r'[\d\s()+.\-]+')
+
+
+def normalize_phone(phone):
+    """Digits only; Indian numbers are keyed on their ten-digit number"""
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 12 and digits.startswith('91'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    return digits or None
+
+
+def normalize_serial(serial):
+    """Serial number without spaces or dashes, case-folded"""
+    return re.sub(r'[\s\-]', '', serial or '').casefold() or None
+
+
+@event.listens_for(Customer.phone, 'set')
+def _set_phone_key(customer, value, oldvalue, initiator):
+    customer.phone_key = normalize_phone(value)
+
+
+@event.listens_for(Device.serial_number, 'set')
+def _set_serial_key(device, value, oldvalue, initiator):
+    device.serial_key = normalize_serial(value)
+
+
+def lookup(value):
+    """Customers whose phone or device serial matches ``value``.
+
+    Returns ``(customers, matched_device_ids)``; each customer comes with
+    ``devices`` loaded and each device with only its open ``tickets``.
+    """
+    # Only something typed like a phone number is tried as one
+    phone_key = normalize_phone(value) if _PHONE_CHARS.fullmatch(value) else None
+    serial_key = normalize_serial(value)
+    if not (phone_key or serial_key):
+        return [], set()
+    criteria = [Customer.id.in_(select(Device.customer_id).where(Device.serial_key == serial_key))]
+    if phone_key:
+        criteria.append(Customer.phone_key == phone_key)
+    open_tickets = Device.tickets.and_(Ticket.status.not_in(CLOSED_STATUSES))
+    customers = db.session.scalars(
+        select(Customer)
+        .where(or_(*criteria))
+        .options(joinedload(Customer.devices).joinedload(open_tickets).joinedload(Ticket.technician))
+        .order_by(Customer.id)
+    ).unique().all()
+    matched_device_ids = {device.id for customer in customers for device in customer.devices
+                          if device.serial_key == serial_key}
+    return customers, matched_device_ids
@@ -0,0 +1,229 @@
+"""Invoice PDF layout and rendering.
+
+Rendering works from a plain snapshot of the invoice (see
+``invoice_pdf_data``) rather than from ORM objects, so it can run in a
+worker process without a database session or a Flask app.
+
+Everything that does not depend on the invoice is built once at import
+time: the paragraph styles, the table style commands and the header and
+footer flowables. Only the per-invoice paragraphs and the services table
+are created for each render. Both the web app and the desktop app render
+through this module.
+"""
+import copy
+import os
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, HRFlowable, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from money import invoice_total
+
+# Add Rupee symbol constant
+RUPEE_SYMBOL = '₹'
+
+# Bump whenever the layout changes so cached PDFs are rendered again
+LAYOUT_VERSION = 1
+
+# Styles
+_styles = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_styles['Heading1'],
+    alignment=TA_CENTER,
+    spaceAfter=30,
+    fontSize=24,
+    textColor=colors.HexColor('#2c3e50')
+)
+
+SUBTITLE_STYLE = ParagraphStyle(
+    'Subtitle',
+    parent=_styles['Heading2'],
+    alignment=TA_CENTER,
+    spaceAfter=20,
+    fontSize=16,
+    textColor=colors.HexColor('#34495e')
+)
+
+INFO_STYLE = ParagraphStyle(
+    'Info',
+    parent=_styles['Normal'],
+    spaceAfter=12,
+    fontSize=12,
+    textColor=colors.HexColor('#2c3e50')
+)
+
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_styles['Normal'],
+    alignment=TA_CENTER,
+    fontSize=10,
+    textColor=colors.HexColor('#7f8c8d')
+)
+
+# Two column invoice info / customer details block
+INFO_COL_WIDTHS = [200, 300]
+INFO_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+# Services table; the last five rows are the spacer and summary rows
+SERVICES_COL_WIDTHS = [400, 100]
+SERVICES_TABLE_STYLE = TableStyle([
+    # Header styling
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+
+    # Body styling
+    ('BACKGROUND', (0, 1), (-1, -5), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -5), colors.HexColor('#2c3e50')),
+    ('ALIGN', (0, 1), (-1, -5), 'LEFT'),
+    ('FONTNAME', (0, 1), (-1, -5), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -5), 10),
+    ('GRID', (0, 0), (-1, -5), 1, colors.HexColor('#bdc3c7')),
+
+    # Summary section styling
+    ('BACKGROUND', (0, -4), (-1, -1), colors.HexColor('#f8f9fa')),
+    ('TEXTCOLOR', (0, -4), (-1, -1), colors.HexColor('#2c3e50')),
+    ('ALIGN', (0, -4), (-1, -1), 'RIGHT'),
+    ('FONTNAME', (0, -4), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -4), (-1, -1), 10),
+    ('GRID', (0, -4), (-1, -1), 1, colors.HexColor('#bdc3c7')),
+
+    # Total row styling
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#2ecc71')),
+    ('TEXTCOLOR', (0, -1), (-1, -1), colors.white),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 12),
+])
+
+# Static flowables. Flowables keep layout state from wrap(), so each render
+# gets shallow copies; the parsed paragraph text is shared.
+_HEADER = [
+    Paragraph("Repair Center", TITLE_STYLE),
+    Paragraph("Professional Device Repair Services", SUBTITLE_STYLE),
+    HRFlowable(width="100%", thickness=1, color=colors.HexColor('#bdc3c7'), spaceBefore=10, spaceAfter=20),
+]
+_BILL_TO = Paragraph("<b>Bill To:</b>", INFO_STYLE)
+_DEVICE_HEADING = Paragraph("<b>Device Information:</b>", INFO_STYLE)
+_FOOTER = [
+    Spacer(1, 30),
+    Paragraph("Thank you for choosing our services!", FOOTER_STYLE),
+    Paragraph("For any queries, please contact us at support@repaircenter.com", FOOTER_STYLE),
+]
+
+
+def header_flowables():
+    return [copy.copy(f) for f in _HEADER]
+
+
+def footer_flowables():
+    return [copy.copy(f) for f in _FOOTER]
+
+
+def invoice_pdf_path(invoice_id):
+    return f"invoices/invoice_{invoice_id}.pdf"
+
+
+def invoice_pdf_data(invoice):
+    """Snapshot everything the renderer reads from an invoice and its relations"""
+    ticket = invoice.ticket
+    device = ticket.device
+    customer = device.customer
+    return {
+        'invoice_id': invoice.id,
+        'date': invoice.date,
+        'paid_status': invoice.paid_status,
+        'tax_rate': invoice.tax_rate,
+        'discount': invoice.discount,
+        'customer': {
+            'name': customer.name,
+            'address': customer.address,
+            'phone': customer.phone,
+            'email': customer.email,
+        },
+        'device': {
+            'brand': device.brand,
+            'model': device.model,
+            'serial_number': device.serial_number,
+            'issue': device.issue,
+        },
+        'services': [
+            {'description': service.description, 'cost': service.cost}
+            for service in ticket.services
+        ],
+    }
+
+
+def render_invoice_pdf(data, pdf_file):
+    """Lay out and write the invoice described by ``data`` to ``pdf_file``"""
+    customer = data['customer']
+    device = data['device']
+    
+    # Write to a temporary file first so a half-built PDF is never served
+    tmp_file = f"{pdf_file}.{os.getpid()}.tmp"
+    doc = SimpleDocTemplate(tmp_file, pagesize=letter)
+    elements = header_flowables()
+    
+    # Two columns for invoice info and customer details
+    invoice_info = [
+        Paragraph(f"<b>Invoice #:</b> {data['invoice_id']}", INFO_STYLE),
+        Paragraph(f"<b>Date:</b> {data['date'].strftime('%B %d, %Y')}", INFO_STYLE),
+        Paragraph(f"<b>Status:</b> {data['paid_status']}", INFO_STYLE)
+    ]
+    customer_info = [
+        copy.copy(_BILL_TO),
+        Paragraph(f"<b>{customer['name']}</b>", INFO_STYLE),
+        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;{customer['address']}", INFO_STYLE),
+        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;Phone: {customer['phone']}", INFO_STYLE),
+        Paragraph(f"<br/>&nbsp;&nbsp;&nbsp;&nbsp;Email: {customer['email']}", INFO_STYLE)
+    ]
+    elements.append(Table([[invoice_info, customer_info]], colWidths=INFO_COL_WIDTHS, style=INFO_TABLE_STYLE))
+    elements.append(Spacer(1, 20))
+    
+    # Add device information
+    elements.append(copy.copy(_DEVICE_HEADING))
+    elements.append(Paragraph(f"Brand: {device['brand']}", INFO_STYLE))
+    elements.append(Paragraph(f"Model: {device['model']}", INFO_STYLE))
+    elements.append(Paragraph(f"Serial Number: {device['serial_number']}", INFO_STYLE))
+    elements.append(Paragraph(f"Issue: {device['issue']}", INFO_STYLE))
+    elements.append(Spacer(1, 20))
+    
+    # Services table
+    services_data = [['Description', 'Cost']]
+    subtotal = 0
+    for service in data['services']:
+        services_data.append([service['description'], f"{RUPEE_SYMBOL} {service['cost']:.2f}"])
+        subtotal += service['cost']
+    
+    # Calculate tax and total
+    tax_amount, final_total = invoice_total(subtotal, data['tax_rate'], data['discount'])
+    
+    # Add summary rows
+    services_data.append(['', ''])  # Empty row for spacing
+    services_data.append(['Subtotal', f"{RUPEE_SYMBOL} {subtotal:.2f}"])
+    services_data.append(['Tax', f"{RUPEE_SYMBOL} {tax_amount:.2f}"])
+    services_data.append(['Discount', f"-{RUPEE_SYMBOL} {data['discount']:.2f}"])
+    services_data.append(['Total', f"{RUPEE_SYMBOL} {final_total:.2f}"])
+    elements.append(Table(services_data, colWidths=SERVICES_COL_WIDTHS, style=SERVICES_TABLE_STYLE))
+    
+    elements.extend(footer_flowables())
+    
+    # Build PDF
+    try:
+        doc.build(elements)
+        os.replace(tmp_file, pdf_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
@@ -0,0 +1,238 @@
+"""Import the desktop app's CSV files (data/*.csv) into the web database.
+
+Each file is streamed with ``csv.DictReader`` and written with executemany
+inserts, ``chunk_size`` rows per transaction. The desktop IDs are not reused
+directly, because the web database may already hold rows with those IDs.
+Every imported row gets the next free ID, and ``legacy_id_map`` records
+which desktop ID it came from. That map has two jobs:
+
+* it translates foreign keys (a device's ``customer_id``, a ticket's
+  ``device_id``...) while later files are imported, and
+* it makes the import resumable: the rows of a chunk and their map entries
+  commit together, so re-running after an interruption skips everything
+  that already made it in.
+
+services.csv has no ID column, so a service row is identified by its
+position in the file. The desktop app keeps no completion time, so a
+completed ticket is stamped with its invoice's date, or its creation date
+when it has no invoice.
+"""
+import csv
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from models import db, User, Customer, Device, Ticket, Service, Invoice
+from intake import normalize_phone, normalize_serial
+from csv_store import CsvStore
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Connection settings for the duration of the load. synchronous=OFF survives
+# a crash of this process but not a power cut; the chunked, resumable import
+# is what makes that trade acceptable.
+BULK_PRAGMAS = {
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+    'cache_size': '-65536',
+    'foreign_keys': 'OFF',
+}
+
+
+class LegacyIdMap(db.Model):
+    source = db.Column(db.String(20), primary_key=True)
+    legacy_id = db.Column(db.String(40), primary_key=True)
+    new_id = db.Column(db.Integer, nullable=False)
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    if not value:
+        return datetime.utcnow()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    return datetime.fromisoformat(value)
+
+
+def _float(value, default=0.0):
+    value = (value or '').strip()
+    return float(value) if value else default
+
+
+class LegacyImporter:
+    """Streams data/*.csv into the SQLAlchemy tables in chunked transactions"""
+
+    def __init__(self, data_dir='data', chunk_size=DEFAULT_CHUNK_SIZE, technician=None, report=print):
+        self.data_dir = data_dir
+        self.chunk_size = chunk_size
+        self.report = report
+        self.technician = technician
+        self.maps = {}
+        self.results = {}
+
+    def run(self):
+        # The desktop app journals its changes; fold them into the CSV files first
+        store = CsvStore(self.data_dir, journal=True)
+        if os.path.exists(store.journal_path):
+            store.recover()
+            store.compact()
+
+        with db.engine.connect() as conn:
+            saved = self._set_pragmas(conn)
+            try:
+                users = {name: user_id for user_id, name in conn.execute(select(User.id, User.username))}
+                fallback = users.get(self.technician) if self.technician else None
+                if fallback is None:
+                    fallback = conn.scalar(select(func.min(User.id)))
+                if fallback is None:
+                    raise RuntimeError("Create a user (python init_db.py) before importing tickets")
+
+                self._import(conn, 'customers', Customer, 'customer_id', lambda row: {
+                    'name': row['name'],
+                    'phone': row.get('phone'),
+                    'phone_key': normalize_phone(row.get('phone')),
+                    'email': row.get('email'),
+                    'address': row.get('address'),
+                })
+                self._import(conn, 'devices', Device, 'device_id', lambda row: {
+                    'customer_id': self._ref('customers', row['customer_id']),
+                    'brand': row['brand'],
+                    'model': row['model'],
+                    'serial_number': row.get('serial_number'),
+                    'serial_key': normalize_serial(row.get('serial_number')),
+                    'issue': row.get('issue'),
+                })
+                invoice_dates = self._invoice_dates()
+
+                def ticket_values(row):
+                    status = row.get('status') or 'Received'
+                    created = _parse_date(row.get('created_date'))
+                    completed = None
+                    if status == 'Completed':
+                        # The desktop app records no completion time; the invoice is raised on completion
+                        invoiced = invoice_dates.get(str(row['ticket_id']).strip())
+                        completed = max(_parse_date(invoiced), created) if invoiced else created
+                    return {
+                        'device_id': self._ref('devices', row['device_id']),
+                        # The desktop app stores technician names; match them to usernames
+                        'technician_id': users.get(row.get('technician'), fallback),
+                        'status': status,
+                        'created_date': created,
+                        'completed_date': completed,
+                    }
+
+                self._import(conn, 'tickets', Ticket, 'ticket_id', ticket_values)
+                self._import(conn, 'services', Service, None, lambda row: {
+                    'ticket_id': self._ref('tickets', row['ticket_id']),
+                    'description': row['description'],
+                    'cost': _float(row['cost']),
+                })
+                self._import(conn, 'invoices', Invoice, 'invoice_id', lambda row: {
+                    'ticket_id': self._ref('tickets', row['ticket_id']),
+                    'total_amount': _float(row['total_amount']),
+                    'paid_status': row.get('paid_status') or 'Unpaid',
+                    'date': _parse_date(row.get('date')),
+                    'tax_rate': _float(row.get('tax_rate')),
+                    'discount': _float(row.get('discount')),
+                })
+            finally:
+                self._restore_pragmas(conn, saved)
+        return self.results
+
+    def _set_pragmas(self, conn):
+        if conn.dialect.name != 'sqlite':
+            return {}
+        saved = {}
+        for name, value in BULK_PRAGMAS.items():
+            saved[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        conn.commit()
+        return saved
+
+    def _restore_pragmas(self, conn, saved):
+        # Drop whatever an interrupted chunk left behind
+        conn.rollback()
+        for name, value in saved.items():
+            conn.exec_driver_sql(f"PRAGMA {name} = {value}")
+        conn.commit()
+
+    def _invoice_dates(self):
+        """Map each desktop ticket id to the date of its first invoice"""
+        path = os.path.join(self.data_dir, 'invoices.csv')
+        if not os.path.exists(path):
+            return {}
+        dates = {}
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if (row.get('date') or '').strip():
+                    dates.setdefault(str(row['ticket_id']).strip(), row['date'])
+        return dates
+
+    def _ref(self, source, legacy_id):
+        return self.maps[source].get(str(legacy_id).strip())
+
+    def _import(self, conn, source, model, id_field, build):
+        path = os.path.join(self.data_dir, f"{source}.csv")
+        result = {'imported': 0, 'skipped': 0, 'orphaned': 0, 'seconds': 0.0}
+        self.results[source] = result
+        mapping = {legacy: new for legacy, new in conn.execute(
+            select(LegacyIdMap.legacy_id, LegacyIdMap.new_id).where(LegacyIdMap.source == source))}
+        self.maps[source] = mapping
+        if not os.path.exists(path):
+            self.report(f"{source}: {path} not found, skipped")
+            return
+
+        started = time.perf_counter()
+        chunk = []
+        with open(path, newline='') as f:
+            for position, row in enumerate(csv.DictReader(f), start=1):
+                legacy_id = str(row[id_field]).strip() if id_field else str(position)
+                if legacy_id in mapping:
+                    result['skipped'] += 1
+                    continue
+                values = build(row)
+                if any(values[key] is None for key in ('customer_id', 'device_id', 'ticket_id') if key in values):
+                    result['orphaned'] += 1
+                    continue
+                chunk.append((legacy_id, values))
+                if len(chunk) >= self.chunk_size:
+                    self._flush(conn, source, model, chunk, mapping, result, started)
+                    chunk = []
+        if chunk:
+            self._flush(conn, source, model, chunk, mapping, result, started)
+
+        result['seconds'] = time.perf_counter() - started
+        rate = result['imported'] / result['seconds'] if result['seconds'] else 0
+        self.report(f"{source}: {result['imported']} imported, {result['skipped']} already imported, "
+                    f"{result['orphaned']} orphaned in {result['seconds']:.2f}s ({rate:,.0f} rows/s)")
+
+    def _flush(self, conn, source, model, chunk, mapping, result, started):
+        table = model.__table__
+        # The rows and their map entries commit together or not at all
+        try:
+            next_id = (conn.scalar(select(func.max(table.c.id))) or 0) + 1
+            rows = []
+            map_rows = []
+            for offset, (legacy_id, values) in enumerate(chunk):
+                rows.append(dict(values, id=next_id + offset))
+                map_rows.append({'source': source, 'legacy_id': legacy_id, 'new_id': next_id + offset})
+            conn.execute(table.insert(), rows)
+            conn.execute(LegacyIdMap.__table__.insert(), map_rows)
+            if conn.dialect.name == 'postgresql':
+                # Explicit ids do not advance the id sequence; move it past them
+                last_id = next_id + len(rows) - 1
+                conn.execute(select(func.setval(func.pg_get_serial_sequence(table.name, 'id'), last_id)))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        for row in map_rows:
+            mapping[row['legacy_id']] = row['new_id']
+        result['imported'] += len(rows)
+        elapsed = time.perf_counter() - started
+        self.report(f"  {source}: {result['imported']} rows ({result['imported'] / elapsed:,.0f} rows/s)")
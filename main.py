@@ -1,14 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import csv
 import os
 from datetime import datetime
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from invoice_pdf import invoice_pdf_path, render_invoice_pdf
+from csv_store import CsvStore
+from desktop_data import DesktopData
+from desktop_worker import BackgroundWorker
 
 class RepairCenterApp:
     def __init__(self, root):
@@ -20,6 +17,16 @@ class RepairCenterApp:
         if not os.path.exists("data"):
             os.makedirs("data")
             
+        # Every tab reads the CSV files through this in-memory store; changes
+        # are appended to data/journal.log and folded back into the CSVs
+        self.store = CsvStore(journal=True)
+        self.data = DesktopData(self.store)
+        
+        # File I/O, stats and PDF rendering run on worker threads; results come
+        # back to the Tk thread through root.after
+        self.worker = BackgroundWorker(root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Initialize CSV files if they don't exist
         self.initialize_csv_files()
         
@@ -37,30 +44,24 @@ class RepairCenterApp:
         
     def initialize_csv_files(self):
         """Initialize CSV files with headers if they don't exist"""
-        files = {
-            'data/customers.csv': ['customer_id', 'name', 'phone', 'email', 'address'],
-            'data/devices.csv': ['device_id', 'customer_id', 'brand', 'model', 'serial_number', 'issue'],
-            'data/tickets.csv': ['ticket_id', 'device_id', 'technician', 'status', 'created_date'],
-            'data/services.csv': ['ticket_id', 'description', 'cost'],
-            'data/invoices.csv': ['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount']
-        }
-        
-        # Create data directory if it doesn't exist
-        if not os.path.exists("data"):
-            os.makedirs("data")
-            
         # Create invoices directory if it doesn't exist
         if not os.path.exists("invoices"):
             os.makedirs("invoices")
         
-        for file_path, headers in files.items():
-            if not os.path.exists(file_path):
-                try:
-                    with open(file_path, 'w', newline='') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(headers)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to create {file_path}: {str(e)}")
+        try:
+            self.store.initialize()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to create data files: {str(e)}")
+    
+    def on_close(self):
+        """Fold the change journal into the CSV files before exiting"""
+        try:
+            # Finish submitted changes and renders, and run their callbacks, before compacting
+            self.worker.shutdown()
+            self.store.compact()
+        except Exception as e:
+            print(f"Error compacting data files: {str(e)}")
+        self.root.destroy()
     
     def create_customer_tab(self):
         """Create the customer management tab"""
@@ -131,35 +132,28 @@ class RepairCenterApp:
             messagebox.showerror("Error", "Customer name is required!")
             return
         
-        try:
+        def add():
             # Generate new customer ID
-            customer_id = "1"
-            if os.path.exists('data/customers.csv'):
-                with open('data/customers.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    customers = list(reader)
-                    if customers:
-                        customer_id = str(int(customers[-1]['customer_id']) + 1)
+            customer_id = self.store.customers.next_id()
             
             # Add customer to CSV
-            with open('data/customers.csv', 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['customer_id', 'name', 'phone', 'email', 'address'])
-                writer.writerow({
-                    'customer_id': customer_id,
-                    'name': name,
-                    'phone': phone,
-                    'email': email,
-                    'address': address
-                })
-            
+            self.store.customers.append({
+                'customer_id': customer_id,
+                'name': name,
+                'phone': phone,
+                'email': email,
+                'address': address
+            })
+        
+        def added(_):
             # Clear form and refresh list
             self.clear_customer_form()
             self.load_customers()
             self.load_customer_combo()  # Refresh customer combo in device tab
             
             messagebox.showinfo("Success", f"Customer '{name}' has been added.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add customer: {str(e)}")
+        
+        self.worker.submit(add, added, lambda e: messagebox.showerror("Error", f"Failed to add customer: {str(e)}"))
 
     def clear_customer_form(self):
         """Clear the customer form fields"""
@@ -170,41 +164,21 @@ class RepairCenterApp:
 
     def load_customers(self):
         """Load customers from CSV into the treeview"""
-        # Clear existing items
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        
-        # Load from CSV
-        try:
-            with open('data/customers.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    self.customer_tree.insert('', 'end', values=(
-                        row['customer_id'],
-                        row['name'],
-                        row['phone'],
-                        row['email'],
-                        row['address']
-                    ))
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load customers: {str(e)}")
+        self.worker.submit(
+            self.data.customer_rows,
+            lambda rows: self.worker.fill_tree(self.customer_tree, rows),
+            lambda e: messagebox.showerror("Error", f"Failed to load customers: {str(e)}"))
 
     def load_customer_combo(self):
         """Load customers into the combo box for device creation"""
-        try:
-            customers = []
-            with open('data/customers.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    customers.append(f"{row['name']} (ID: {row['customer_id']})")
-            self.customer_combo['values'] = customers
-        except FileNotFoundError:
-            self.customer_combo['values'] = []
-        except Exception as e:
+        def loaded(values):
+            self.customer_combo['values'] = values
+        
+        def failed(e):
             print(f"Error loading customer combo: {str(e)}")
             self.customer_combo['values'] = []
+        
+        self.worker.submit(self.data.customer_choices, loaded, failed)
 
     def show_customer_menu(self, event):
         """Show the right-click menu for customer deletion"""
@@ -219,7 +193,7 @@ class RepairCenterApp:
         if not selected_item:
             return
         
-        customer_id = self.customer_tree.item(selected_item[0])['values'][0]
+        customer_id = str(self.customer_tree.item(selected_item[0])['values'][0])
         customer_name = self.customer_tree.item(selected_item[0])['values'][1]
         
         # Confirm deletion
@@ -228,90 +202,7 @@ class RepairCenterApp:
             "This will also delete all associated devices, tickets, services, and invoices!"):
             return
         
-        try:
-            # Delete customer
-            customers = []
-            with open('data/customers.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['customer_id'] != customer_id:
-                        customers.append(row)
-            
-            with open('data/customers.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['customer_id', 'name', 'phone', 'email', 'address'])
-                writer.writeheader()
-                writer.writerows(customers)
-            
-            # Delete associated devices
-            devices = []
-            device_ids = []
-            try:
-                with open('data/devices.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['customer_id'] != customer_id:
-                            devices.append(row)
-                        else:
-                            device_ids.append(row['device_id'])
-                
-                with open('data/devices.csv', 'w', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=['device_id', 'customer_id', 'brand', 'model', 'serial_number', 'issue'])
-                    writer.writeheader()
-                    writer.writerows(devices)
-            except FileNotFoundError:
-                pass
-            
-            # Delete associated tickets
-            tickets = []
-            ticket_ids = []
-            try:
-                with open('data/tickets.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['device_id'] not in device_ids:
-                            tickets.append(row)
-                        else:
-                            ticket_ids.append(row['ticket_id'])
-                
-                with open('data/tickets.csv', 'w', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=['ticket_id', 'device_id', 'technician', 'status', 'created_date'])
-                    writer.writeheader()
-                    writer.writerows(tickets)
-            except FileNotFoundError:
-                pass
-            
-            # Delete associated services
-            services = []
-            try:
-                with open('data/services.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['ticket_id'] not in ticket_ids:
-                            services.append(row)
-                
-                with open('data/services.csv', 'w', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=['ticket_id', 'description', 'cost'])
-                    writer.writeheader()
-                    writer.writerows(services)
-            except FileNotFoundError:
-                pass
-            
-            # Delete associated invoices
-            invoices = []
-            try:
-                with open('data/invoices.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        if row['ticket_id'] not in ticket_ids:
-                            invoices.append(row)
-                
-                with open('data/invoices.csv', 'w', newline='') as f:
-                    writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                    writer.writeheader()
-                    writer.writerows(invoices)
-            except FileNotFoundError:
-                pass
-            
+        def deleted(_):
             # Refresh all lists
             self.load_customers()
             self.load_devices()
@@ -321,8 +212,10 @@ class RepairCenterApp:
             self.load_customer_combo()
             
             messagebox.showinfo("Success", f"Customer '{customer_name}' and all associated records have been deleted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete customer: {str(e)}")
+        
+        # Delete customer with its devices, tickets, services and invoices
+        self.worker.submit(lambda: self.store.delete_customer(customer_id), deleted,
+                           lambda e: messagebox.showerror("Error", f"Failed to delete customer: {str(e)}"))
     
     def create_device_tab(self):
         """Create the device management tab"""
@@ -404,39 +297,32 @@ class RepairCenterApp:
             messagebox.showerror("Error", "Customer, brand, and model are required!")
             return
         
-        try:
-            # Extract customer ID from the combo box selection
-            customer_id = customer.split("(ID: ")[-1].rstrip(")")
-            
+        # Extract customer ID from the combo box selection
+        customer_id = customer.split("(ID: ")[-1].rstrip(")")
+        
+        def add():
             # Generate new device ID
-            device_id = "1"
-            if os.path.exists('data/devices.csv'):
-                with open('data/devices.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    devices = list(reader)
-                    if devices:
-                        device_id = str(int(devices[-1]['device_id']) + 1)
+            device_id = self.store.devices.next_id()
             
             # Add device to CSV
-            with open('data/devices.csv', 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['device_id', 'customer_id', 'brand', 'model', 'serial_number', 'issue'])
-                writer.writerow({
-                    'device_id': device_id,
-                    'customer_id': customer_id,
-                    'brand': brand,
-                    'model': model,
-                    'serial_number': serial,
-                    'issue': issue
-                })
-            
+            self.store.devices.append({
+                'device_id': device_id,
+                'customer_id': customer_id,
+                'brand': brand,
+                'model': model,
+                'serial_number': serial,
+                'issue': issue
+            })
+        
+        def added(_):
             # Clear form and refresh list
             self.clear_device_form()
             self.load_devices()
             self.load_device_combo()  # Refresh device combo in ticket tab
             
             messagebox.showinfo("Success", f"Device '{brand} {model}' has been added.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add device: {str(e)}")
+        
+        self.worker.submit(add, added, lambda e: messagebox.showerror("Error", f"Failed to add device: {str(e)}"))
 
     def clear_device_form(self):
         """Clear the device form fields"""
@@ -448,66 +334,21 @@ class RepairCenterApp:
 
     def load_devices(self):
         """Load devices from CSV into the treeview"""
-        # Clear existing items
-        for item in self.device_tree.get_children():
-            self.device_tree.delete(item)
-        
-        # Load from CSV
-        try:
-            with open('data/devices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get customer name
-                    customer_name = "Unknown"
-                    try:
-                        with open('data/customers.csv', 'r') as c:
-                            customer_reader = csv.DictReader(c)
-                            for customer in customer_reader:
-                                if customer['customer_id'] == row['customer_id']:
-                                    customer_name = customer['name']
-                                    break
-                    except Exception as e:
-                        print(f"Error getting customer name: {str(e)}")
-                    
-                    self.device_tree.insert('', 'end', values=(
-                        row['device_id'],
-                        customer_name,
-                        row['brand'],
-                        row['model'],
-                        row['serial_number'],
-                        row['issue']
-                    ))
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load devices: {str(e)}")
+        self.worker.submit(
+            self.data.device_rows,
+            lambda rows: self.worker.fill_tree(self.device_tree, rows),
+            lambda e: messagebox.showerror("Error", f"Failed to load devices: {str(e)}"))
 
     def load_device_combo(self):
         """Load devices into the combo box for ticket creation"""
-        try:
-            devices = []
-            with open('data/devices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get customer name
-                    customer_name = "Unknown"
-                    try:
-                        with open('data/customers.csv', 'r') as c:
-                            customer_reader = csv.DictReader(c)
-                            for customer in customer_reader:
-                                if customer['customer_id'] == row['customer_id']:
-                                    customer_name = customer['name']
-                                    break
-                    except Exception as e:
-                        print(f"Error getting customer name: {str(e)}")
-                    
-                    devices.append(f"{row['brand']} {row['model']} - {customer_name} (ID: {row['device_id']})")
-            self.device_combo['values'] = devices
-        except FileNotFoundError:
-            self.device_combo['values'] = []
-        except Exception as e:
+        def loaded(values):
+            self.device_combo['values'] = values
+        
+        def failed(e):
             print(f"Error loading device combo: {str(e)}")
             self.device_combo['values'] = []
+        
+        self.worker.submit(self.data.device_choices, loaded, failed)
 
     def show_device_menu(self, event):
         """Show the right-click menu for device deletion"""
@@ -522,7 +363,7 @@ class RepairCenterApp:
         if not selected_item:
             return
         
-        device_id = self.device_tree.item(selected_item[0])['values'][0]
+        device_id = str(self.device_tree.item(selected_item[0])['values'][0])
         device_info = f"{self.device_tree.item(selected_item[0])['values'][2]} {self.device_tree.item(selected_item[0])['values'][3]}"
         
         # Confirm deletion
@@ -531,62 +372,7 @@ class RepairCenterApp:
             "This will also delete all associated tickets, services, and invoices!"):
             return
         
-        try:
-            # Delete device
-            devices = []
-            with open('data/devices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['device_id'] != device_id:
-                        devices.append(row)
-            
-            with open('data/devices.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['device_id', 'customer_id', 'brand', 'model', 'serial_number', 'issue'])
-                writer.writeheader()
-                writer.writerows(devices)
-            
-            # Delete associated tickets
-            tickets = []
-            ticket_ids = []
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['device_id'] != device_id:
-                        tickets.append(row)
-                    else:
-                        ticket_ids.append(row['ticket_id'])
-            
-            with open('data/tickets.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'device_id', 'technician', 'status', 'created_date'])
-                writer.writeheader()
-                writer.writerows(tickets)
-            
-            # Delete associated services
-            services = []
-            with open('data/services.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] not in ticket_ids:
-                        services.append(row)
-            
-            with open('data/services.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'description', 'cost'])
-                writer.writeheader()
-                writer.writerows(services)
-            
-            # Delete associated invoices
-            invoices = []
-            with open('data/invoices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] not in ticket_ids:
-                        invoices.append(row)
-            
-            with open('data/invoices.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                writer.writeheader()
-                writer.writerows(invoices)
-            
+        def deleted(_):
             # Refresh all lists
             self.load_devices()
             self.load_tickets()
@@ -594,8 +380,10 @@ class RepairCenterApp:
             self.load_invoices()
             
             messagebox.showinfo("Success", f"Device '{device_info}' and all associated records have been deleted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete device: {str(e)}")
+        
+        # Delete device with its tickets, services and invoices
+        self.worker.submit(lambda: self.store.delete_devices({device_id}), deleted,
+                           lambda e: messagebox.showerror("Error", f"Failed to delete device: {str(e)}"))
     
     def create_ticket_tab(self):
         """Create the repair ticket management tab"""
@@ -672,33 +460,27 @@ class RepairCenterApp:
             messagebox.showerror("Error", "Device and technician are required!")
             return
         
-        try:
-            # Extract device ID from the combo box selection
-            device_id = device.split("(ID: ")[-1].rstrip(")")
-            
+        # Extract device ID from the combo box selection
+        device_id = device.split("(ID: ")[-1].rstrip(")")
+        
+        def add():
             # Generate new ticket ID
-            ticket_id = "1"
-            if os.path.exists('data/tickets.csv'):
-                with open('data/tickets.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    tickets = list(reader)
-                    if tickets:
-                        ticket_id = str(int(tickets[-1]['ticket_id']) + 1)
+            ticket_id = self.store.tickets.next_id()
             
             # Get current date
             created_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Add ticket to CSV
-            with open('data/tickets.csv', 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'device_id', 'technician', 'status', 'created_date'])
-                writer.writerow({
-                    'ticket_id': ticket_id,
-                    'device_id': device_id,
-                    'technician': technician,
-                    'status': status,
-                    'created_date': created_date
-                })
-            
+            self.store.tickets.append({
+                'ticket_id': ticket_id,
+                'device_id': device_id,
+                'technician': technician,
+                'status': status,
+                'created_date': created_date
+            })
+            return ticket_id
+        
+        def added(ticket_id):
             # Clear form and refresh list
             self.clear_ticket_form()
             self.load_tickets()
@@ -706,8 +488,8 @@ class RepairCenterApp:
             self.load_invoice_ticket_combo()  # Refresh ticket combo in invoice tab
             
             messagebox.showinfo("Success", f"Ticket #{ticket_id} has been created.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create ticket: {str(e)}")
+        
+        self.worker.submit(add, added, lambda e: messagebox.showerror("Error", f"Failed to create ticket: {str(e)}"))
 
     def clear_ticket_form(self):
         """Clear the ticket form fields"""
@@ -717,147 +499,50 @@ class RepairCenterApp:
 
     def load_tickets(self):
         """Load tickets from CSV into the treeview"""
-        # Clear existing items
-        for item in self.ticket_tree.get_children():
-            self.ticket_tree.delete(item)
-        
-        # Load from CSV
-        try:
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get device and customer info
-                    device_info = self.get_device_info(row['device_id'])
-                    customer_name = self.get_customer_name(device_info['customer_id'])
-                    
-                    self.ticket_tree.insert('', 'end', values=(
-                        row['ticket_id'],
-                        f"{device_info['brand']} {device_info['model']}",
-                        customer_name,
-                        row['technician'],
-                        row['status'],
-                        row['created_date']
-                    ))
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load tickets: {str(e)}")
+        self.worker.submit(
+            self.data.ticket_rows,
+            lambda rows: self.worker.fill_tree(self.ticket_tree, rows),
+            lambda e: messagebox.showerror("Error", f"Failed to load tickets: {str(e)}"))
 
     def load_ticket_combo(self):
         """Load tickets into the combo box for service creation"""
-        try:
-            tickets = []
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get device and customer info
-                    device_info = self.get_device_info(row['device_id'])
-                    customer_name = self.get_customer_name(device_info['customer_id'])
-                    
-                    tickets.append(f"Ticket #{row['ticket_id']} - {device_info['brand']} {device_info['model']} ({customer_name})")
-            self.service_ticket_combo['values'] = tickets
-        except FileNotFoundError:
-            self.service_ticket_combo['values'] = []
-        except Exception as e:
+        def loaded(values):
+            self.service_ticket_combo['values'] = values
+        
+        def failed(e):
             print(f"Error loading ticket combo: {str(e)}")
             self.service_ticket_combo['values'] = []
+        
+        self.worker.submit(self.data.ticket_choices, loaded, failed)
 
     def load_invoice_ticket_combo(self):
         """Load completed tickets into the combo box for invoice creation"""
-        try:
-            tickets = []
-            debug_info = []
-            
-            # Check if tickets.csv exists
-            if not os.path.exists('data/tickets.csv'):
-                debug_info.append("tickets.csv not found")
-                messagebox.showerror("Error", "tickets.csv file not found. Please create some tickets first.")
+        # Check if tickets.csv exists
+        if not os.path.exists('data/tickets.csv'):
+            messagebox.showerror("Error", "tickets.csv file not found. Please create some tickets first.")
+            self.invoice_ticket_combo['values'] = []
+            return
+        
+        # Check if services.csv exists
+        if not os.path.exists('data/services.csv'):
+            messagebox.showerror("Error", "services.csv file not found. Please add some services first.")
+            self.invoice_ticket_combo['values'] = []
+            return
+        
+        debug_info = []
+        
+        def loaded(result):
+            tickets, status_counts = result
+            if not status_counts:
+                messagebox.showwarning("No Tickets", "No tickets found in the system. Please create some tickets first.")
                 self.invoice_ticket_combo['values'] = []
                 return
             
-            # Check if services.csv exists
-            if not os.path.exists('data/services.csv'):
-                debug_info.append("services.csv not found")
-                messagebox.showerror("Error", "services.csv file not found. Please add some services first.")
+            # Check if any completed tickets exist
+            if 'Completed' not in status_counts:
+                messagebox.showwarning("No Completed Tickets", "No completed tickets found. Please complete some tickets first.")
                 self.invoice_ticket_combo['values'] = []
                 return
-                
-            # Read tickets
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                tickets_data = list(reader)
-                debug_info.append(f"Total tickets found: {len(tickets_data)}")
-                
-                if len(tickets_data) == 0:
-                    debug_info.append("No tickets found in the system")
-                    messagebox.showwarning("No Tickets", "No tickets found in the system. Please create some tickets first.")
-                    self.invoice_ticket_combo['values'] = []
-                    return
-                
-                # Debug ticket statuses
-                status_counts = {}
-                for ticket in tickets_data:
-                    status = ticket['status']
-                    status_counts[status] = status_counts.get(status, 0) + 1
-                debug_info.append("\nTicket Status Counts:")
-                for status, count in status_counts.items():
-                    debug_info.append(f"- {status}: {count}")
-                
-                # Check if any completed tickets exist
-                if 'Completed' not in status_counts:
-                    debug_info.append("\nNo completed tickets found")
-                    messagebox.showwarning("No Completed Tickets", "No completed tickets found. Please complete some tickets first.")
-                    self.invoice_ticket_combo['values'] = []
-                    return
-                
-                for row in tickets_data:
-                    debug_info.append(f"\nChecking Ticket #{row['ticket_id']}:")
-                    debug_info.append(f"- Status: {row['status']}")
-                    
-                    if row['status'] == 'Completed':
-                        # Get device and customer info
-                        device_info = self.get_device_info(row['device_id'])
-                        customer_name = self.get_customer_name(device_info['customer_id'])
-                        debug_info.append(f"- Device: {device_info['brand']} {device_info['model']}")
-                        debug_info.append(f"- Customer: {customer_name}")
-                        
-                        # Check if ticket already has an invoice
-                        has_invoice = False
-                        try:
-                            if os.path.exists('data/invoices.csv'):
-                                with open('data/invoices.csv', 'r') as i:
-                                    invoice_reader = csv.DictReader(i)
-                                    for invoice in invoice_reader:
-                                        if invoice['ticket_id'] == row['ticket_id']:
-                                            has_invoice = True
-                                            debug_info.append(f"- Already has an invoice")
-                                            break
-                        except FileNotFoundError:
-                            debug_info.append("- No invoices.csv file found")
-                        
-                        if not has_invoice:
-                            # Check if ticket has services
-                            has_services = False
-                            service_count = 0
-                            try:
-                                with open('data/services.csv', 'r') as s:
-                                    service_reader = csv.DictReader(s)
-                                    for service in service_reader:
-                                        if service['ticket_id'] == row['ticket_id']:
-                                            has_services = True
-                                            service_count += 1
-                                    debug_info.append(f"- Services found: {service_count}")
-                            except FileNotFoundError:
-                                debug_info.append("- Error reading services.csv")
-                            
-                            if has_services:
-                                ticket_text = f"Ticket #{row['ticket_id']} - {device_info['brand']} {device_info['model']} ({customer_name})"
-                                tickets.append(ticket_text)
-                                debug_info.append(f"- Added to available tickets list: {ticket_text}")
-                            else:
-                                debug_info.append("- Not added: No services found")
-                    else:
-                        debug_info.append("- Not added: Status is not 'Completed'")
             
             # Update the combo box
             self.invoice_ticket_combo['values'] = tickets
@@ -869,50 +554,16 @@ class RepairCenterApp:
             else:
                 debug_info.append(f"\nTotal tickets available for invoice generation: {len(tickets)}")
                 print("\n".join(debug_info))  # Print debug info to console for reference
-                
-        except FileNotFoundError:
-            self.invoice_ticket_combo['values'] = []
-            messagebox.showerror("Error", "Required files not found. Please ensure all data files exist.")
-        except Exception as e:
-            print(f"Error loading invoice ticket combo: {str(e)}")
+        
+        def failed(e):
             self.invoice_ticket_combo['values'] = []
-            messagebox.showerror("Error", f"Failed to load tickets: {str(e)}")
-
-    def get_device_info(self, device_id):
-        """Get device information from the device ID"""
-        try:
-            if not os.path.exists('data/devices.csv'):
-                print(f"devices.csv not found for device_id: {device_id}")
-                return {'brand': 'Unknown', 'model': 'Unknown', 'customer_id': 'Unknown'}
-                
-            with open('data/devices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['device_id'] == device_id:
-                        return row
-            print(f"No device found for device_id: {device_id}")
-            return {'brand': 'Unknown', 'model': 'Unknown', 'customer_id': 'Unknown'}
-        except Exception as e:
-            print(f"Error getting device info: {str(e)}")
-            return {'brand': 'Error', 'model': 'Error', 'customer_id': 'Error'}
-
-    def get_customer_name(self, customer_id):
-        """Get customer name from the customer ID"""
-        try:
-            if not os.path.exists('data/customers.csv'):
-                print(f"customers.csv not found for customer_id: {customer_id}")
-                return "Unknown"
-                
-            with open('data/customers.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['customer_id'] == customer_id:
-                        return row['name']
-            print(f"No customer found for customer_id: {customer_id}")
-            return "Unknown"
-        except Exception as e:
-            print(f"Error getting customer name: {str(e)}")
-            return "Error"
+            if isinstance(e, FileNotFoundError):
+                messagebox.showerror("Error", "Required files not found. Please ensure all data files exist.")
+            else:
+                print(f"Error loading invoice ticket combo: {str(e)}")
+                messagebox.showerror("Error", f"Failed to load tickets: {str(e)}")
+        
+        self.worker.submit(lambda: self.data.invoice_ticket_choices(debug_info), loaded, failed)
 
     def show_ticket_menu(self, event):
         """Show the right-click menu for ticket deletion"""
@@ -927,7 +578,7 @@ class RepairCenterApp:
         if not selected_item:
             return
         
-        ticket_id = self.ticket_tree.item(selected_item[0])['values'][0]
+        ticket_id = str(self.ticket_tree.item(selected_item[0])['values'][0])
         ticket_info = f"Ticket #{ticket_id}"
         
         # Confirm deletion
@@ -936,54 +587,17 @@ class RepairCenterApp:
             "This will also delete all associated services and invoices!"):
             return
         
-        try:
-            # Delete ticket
-            tickets = []
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] != ticket_id:
-                        tickets.append(row)
-            
-            with open('data/tickets.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'device_id', 'technician', 'status', 'created_date'])
-                writer.writeheader()
-                writer.writerows(tickets)
-            
-            # Delete associated services
-            services = []
-            with open('data/services.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] not in ticket_ids:
-                        services.append(row)
-            
-            with open('data/services.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'description', 'cost'])
-                writer.writeheader()
-                writer.writerows(services)
-            
-            # Delete associated invoices
-            invoices = []
-            with open('data/invoices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] not in ticket_ids:
-                        invoices.append(row)
-            
-            with open('data/invoices.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                writer.writeheader()
-                writer.writerows(invoices)
-            
+        def deleted(_):
             # Refresh all lists
             self.load_tickets()
             self.load_services()
             self.load_invoices()
             
             messagebox.showinfo("Success", f"{ticket_info} and all associated records have been deleted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete ticket: {str(e)}")
+        
+        # Delete ticket with its services and invoices
+        self.worker.submit(lambda: self.store.delete_tickets({ticket_id}), deleted,
+                           lambda e: messagebox.showerror("Error", f"Failed to delete ticket: {str(e)}"))
     
     def create_service_tab(self):
         """Create the parts and services tab"""
@@ -1059,8 +673,8 @@ class RepairCenterApp:
             return
         
         service_info = self.service_tree.item(selected_item[0])['values']
-        ticket_id = service_info[0].split("Ticket #")[1]
-        description = service_info[3]
+        ticket_id = str(service_info[0]).split("Ticket #")[1]
+        description = str(service_info[3])
         
         # Confirm deletion
         if not messagebox.askyesno("Confirm Deletion", 
@@ -1069,25 +683,14 @@ class RepairCenterApp:
             f"Description: {description}"):
             return
         
-        try:
-            # Delete service
-            services = []
-            with open('data/services.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if not (row['ticket_id'] == ticket_id and row['description'] == description):
-                        services.append(row)
-            
-            with open('data/services.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'description', 'cost'])
-                writer.writeheader()
-                writer.writerows(services)
-            
+        def deleted(_):
             # Refresh service list
             self.load_services()
             messagebox.showinfo("Success", "Service has been deleted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete service: {str(e)}")
+        
+        # Delete service
+        self.worker.submit(lambda: self.store.services.delete(ticket_id=ticket_id, description=description), deleted,
+                           lambda e: messagebox.showerror("Error", f"Failed to delete service: {str(e)}"))
     
     def create_invoice_tab(self):
         """Create the invoice generation tab"""
@@ -1252,97 +855,12 @@ class RepairCenterApp:
         # Reload ticket combo to ensure it's up to date
         self.load_invoice_ticket_combo()
 
-    def get_ticket_info(self, ticket_id):
-        """Get ticket information including customer details"""
-        try:
-            # Get ticket info
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['ticket_id'] == ticket_id:
-                        device_id = row['device_id']
-                        # Get device info
-                        with open('data/devices.csv', 'r') as d:
-                            device_reader = csv.DictReader(d)
-                            for device in device_reader:
-                                if device['device_id'] == device_id:
-                                    customer_id = device['customer_id']
-                                    # Get customer info
-                                    with open('data/customers.csv', 'r') as c:
-                                        customer_reader = csv.DictReader(c)
-                                        for customer in customer_reader:
-                                            if customer['customer_id'] == customer_id:
-                                                return {
-                                                    'customer': customer['name'],
-                                                    'device': f"{device['brand']} {device['model']}",
-                                                    'status': row['status']
-                                                }
-            return {'customer': 'Unknown', 'device': 'Unknown', 'status': 'Unknown'}
-        except Exception as e:
-            print(f"Error getting ticket info: {str(e)}")
-            return {'customer': 'Error', 'device': 'Error', 'status': 'Error'}
-
     def load_invoices(self):
         """Load invoices from CSV into the treeview"""
-        # Clear existing items
-        for item in self.invoice_tree.get_children():
-            self.invoice_tree.delete(item)
-        
-        # Load from CSV
-        try:
-            with open('data/invoices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    try:
-                        # Get ticket and customer info
-                        ticket_info = self.get_ticket_info(row['ticket_id'])
-                        
-                        # Calculate total amount from services
-                        total_amount = 0
-                        try:
-                            with open('data/services.csv', 'r') as services_file:
-                                services_reader = csv.DictReader(services_file)
-                                for service in services_reader:
-                                    if service['ticket_id'] == row['ticket_id']:
-                                        total_amount += float(service['cost'])
-                        except Exception as e:
-                            print(f"Error calculating total amount: {str(e)}")
-                        
-                        # Get tax rate and discount from the invoice record
-                        try:
-                            tax_rate = float(row.get('tax_rate', 0))
-                            discount = float(row.get('discount', 0))
-                            
-                            # Calculate final total with tax and discount
-                            tax_amount = total_amount * (tax_rate / 100)
-                            final_total = total_amount + tax_amount - discount
-                            final_total = max(0, final_total)  # Ensure total is not negative
-                            
-                            # Format the total amount with 2 decimal places
-                            formatted_amount = f"₹{final_total:.2f}"
-                        except Exception as e:
-                            print(f"Error calculating final total: {str(e)}")
-                            formatted_amount = f"₹{total_amount:.2f}"
-                        
-                        # Get the actual paid status from the invoice record
-                        paid_status = row['paid_status']
-                        
-                        self.invoice_tree.insert('', 'end', values=(
-                            row['invoice_id'],
-                            f"Ticket #{row['ticket_id']}",
-                            ticket_info['customer'],
-                            formatted_amount,
-                            paid_status,
-                            row['date']
-                        ))
-                    except Exception as e:
-                        print(f"Error processing invoice row: {str(e)}")
-                        continue
-                        
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load invoices: {str(e)}")
+        self.worker.submit(
+            self.data.invoice_rows,
+            lambda rows: self.worker.fill_tree(self.invoice_tree, rows),
+            lambda e: messagebox.showerror("Error", f"Failed to load invoices: {str(e)}"))
 
     def delete_invoice(self):
         """Delete the selected invoice"""
@@ -1350,7 +868,7 @@ class RepairCenterApp:
         if not selected_item:
             return
         
-        invoice_id = self.invoice_tree.item(selected_item[0])['values'][0]
+        invoice_id = str(self.invoice_tree.item(selected_item[0])['values'][0])
         invoice_info = f"Invoice #{invoice_id}"
         
         # Confirm deletion
@@ -1358,30 +876,21 @@ class RepairCenterApp:
             f"Are you sure you want to delete {invoice_info}?"):
             return
         
-        try:
+        def delete():
             # Delete invoice
-            invoices = []
-            with open('data/invoices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['invoice_id'] != invoice_id:
-                        invoices.append(row)
-            
-            with open('data/invoices.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                writer.writeheader()
-                writer.writerows(invoices)
+            self.store.invoices.delete(invoice_id=invoice_id)
             
             # Delete PDF file if it exists
-            pdf_file = f"invoices/invoice_{invoice_id}.pdf"
+            pdf_file = invoice_pdf_path(invoice_id)
             if os.path.exists(pdf_file):
                 os.remove(pdf_file)
-            
+        
+        def deleted(_):
             # Refresh invoice list
             self.load_invoices()
             messagebox.showinfo("Success", f"{invoice_info} has been deleted.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to delete invoice: {str(e)}")
+        
+        self.worker.submit(delete, deleted, lambda e: messagebox.showerror("Error", f"Failed to delete invoice: {str(e)}"))
     
     def show_invoice_menu(self, event):
         """Show the right-click menu for invoice status updates"""
@@ -1398,32 +907,22 @@ class RepairCenterApp:
         
         invoice_id = self.invoice_tree.item(selected_item[0])['values'][0]
         
-        # Update in CSV
-        invoices = []
-        try:
-            with open('data/invoices.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row['invoice_id'] == invoice_id:
-                        row['paid_status'] = new_status
-                    invoices.append(row)
-            
-            with open('data/invoices.csv', 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                writer.writeheader()
-                writer.writerows(invoices)
+        def updated(found):
+            if not found:
+                messagebox.showerror("Error", "Could not update invoice status")
+                return
             
             # Refresh invoice list
             self.load_invoices()
             messagebox.showinfo("Success", f"Invoice marked as {new_status}")
-        except FileNotFoundError:
-            messagebox.showerror("Error", "Could not update invoice status")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update invoice status: {str(e)}")
+        
+        # Update in CSV
+        self.worker.submit(lambda: self.store.invoices.update(invoice_id, paid_status=new_status), updated,
+                           lambda e: messagebox.showerror("Error", f"Failed to update invoice status: {str(e)}"))
     
     def show_debug_info(self):
         """Show debug information about the current state"""
-        try:
+        def collect():
             debug_info = []
             
             # Check files
@@ -1435,27 +934,23 @@ class RepairCenterApp:
             
             # Count tickets
             if os.path.exists('data/tickets.csv'):
-                with open('data/tickets.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    tickets = list(reader)
-                    completed = sum(1 for t in tickets if t['status'] == 'Completed')
-                    debug_info.append(f"\nTicket Counts:")
-                    debug_info.append(f"Total tickets: {len(tickets)}")
-                    debug_info.append(f"Completed tickets: {completed}")
+                tickets = self.store.tickets.all()
+                completed = sum(1 for t in tickets if t['status'] == 'Completed')
+                debug_info.append(f"\nTicket Counts:")
+                debug_info.append(f"Total tickets: {len(tickets)}")
+                debug_info.append(f"Completed tickets: {completed}")
             
             # Count invoices
             if os.path.exists('data/invoices.csv'):
-                with open('data/invoices.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    invoices = list(reader)
-                    debug_info.append(f"\nInvoice Counts:")
-                    debug_info.append(f"Total invoices: {len(invoices)}")
-            
-            # Show debug info
-            messagebox.showinfo("Debug Information", "\n".join(debug_info))
-            
-        except Exception as e:
-            messagebox.showerror("Debug Error", f"Error showing debug info: {str(e)}")
+                invoices = self.store.invoices.all()
+                debug_info.append(f"\nInvoice Counts:")
+                debug_info.append(f"Total invoices: {len(invoices)}")
+            return debug_info
+        
+        # Show debug info
+        self.worker.submit(
+            collect, lambda debug_info: messagebox.showinfo("Debug Information", "\n".join(debug_info)),
+            lambda e: messagebox.showerror("Debug Error", f"Error showing debug info: {str(e)}"))
 
     def create_summary_tab(self):
         """Create the summary tab with statistics and overview"""
@@ -1473,6 +968,9 @@ class RepairCenterApp:
         self.completed_tickets_var = tk.StringVar(value="Completed Tickets: 0")
         self.total_invoices_var = tk.StringVar(value="Total Invoices: 0")
         self.total_revenue_var = tk.StringVar(value="Total Revenue: ₹0.00")
+        self.paid_invoices_var = tk.StringVar(value="Paid Invoices: 0 (₹0.00)")
+        self.unpaid_invoices_var = tk.StringVar(value="Unpaid Invoices: 0 (₹0.00)")
+        self.ticket_status_var = tk.StringVar(value="Tickets by Status: -")
         
         # Add labels to frame
         ttk.Label(stats_frame, textvariable=self.total_customers_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
@@ -1481,6 +979,9 @@ class RepairCenterApp:
         ttk.Label(stats_frame, textvariable=self.completed_tickets_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
         ttk.Label(stats_frame, textvariable=self.total_invoices_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
         ttk.Label(stats_frame, textvariable=self.total_revenue_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
+        ttk.Label(stats_frame, textvariable=self.paid_invoices_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
+        ttk.Label(stats_frame, textvariable=self.unpaid_invoices_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
+        ttk.Label(stats_frame, textvariable=self.ticket_status_var, font=('Helvetica', 10, 'bold')).pack(pady=5)
         
         # Add refresh button
         ttk.Button(stats_frame, text="Refresh Statistics", command=self.update_summary_stats).pack(pady=10)
@@ -1490,56 +991,23 @@ class RepairCenterApp:
 
     def update_summary_stats(self):
         """Update the summary statistics"""
-        try:
-            # Count customers
-            total_customers = 0
-            if os.path.exists('data/customers.csv'):
-                with open('data/customers.csv', 'r') as f:
-                    total_customers = len(list(csv.DictReader(f)))
-            self.total_customers_var.set(f"Total Customers: {total_customers}")
-            
-            # Count devices
-            total_devices = 0
-            if os.path.exists('data/devices.csv'):
-                with open('data/devices.csv', 'r') as f:
-                    total_devices = len(list(csv.DictReader(f)))
-            self.total_devices_var.set(f"Total Devices: {total_devices}")
-            
-            # Count tickets
-            total_tickets = 0
-            completed_tickets = 0
-            if os.path.exists('data/tickets.csv'):
-                with open('data/tickets.csv', 'r') as f:
-                    tickets = list(csv.DictReader(f))
-                    total_tickets = len(tickets)
-                    completed_tickets = sum(1 for t in tickets if t['status'] == 'Completed')
-            self.total_tickets_var.set(f"Total Tickets: {total_tickets}")
-            self.completed_tickets_var.set(f"Completed Tickets: {completed_tickets}")
-            
-            # Count invoices and calculate revenue
-            total_invoices = 0
-            total_revenue = 0.0
-            if os.path.exists('data/invoices.csv'):
-                with open('data/invoices.csv', 'r') as f:
-                    invoices = list(csv.DictReader(f))
-                    total_invoices = len(invoices)
-                    
-                    # Calculate total revenue from services
-                    for invoice in invoices:
-                        try:
-                            with open('data/services.csv', 'r') as s:
-                                services = csv.DictReader(s)
-                                for service in services:
-                                    if service['ticket_id'] == invoice['ticket_id']:
-                                        total_revenue += float(service['cost'])
-                        except Exception as e:
-                            print(f"Error calculating revenue: {str(e)}")
-            
-            self.total_invoices_var.set(f"Total Invoices: {total_invoices}")
-            self.total_revenue_var.set(f"Total Revenue: ₹{total_revenue:.2f}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to update statistics: {str(e)}")
+        def loaded(stats):
+            self.total_customers_var.set(f"Total Customers: {stats['total_customers']}")
+            self.total_devices_var.set(f"Total Devices: {stats['total_devices']}")
+            self.total_tickets_var.set(f"Total Tickets: {stats['total_tickets']}")
+            self.completed_tickets_var.set(f"Completed Tickets: {stats['completed_tickets']}")
+            self.total_invoices_var.set(f"Total Invoices: {stats['total_invoices']}")
+            self.total_revenue_var.set(f"Total Revenue: ₹{stats['total_revenue']:.2f}")
+            paid_count, paid_revenue = stats['payments'].get('Paid', (0, 0.0))
+            unpaid_count, unpaid_revenue = stats['payments'].get('Unpaid', (0, 0.0))
+            self.paid_invoices_var.set(f"Paid Invoices: {paid_count} (₹{paid_revenue:.2f})")
+            self.unpaid_invoices_var.set(f"Unpaid Invoices: {unpaid_count} (₹{unpaid_revenue:.2f})")
+            breakdown = ", ".join(f"{status}: {count}" for status, count in stats['status_counts'].items())
+            self.ticket_status_var.set(f"Tickets by Status: {breakdown or '-'}")
+        
+        self.worker.submit(
+            self.data.summary_stats, loaded,
+            lambda e: messagebox.showerror("Error", f"Failed to update statistics: {str(e)}"))
 
     def add_service(self):
         """Add a new service to a ticket"""
@@ -1558,28 +1026,25 @@ class RepairCenterApp:
             ticket_id = ticket.split("Ticket #")[1].split(" -")[0]
             
             # Validate cost is a number
-            try:
-                cost = float(cost)
-            except ValueError:
-                messagebox.showerror("Error", "Cost must be a valid number!")
-                return
-            
-            # Add service to CSV
-            with open('data/services.csv', 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['ticket_id', 'description', 'cost'])
-                writer.writerow({
-                    'ticket_id': ticket_id,
-                    'description': description,
-                    'cost': cost
-                })
-            
+            cost = float(cost)
+        except ValueError:
+            messagebox.showerror("Error", "Cost must be a valid number!")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to add service: {str(e)}")
+            return
+        
+        def added(_):
             # Clear form and refresh list
             self.clear_service_form()
             self.load_services()
             
             messagebox.showinfo("Success", "Service has been added.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to add service: {str(e)}")
+        
+        # Add service to CSV
+        self.worker.submit(
+            lambda: self.store.services.append({'ticket_id': ticket_id, 'description': description, 'cost': cost}),
+            added, lambda e: messagebox.showerror("Error", f"Failed to add service: {str(e)}"))
 
     def clear_service_form(self):
         """Clear the service form fields"""
@@ -1589,48 +1054,21 @@ class RepairCenterApp:
 
     def load_services(self):
         """Load services from CSV into the treeview"""
-        # Clear existing items
-        for item in self.service_tree.get_children():
-            self.service_tree.delete(item)
-        
-        # Load from CSV
-        try:
-            with open('data/services.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get ticket info
-                    ticket_info = self.get_ticket_info(row['ticket_id'])
-                    
-                    self.service_tree.insert('', 'end', values=(
-                        f"Ticket #{row['ticket_id']}",
-                        ticket_info['device'],
-                        ticket_info['customer'],
-                        row['description'],
-                        f"₹{float(row['cost']):.2f}"
-                    ))
-        except FileNotFoundError:
-            pass
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load services: {str(e)}")
+        self.worker.submit(
+            self.data.service_rows,
+            lambda rows: self.worker.fill_tree(self.service_tree, rows),
+            lambda e: messagebox.showerror("Error", f"Failed to load services: {str(e)}"))
 
     def load_service_ticket_combo(self):
         """Load tickets into the combo box for service creation"""
-        try:
-            tickets = []
-            with open('data/tickets.csv', 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Get device and customer info
-                    device_info = self.get_device_info(row['device_id'])
-                    customer_name = self.get_customer_name(device_info['customer_id'])
-                    
-                    tickets.append(f"Ticket #{row['ticket_id']} - {device_info['brand']} {device_info['model']} ({customer_name})")
-            self.service_ticket_combo['values'] = tickets
-        except FileNotFoundError:
-            self.service_ticket_combo['values'] = []
-        except Exception as e:
+        def loaded(values):
+            self.service_ticket_combo['values'] = values
+        
+        def failed(e):
             print(f"Error loading service ticket combo: {str(e)}")
             self.service_ticket_combo['values'] = []
+        
+        self.worker.submit(self.data.ticket_choices, loaded, failed)
 
     def generate_invoice(self):
         """Generate an invoice for a completed ticket"""
@@ -1649,169 +1087,68 @@ class RepairCenterApp:
             # Extract ticket ID from the combo box selection
             ticket_id = ticket.split("Ticket #")[1].split(" -")[0]
             
-            # Debug information
-            debug_info = []
-            debug_info.append(f"Selected Ticket ID: {ticket_id}")
-            
             # Validate tax rate and discount are numbers
-            try:
-                tax_rate = float(tax_rate)
-                discount = float(discount)
-            except ValueError:
-                messagebox.showerror("Error", "Tax rate and discount must be valid numbers!")
-                return
-            
+            tax_rate = float(tax_rate)
+            discount = float(discount)
+        except ValueError:
+            messagebox.showerror("Error", "Tax rate and discount must be valid numbers!")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}")
+            return
+        
+        # Check if services.csv exists
+        if not os.path.exists('data/services.csv'):
+            messagebox.showerror("Error", "Services file not found! Please add services first.")
+            return
+        
+        # Debug information
+        debug_info = []
+        debug_info.append(f"Selected Ticket ID: {ticket_id}")
+        
+        def create():
             # Calculate total amount from services
-            total_amount = 0
-            services_list = []
-            
-            # Check if services.csv exists
-            if not os.path.exists('data/services.csv'):
-                messagebox.showerror("Error", "Services file not found! Please add services first.")
-                return
-                
-            try:
-                with open('data/services.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    services = list(reader)
-                    debug_info.append(f"Total services in file: {len(services)}")
-                    
-                    for row in reader:
-                        if row['ticket_id'] == ticket_id:
-                            service_cost = float(row['cost'])
-                            total_amount += service_cost
-                            services_list.append({
-                                'description': row['description'],
-                                'cost': service_cost
-                            })
-                            debug_info.append(f"Found service: {row['description']} - ₹{service_cost}")
-            except FileNotFoundError:
-                messagebox.showerror("Error", "Services file not found! Please add services first.")
-                return
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to calculate services total: {str(e)}")
-                return
-            
+            debug_info.append(f"Total services in file: {len(self.store.services.all())}")
+            total_amount, services_list = self.data.ticket_services(ticket_id)
+            for service in services_list:
+                debug_info.append(f"Found service: {service['description']} - ₹{service['cost']}")
             if total_amount == 0:
+                return None
+            
+            # Add the invoice with its tax and final total
+            invoice_id, final_total, current_date = self.data.create_invoice(
+                ticket_id, total_amount, tax_rate, discount, payment_status)
+            pdf_data = self.data.invoice_pdf_data(
+                invoice_id, ticket_id, tax_rate, discount, payment_status, current_date, services_list)
+            return invoice_id, final_total, pdf_data
+        
+        def created(result):
+            if result is None:
                 # Show debug information
                 debug_message = "No services found for this ticket!\n\nDebug Information:\n" + "\n".join(debug_info)
                 messagebox.showerror("Error", debug_message)
                 return
-            
-            # Calculate tax and final total
-            tax_amount = total_amount * (tax_rate / 100)
-            final_total = total_amount + tax_amount - discount
-            final_total = max(0, final_total)  # Ensure total is not negative
-            
-            # Generate new invoice ID
-            invoice_id = "1"
-            if os.path.exists('data/invoices.csv'):
-                with open('data/invoices.csv', 'r') as f:
-                    reader = csv.DictReader(f)
-                    invoices = list(reader)
-                    if invoices:
-                        invoice_id = str(int(invoices[-1]['invoice_id']) + 1)
-            
-            # Get current date
-            current_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            # Add invoice to CSV
-            with open('data/invoices.csv', 'a', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=['invoice_id', 'ticket_id', 'total_amount', 'paid_status', 'date', 'tax_rate', 'discount'])
-                writer.writerow({
-                    'invoice_id': invoice_id,
-                    'ticket_id': ticket_id,
-                    'total_amount': str(final_total),  # Convert to string to ensure proper storage
-                    'paid_status': payment_status,
-                    'date': current_date,
-                    'tax_rate': str(tax_rate),
-                    'discount': str(discount)
-                })
-            
-            # Generate PDF invoice
-            self.generate_invoice_pdf(invoice_id, ticket_id, final_total, tax_rate, discount, payment_status, current_date, services_list)
+            invoice_id, final_total, pdf_data = result
             
             # Clear form and refresh list
             self.clear_invoice_form()
             self.load_invoices()
             
-            messagebox.showinfo("Success", f"Invoice #{invoice_id} has been generated.\nTotal Amount: ₹{final_total:.2f}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}")
+            # Generate PDF invoice
+            self.generate_invoice_pdf(invoice_id, pdf_data, lambda: messagebox.showinfo(
+                "Success", f"Invoice #{invoice_id} has been generated.\nTotal Amount: ₹{final_total:.2f}"))
+        
+        self.worker.submit(create, created,
+                           lambda e: messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}"))
 
-    def generate_invoice_pdf(self, invoice_id, ticket_id, total_amount, tax_rate, discount, payment_status, date, services_list):
-        """Generate a PDF invoice"""
-        try:
-            # Get ticket info
-            ticket_info = self.get_ticket_info(ticket_id)
-            
-            # Create PDF file
-            pdf_file = f"invoices/invoice_{invoice_id}.pdf"
-            doc = SimpleDocTemplate(pdf_file, pagesize=letter)
-            elements = []
-            
-            # Add title
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                alignment=TA_CENTER,
-                spaceAfter=30
-            )
-            elements.append(Paragraph(f"Invoice #{invoice_id}", title_style))
-            
-            # Add customer and device info
-            info_style = ParagraphStyle(
-                'Info',
-                parent=styles['Normal'],
-                spaceAfter=12
-            )
-            elements.append(Paragraph(f"Customer: {ticket_info['customer']}", info_style))
-            elements.append(Paragraph(f"Device: {ticket_info['device']}", info_style))
-            elements.append(Paragraph(f"Date: {date}", info_style))
-            elements.append(Paragraph(f"Payment Status: {payment_status}", info_style))
-            
-            # Add services table
-            services_data = [['Description', 'Cost']]
-            
-            # Add services from the list
-            subtotal = 0
-            for service in services_list:
-                services_data.append([service['description'], f"₹{service['cost']:.2f}"])
-                subtotal += service['cost']
-            
-            # Calculate tax and total
-            tax_amount = subtotal * (tax_rate / 100)
-            final_total = subtotal + tax_amount - discount
-            
-            # Add summary rows
-            services_data.append(['Subtotal', f"₹{subtotal:.2f}"])
-            services_data.append(['Tax', f"₹{tax_amount:.2f}"])
-            services_data.append(['Discount', f"-₹{discount:.2f}"])
-            services_data.append(['Total', f"₹{final_total:.2f}"])
-            
-            # Create table
-            table = Table(services_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -4), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            
-            # Build PDF
-            doc.build(elements)
-            
-        except Exception as e:
+    def generate_invoice_pdf(self, invoice_id, data, on_done):
+        """Render a PDF invoice, using the layout shared with the web app, on the render thread"""
+        def failed(e):
             messagebox.showerror("Error", f"Failed to generate PDF invoice: {str(e)}")
+            on_done()
+        
+        self.worker.render(lambda: render_invoice_pdf(data, invoice_pdf_path(invoice_id)),
+                           lambda _: on_done(), failed)
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -0,0 +1,132 @@
+"""Baseline schema
+
+Creates the tables that ``db.create_all()`` used to create, without the
+indexes added in 0002. Databases created before migrations existed already
+have some or all of these tables; those are left as they are, so
+``flask db upgrade`` adopts an existing database without data loss.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(name):
+    return name not in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    if _missing('user'):
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(length=80), nullable=False),
+            sa.Column('password_hash', sa.String(length=120), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('role', sa.String(length=20), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('email'),
+            sa.UniqueConstraint('username'),
+        )
+    if _missing('customer'):
+        op.create_table(
+            'customer',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('phone', sa.String(length=20), nullable=True),
+            sa.Column('email', sa.String(length=120), nullable=True),
+            sa.Column('address', sa.String(length=200), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('device'):
+        op.create_table(
+            'device',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('customer_id', sa.Integer(), nullable=False),
+            sa.Column('brand', sa.String(length=50), nullable=False),
+            sa.Column('model', sa.String(length=50), nullable=False),
+            sa.Column('serial_number', sa.String(length=50), nullable=True),
+            sa.Column('issue', sa.Text(), nullable=True),
+            sa.ForeignKeyConstraint(['customer_id'], ['customer.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('ticket'):
+        op.create_table(
+            'ticket',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('device_id', sa.Integer(), nullable=False),
+            sa.Column('technician_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('created_date', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['device_id'], ['device.id']),
+            sa.ForeignKeyConstraint(['technician_id'], ['user.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('service'):
+        op.create_table(
+            'service',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('ticket_id', sa.Integer(), nullable=False),
+            sa.Column('description', sa.Text(), nullable=False),
+            sa.Column('cost', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['ticket_id'], ['ticket.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('invoice'):
+        op.create_table(
+            'invoice',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('ticket_id', sa.Integer(), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('paid_status', sa.String(length=20), nullable=False),
+            sa.Column('date', sa.DateTime(), nullable=False),
+            sa.Column('tax_rate', sa.Float(), nullable=True),
+            sa.Column('discount', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['ticket_id'], ['ticket.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('dashboard_stat'):
+        op.create_table(
+            'dashboard_stat',
+            sa.Column('key', sa.String(length=40), nullable=False),
+            sa.Column('value', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('key'),
+        )
+    if _missing('pdf_job'):
+        op.create_table(
+            'pdf_job',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('invoice_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('content_key', sa.String(length=64), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['invoice_id'], ['invoice.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+    if _missing('legacy_id_map'):
+        op.create_table(
+            'legacy_id_map',
+            sa.Column('source', sa.String(length=20), nullable=False),
+            sa.Column('legacy_id', sa.String(length=40), nullable=False),
+            sa.Column('new_id', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('source', 'legacy_id'),
+        )
+
+
+def downgrade():
+    for name in ('legacy_id_map', 'pdf_job', 'dashboard_stat', 'invoice', 'service',
+                 'ticket', 'device', 'customer', 'user'):
+        op.drop_table(name)
@@ -0,0 +1,56 @@
+"""Index foreign keys and hot filter/sort columns
+
+Every join from a customer down to its invoices, and every filter the list
+pages and the dashboard use, was a full table scan. The sort columns were
+declared ``index=True`` earlier, but ``create_all`` never adds indexes to
+tables that already exist, so older databases are missing those too.
+Indexes that are already present are skipped.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('customer', 'name'),
+    ('device', 'customer_id'),
+    ('device', 'brand'),
+    ('device', 'model'),
+    ('ticket', 'device_id'),
+    ('ticket', 'technician_id'),
+    ('ticket', 'status'),
+    ('ticket', 'created_date'),
+    ('service', 'ticket_id'),
+    ('service', 'description'),
+    ('service', 'cost'),
+    ('invoice', 'ticket_id'),
+    ('invoice', 'total_amount'),
+    ('invoice', 'paid_status'),
+    ('invoice', 'date'),
+    ('pdf_job', 'invoice_id'),
+    ('pdf_job', 'status'),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        name = f'ix_{table}_{column}'
+        if name not in existing:
+            op.create_index(name, table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in reversed(INDEXES):
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
@@ -0,0 +1,47 @@
+"""Store money as integer hundredths
+
+Service cost, invoice total and discount become whole paise and the tax
+rate becomes hundredths of a percent, all in INTEGER columns (see
+money.py). Existing values are multiplied by 100 and rounded to the
+nearest whole number.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COLUMNS = {
+    'service': [('cost', False)],
+    'invoice': [('total_amount', False), ('tax_rate', True), ('discount', True)],
+}
+
+
+def upgrade():
+    for table, columns in COLUMNS.items():
+        for column, _ in columns:
+            op.execute(f"UPDATE {table} SET {column} = ROUND({column} * 100)")
+        # SQLite cannot change a column's type in place; batch mode copies the table
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(column, existing_type=sa.Float(), type_=sa.Integer(),
+                                      existing_nullable=nullable, postgresql_using=f'{column}::integer')
+
+
+def downgrade():
+    for table, columns in COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column, nullable in columns:
+                batch_op.alter_column(column, existing_type=sa.Integer(), type_=sa.Float(),
+                                      existing_nullable=nullable)
+        for column, _ in columns:
+            op.execute(f"UPDATE {table} SET {column} = {column} / 100.0")
@@ -0,0 +1,61 @@
+"""Ticket completion date and daily report rollups
+
+Adds ``ticket.completed_date`` and the ``daily_invoice_stat`` and
+``daily_ticket_stat`` rollup tables used by reporting.py. Tickets that are
+already completed get the date of their first invoice as completion date,
+the closest record there is; completed tickets without an invoice stay
+NULL and are left out of turnaround figures. The rollups are filled the
+first time the reports page is opened, or with ``flask rebuild-reports``.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket') as batch_op:
+        batch_op.add_column(sa.Column('completed_date', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_ticket_completed_date', ['completed_date'], unique=False)
+    op.execute(
+        "UPDATE ticket SET completed_date = "
+        "(SELECT MIN(invoice.date) FROM invoice WHERE invoice.ticket_id = ticket.id) "
+        "WHERE status = 'Completed'"
+    )
+
+    op.create_table(
+        'daily_invoice_stat',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('invoices', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Integer(), nullable=False),
+        sa.Column('unpaid_invoices', sa.Integer(), nullable=False),
+        sa.Column('unpaid_amount', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+    op.create_table(
+        'daily_ticket_stat',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('technician_id', sa.Integer(), nullable=False),
+        sa.Column('opened', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.Column('turnaround_seconds', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'technician_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('daily_ticket_stat')
+    op.drop_table('daily_invoice_stat')
+    with op.batch_alter_table('ticket') as batch_op:
+        batch_op.drop_index('ix_ticket_completed_date')
+        batch_op.drop_column('completed_date')
@@ -0,0 +1,73 @@
+"""Full-text search indexes for customers, devices and services
+
+On SQLite this creates the external-content FTS5 tables used by search.py,
+the triggers that keep them in step with the source tables, and fills them
+from the rows already there. On PostgreSQL it creates GIN indexes over
+``to_tsvector('simple', ...)`` of the same columns; the expressions must
+stay identical to ``search.pg_document`` for the planner to use them.
+
+SQLite drops a table's triggers with the table, so a later batch migration
+that has to recreate customer, device or service must create the triggers
+again.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+SEARCH_TABLES = [
+    ('customer', ('name', 'phone', 'email')),
+    ('device', ('brand', 'model', 'serial_number', 'issue')),
+    ('service', ('description',)),
+]
+
+
+def _pg_document(columns):
+    joined = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('simple', {joined})"
+
+
+def _sqlite_upgrade(table, columns):
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', prefix='2 3')")
+    op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+               f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END")
+    op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+               f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END")
+    op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+               f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+               f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END")
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, columns in SEARCH_TABLES:
+        if dialect == 'sqlite':
+            _sqlite_upgrade(table, columns)
+        elif dialect == 'postgresql':
+            op.create_index(f'ix_{table}_search', table, [sa.text(_pg_document(columns))], postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table, _ in reversed(SEARCH_TABLES):
+        if dialect == 'sqlite':
+            for suffix in ('au', 'ad', 'ai'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif dialect == 'postgresql':
+            op.drop_index(f'ix_{table}_search', table_name=table)
@@ -0,0 +1,61 @@
+"""Normalized phone and serial number keys for intake lookups
+
+Adds the indexed ``customer.phone_key`` and ``device.serial_key`` columns
+used by intake.py and fills them for existing rows. The normalization is
+copied from intake.py as it stood when this migration was written.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _phone_key(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 12 and digits.startswith('91'):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith('0'):
+        digits = digits[1:]
+    return digits or None
+
+
+def _serial_key(serial):
+    return re.sub(r'[\s\-]', '', serial or '').casefold() or None
+
+
+def _backfill(table, source, key, normalize):
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(f"SELECT id, {source} FROM {table} WHERE {source} IS NOT NULL")).fetchall()
+    updates = [{'id': row_id, 'key': normalize(value)} for row_id, value in rows]
+    if updates:
+        conn.execute(sa.text(f"UPDATE {table} SET {key} = :key WHERE id = :id"), updates)
+
+
+def upgrade():
+    # Plain ADD COLUMN: a batch rebuild of these tables would drop the search triggers from 0005
+    op.add_column('customer', sa.Column('phone_key', sa.String(length=20), nullable=True))
+    op.create_index('ix_customer_phone_key', 'customer', ['phone_key'], unique=False)
+    op.add_column('device', sa.Column('serial_key', sa.String(length=50), nullable=True))
+    op.create_index('ix_device_serial_key', 'device', ['serial_key'], unique=False)
+    _backfill('customer', 'phone', 'phone_key', _phone_key)
+    _backfill('device', 'serial_number', 'serial_key', _serial_key)
+
+
+def downgrade():
+    op.drop_index('ix_device_serial_key', table_name='device')
+    op.drop_index('ix_customer_phone_key', table_name='customer')
+    # SQLite 3.35+ drops a column in place, leaving the search triggers alone
+    op.drop_column('device', 'serial_key')
+    op.drop_column('customer', 'phone_key')
@@ -0,0 +1,34 @@
+"""Store the dashboard counters as integer hundredths
+
+``dashboard_stat.value`` held every counter, revenue included, as a float.
+It becomes an INTEGER column of hundredths like the other money columns
+(see money.py), so the revenue counter adds up exact paise. Existing
+values are multiplied by 100 and rounded to the nearest whole number.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE dashboard_stat SET value = ROUND(value * 100)")
+    with op.batch_alter_table('dashboard_stat') as batch_op:
+        batch_op.alter_column('value', existing_type=sa.Float(), type_=sa.Integer(),
+                              existing_nullable=False, postgresql_using='value::integer')
+
+
+def downgrade():
+    with op.batch_alter_table('dashboard_stat') as batch_op:
+        batch_op.alter_column('value', existing_type=sa.Integer(), type_=sa.Float(), existing_nullable=False)
+    op.execute("UPDATE dashboard_stat SET value = value / 100.0")
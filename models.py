@@ -0,0 +1,59 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import UserMixin
+from datetime import datetime
+from money import Hundredths
+
+db = SQLAlchemy()
+
+# Database Models
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    password_hash = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    role = db.Column(db.String(20), nullable=False, default='technician')
+
+class Customer(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    phone = db.Column(db.String(20))
+    phone_key = db.Column(db.String(20), index=True)  # Normalized phone, set by intake.py
+    email = db.Column(db.String(120))
+    address = db.Column(db.String(200))
+    devices = db.relationship('Device', backref='customer', lazy=True)
+
+class Device(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
+    brand = db.Column(db.String(50), nullable=False, index=True)
+    model = db.Column(db.String(50), nullable=False, index=True)
+    serial_number = db.Column(db.String(50))
+    serial_key = db.Column(db.String(50), index=True)  # Normalized serial number, set by intake.py
+    issue = db.Column(db.Text)
+    tickets = db.relationship('Ticket', backref='device', lazy=True)
+
+class Ticket(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('device.id'), nullable=False, index=True)
+    technician_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='Received', index=True)
+    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    completed_date = db.Column(db.DateTime, index=True)  # Set when the status becomes Completed
+    services = db.relationship('Service', backref='ticket', lazy=True)
+    invoice = db.relationship('Invoice', backref='ticket', uselist=False)
+    technician = db.relationship('User', backref='tickets')
+
+class Service(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    description = db.Column(db.Text, nullable=False, index=True)
+    cost = db.Column(Hundredths, nullable=False, index=True)  # Stored in paise
+
+class Invoice(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    total_amount = db.Column(Hundredths, nullable=False, index=True)  # Stored in paise
+    paid_status = db.Column(db.String(20), nullable=False, default='Unpaid', index=True)
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    tax_rate = db.Column(Hundredths, default=0)  # Percent, stored in hundredths
+    discount = db.Column(Hundredths, default=0)  # Stored in paise
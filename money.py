@@ -0,0 +1,56 @@
+"""Exact money arithmetic.
+
+Amounts used to be ``Float`` columns summed in Python, so totals drifted by
+fractions of a paisa and had to be rounded for display. Money columns
+(service cost, invoice total and discount) now store whole paise in an
+INTEGER column, and the tax rate stores hundredths of a percent the same
+way. The ``Hundredths`` column type converts at the boundary, so Python
+code reads and writes ``Decimal`` values with two places (``1500.50``)
+while the database adds integers. ``SUM()`` over such a column is exact
+and comes back as a ``Decimal`` too.
+
+Everything that derives an amount (tax, invoice total) rounds half up to
+the paisa in one place, ``invoice_total``, so the stored total, the
+invoice pages and the PDF always agree.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy.types import Integer, TypeDecorator
+
+PAISA = Decimal('0.01')
+
+
+def to_decimal(value):
+    """``value`` (str, int, float or Decimal) rounded half up to two places"""
+    if not isinstance(value, Decimal):
+        # str() first so 0.1 becomes Decimal('0.1'), not its binary expansion
+        value = Decimal(str(value).strip())
+    return value.quantize(PAISA, rounding=ROUND_HALF_UP)
+
+
+class Hundredths(TypeDecorator):
+    """A two-place ``Decimal`` stored as an integer count of hundredths"""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(to_decimal(value) * 100)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
+
+    @property
+    def python_type(self):
+        return Decimal
+
+
+def invoice_total(subtotal, tax_rate, discount):
+    """Return (tax, total) for an invoice; tax is ``tax_rate`` percent of the subtotal"""
+    subtotal = to_decimal(subtotal or 0)
+    tax = to_decimal(subtotal * to_decimal(tax_rate or 0) / 100)
+    return tax, subtotal + tax - to_decimal(discount or 0)
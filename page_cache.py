@@ -0,0 +1,293 @@
+"""Cache of rendered list pages and query results, invalidated on commit.
+
+Every cached entry names the tables it was built from. Each table has a
+version number, and the versions of an entry's tables are part of its key.
+The session hooks below collect the tables written in a transaction (rows
+flushed through the unit of work, and bulk ``insert()``, ``update()`` and
+``delete()`` statements run through the session, ORM or Core) and bump their versions in ``after_commit``, so a
+new service line invalidates the services and invoices pages but leaves the
+customers and devices pages cached. Versions are read before the page is
+built: a commit that lands while a page is rendering bumps the version, and
+the possibly stale render is stored under a key nobody asks for again.
+
+Two backends are available through ``PAGE_CACHE_BACKEND``:
+
+* ``memory``: a least-recently-used dict in this process, bounded by
+  ``PAGE_CACHE_MAX_ENTRIES``. Other processes (a second worker, ``flask``
+  commands) cannot invalidate it, so their writes show up only when an
+  entry's ``PAGE_CACHE_TTL`` runs out.
+* ``redis``: entries and versions in a Redis-compatible server at
+  ``PAGE_CACHE_REDIS_URL``, shared by every worker. Needs ``pip install
+  redis``. If the server is unreachable, pages are rendered uncached.
+
+``none`` disables caching. Hits and misses are counted per cached view or
+query and reported by ``stats()`` and, for /metrics, ``metrics_text()``.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import wraps
+
+from flask import request, session as flask_session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _table_names(models):
+    return tuple(sorted(model.__table__.name for model in models))
+
+
+class MemoryBackend:
+    """Least recently used entries in this process, each with a time to live"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def versions(self, tables):
+        with self._lock:
+            return [self._versions.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def size(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Entries in a Redis-compatible server, shared by every worker process"""
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='repair-center:cache:'):
+        import redis  # Optional dependency, only needed for this backend
+        self.errors = redis.RedisError
+        self.evictions = None  # Redis evicts by its own maxmemory policy
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def versions(self, tables):
+        values = self._client.mget([f'{self.prefix}version:{table}' for table in tables])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tables):
+        pipe = self._client.pipeline()
+        for table in tables:
+            pipe.incr(f'{self.prefix}version:{table}')
+        pipe.execute()
+
+    def size(self):
+        return None
+
+    def clear(self):
+        for key in self._client.scan_iter(f'{self.prefix}*'):
+            if not key.startswith(f'{self.prefix}version:'.encode()):
+                self._client.delete(key)
+
+
+class PageCache:
+    """Versioned cache of rendered pages and query results"""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = None
+        self.hits = Counter()
+        self.misses = Counter()
+        self.invalidations = Counter()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PAGE_CACHE_BACKEND', 'memory')
+        app.config.setdefault('PAGE_CACHE_TTL', 300)
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 1000)
+        app.config.setdefault('PAGE_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+        kind = app.config['PAGE_CACHE_BACKEND']
+        if kind == 'memory':
+            self.backend = MemoryBackend(app.config['PAGE_CACHE_MAX_ENTRIES'])
+        elif kind == 'redis':
+            self.backend = RedisBackend(app.config['PAGE_CACHE_REDIS_URL'])
+        elif kind == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown PAGE_CACHE_BACKEND {kind!r}; use 'memory', 'redis' or 'none'")
+        self.ttl = app.config['PAGE_CACHE_TTL']
+
+    def _call(self, method, *args):
+        """Run a backend call; a Redis outage means a miss, not an error page"""
+        try:
+            return getattr(self.backend, method)(*args)
+        except getattr(self.backend, 'errors', ()) as exc:
+            logger.warning('Page cache %s failed: %s', method, exc)
+            return None
+
+    def _count(self, counter, name):
+        with self._lock:
+            counter[name] += 1
+
+    def _lookup(self, name, tables, key):
+        versions = self._call('versions', tables)
+        if versions is None:
+            return None, None
+        full_key = f"{name}:{key}:{'.'.join(map(str, versions))}"
+        value = self._call('get', full_key)
+        self._count(self.misses if value is None else self.hits, name)
+        return full_key, value
+
+    def get_or_set(self, name, models, compute, key=''):
+        """``compute()``, cached until a row of one of ``models`` changes (JSON-serializable results)"""
+        if self.backend is None:
+            return compute()
+        full_key, value = self._lookup(name, _table_names(models), key)
+        if value is None:
+            value = compute()
+            if full_key is not None:
+                self._call('set', full_key, value, self.ttl)
+        return value
+
+    def cached_view(self, *models):
+        """Cache a view's HTML per URL and user role until a row of one of ``models`` changes"""
+        tables = _table_names(models)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pending flash messages are rendered into the page, so those renders are never shared
+                if self.backend is None or flask_session.get('_flashes'):
+                    return view(*args, **kwargs)
+                role = getattr(current_user, 'role', None)
+                full_key, html = self._lookup(view.__name__, tables, f'{role}:{request.full_path}')
+                if html is not None:
+                    return html
+                result = view(*args, **kwargs)
+                if full_key is not None and isinstance(result, str):
+                    self._call('set', full_key, result, self.ttl)
+                return result
+            return wrapper
+        return decorator
+
+    def invalidate(self, tables):
+        """Drop every entry built from one of ``tables`` (table names)"""
+        if self.backend is None or not tables:
+            return
+        tables = sorted(tables)
+        self._call('bump', tables)
+        with self._lock:
+            self.invalidations.update(tables)
+
+    def stats(self):
+        """Hit and miss counts per cached view or query, and backend figures"""
+        with self._lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            lookups = {name: {'hits': self.hits[name], 'misses': self.misses[name]} for name in names}
+            invalidations = dict(self.invalidations)
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            'backend': self.backend.name if self.backend else 'none',
+            'entries': self.backend.size() if self.backend else 0,
+            'evictions': self.backend.evictions if self.backend else 0,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+            'lookups': lookups,
+            'invalidations': invalidations,
+        }
+
+    def metrics_text(self):
+        """Hit, miss and invalidation counters in Prometheus text format"""
+        stats = self.stats()
+        lines = []
+        for kind, key, description in (
+            ('repair_center_page_cache_hits_total', 'hits', 'Page cache hits'),
+            ('repair_center_page_cache_misses_total', 'misses', 'Page cache misses'),
+        ):
+            lines += [f'# HELP {kind} {description}', f'# TYPE {kind} counter']
+            for name, counts in stats['lookups'].items():
+                lines.append(f'{kind}{{name="{name}"}} {counts[key]}')
+        lines += ['# HELP repair_center_page_cache_invalidations_total Table version bumps',
+                  '# TYPE repair_center_page_cache_invalidations_total counter']
+        for table, count in sorted(stats['invalidations'].items()):
+            lines.append(f'repair_center_page_cache_invalidations_total{{table="{table}"}} {count}')
+        if stats['entries'] is not None:
+            lines += ['# HELP repair_center_page_cache_entries Entries held by the memory backend',
+                      '# TYPE repair_center_page_cache_entries gauge',
+                      f"repair_center_page_cache_entries {stats['entries']}"]
+        return '\n'.join(lines) + '\n'
+
+
+page_cache = PageCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tables = session.info.setdefault('page_cache_tables', set())
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in changed:
+        tables.add(inspect(obj).mapper.local_table.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_write_tables(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    # Core statements on a Table (no mapper) name their table directly
+    table = mapper.local_table if mapper is not None else getattr(orm_execute_state.statement, 'table', None)
+    if table is not None:
+        orm_execute_state.session.info.setdefault('page_cache_tables', set()).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_tables(session):
+    page_cache.invalidate(session.info.pop('page_cache_tables', None))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_tables(session):
+    session.info.pop('page_cache_tables', None)
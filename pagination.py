@@ -0,0 +1,131 @@
+"""Keyset (seek) pagination and sorting for the list pages.
+
+Instead of OFFSET, every page is fetched with a WHERE clause that starts
+right after the last row of the previous page, so page 500 costs the same
+as page 1 as long as the sort column is indexed. Rows are always ordered
+by the chosen sort column and then by primary key, which makes the order
+total and the cursors stable while rows are inserted or deleted.
+
+Cursors are opaque to the browser: a URL-safe base64 encoding of the sort
+key, direction and the (value, id) pair of the boundary row.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from flask import abort, current_app, request
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class Page:
+    """One page of rows plus the cursors needed to move around"""
+
+    def __init__(self, items, sort, direction, per_page, next_cursor, prev_cursor):
+        self.items = items
+        self.sort = sort
+        self.direction = direction
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(sort, direction, value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    payload = json.dumps([sort, direction, value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, direction, column):
+    """Return the (value, id) pair stored in a cursor, or abort with 400"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, cursor_direction, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if (cursor_sort, cursor_direction) != (sort, direction):
+            raise ValueError('cursor belongs to a different ordering')
+        if value is not None and column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and column.type.python_type is Decimal:
+            value = Decimal(value)
+        return value, int(row_id)
+    except (ValueError, TypeError, NotImplementedError, ArithmeticError):
+        abort(400, 'Invalid page cursor')
+
+
+def _seek(column, id_column, value, row_id, forward):
+    """Rows strictly after (value, row_id) in the given direction"""
+    if forward:
+        return or_(column > value, and_(column == value, id_column > row_id))
+    return or_(column < value, and_(column == value, id_column < row_id))
+
+
+def _page_size():
+    default = current_app.config.get('PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, current_app.config.get('MAX_PAGE_SIZE', MAX_PAGE_SIZE)))
+
+
+def paginate(query, id_column, sort_columns, default_sort='id', default_direction='asc'):
+    """Return a Page for ``query`` driven by the current request's arguments.
+
+    ``sort_columns`` maps the ``sort`` query argument to a model column and
+    acts as a whitelist; every column in it should be indexed. ``after`` and
+    ``before`` carry the cursors produced by a previous page.
+    """
+    sort = request.args.get('sort', default_sort)
+    if sort not in sort_columns:
+        sort = default_sort
+    direction = request.args.get('dir', default_direction)
+    if direction not in ('asc', 'desc'):
+        direction = default_direction
+    column = sort_columns[sort]
+    per_page = _page_size()
+
+    after = request.args.get('after')
+    before = request.args.get('before')
+    ascending = direction == 'asc'
+
+    # Walking backwards is a forward walk in the opposite order whose
+    # results are flipped back afterwards
+    backwards = before is not None and after is None
+    forward = ascending != backwards
+    if after is not None:
+        query = query.filter(_seek(column, id_column, *decode_cursor(after, sort, direction, column), forward))
+    elif backwards:
+        query = query.filter(_seek(column, id_column, *decode_cursor(before, sort, direction, column), forward))
+
+    if forward:
+        query = query.order_by(column.asc(), id_column.asc())
+    else:
+        query = query.order_by(column.desc(), id_column.desc())
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(row):
+        return encode_cursor(sort, direction, getattr(row, column.key), getattr(row, id_column.key))
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = cursor_for(rows[-1])
+        if after is not None or (backwards and has_more):
+            prev_cursor = cursor_for(rows[0])
+    return Page(rows, sort, direction, per_page, next_cursor, prev_cursor)
@@ -0,0 +1,83 @@
+"""Content-addressed cache of rendered invoice PDFs.
+
+A cached PDF is named after the SHA-256 of everything the renderer reads:
+the invoice snapshot from ``invoice_pdf_data`` (invoice, customer, device
+and services) plus ``LAYOUT_VERSION``. Editing an invoice, a service line,
+the customer or the device therefore changes the key, and the next
+download renders a fresh PDF. Unchanged invoices are served straight from
+disk, and the key doubles as the HTTP ETag.
+
+The cache is bounded by ``PDF_CACHE_MAX_BYTES``. Every hit bumps the file's
+mtime, and eviction removes the least recently used files first.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from invoice_pdf import LAYOUT_VERSION
+
+
+class PdfCache:
+    """Directory of rendered PDFs keyed by a hash of their inputs"""
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.max_bytes = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PDF_CACHE_DIR', os.path.join('invoices', 'cache'))
+        app.config.setdefault('PDF_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+        self.directory = app.config['PDF_CACHE_DIR']
+        self.max_bytes = app.config['PDF_CACHE_MAX_BYTES']
+
+    @staticmethod
+    def key_for(data):
+        """Hash an invoice snapshot into its cache key"""
+        payload = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(f"{LAYOUT_VERSION}:{payload}".encode()).hexdigest()
+
+    def path_for(self, key):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def lookup(self, key):
+        """Return the cached file for ``key`` and mark it recently used, or None"""
+        pdf_file = self.path_for(key)
+        try:
+            os.utime(pdf_file, None)
+        except FileNotFoundError:
+            return None
+        return pdf_file
+
+    def evict(self):
+        """Delete least recently used PDFs until the cache fits in max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.pdf'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            return removed
+
+
+pdf_cache = PdfCache()
@@ -0,0 +1,125 @@
+"""Bulk export of invoice PDFs into a single ZIP archive.
+
+Invoices are read in id-ordered batches and rendered in parallel on a
+process pool. Each worker writes its PDF to a scratch directory and the
+parent moves finished files into the archive in invoice order, deleting
+them as it goes. At most ``window`` renders are in flight at once, so
+memory and scratch disk use stay flat however many invoices are exported.
+Invoices whose PDF is already in the cache are hard-linked (or copied) from
+there into the scratch directory instead of being rendered again, so a
+cache eviction during the export cannot pull the file away.
+"""
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from models import Invoice
+from queries import invoice_query
+from invoice_pdf import invoice_pdf_data, render_invoice_pdf
+
+BATCH_SIZE = 200
+
+
+def parse_invoice_ids(text):
+    """Turn '1, 2,5' into [1, 2, 5]; raises ValueError on junk"""
+    return [int(part) for part in text.replace(',', ' ').split()]
+
+
+def invoice_export_query(start=None, end=None, invoice_ids=None):
+    """Invoices dated between ``start`` and ``end`` (inclusive dates) and/or in ``invoice_ids``"""
+    query = invoice_query()
+    if start is not None:
+        query = query.filter(Invoice.date >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        query = query.filter(Invoice.date < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if invoice_ids:
+        query = query.filter(Invoice.id.in_(invoice_ids))
+    return query.order_by(Invoice.id)
+
+
+def _in_batches(query):
+    """Yield the invoices of an id-ordered query BATCH_SIZE rows per SELECT"""
+    # Seeking on id instead of yield_per keeps the eager loads working
+    last_id = 0
+    while True:
+        batch = query.filter(Invoice.id > last_id).limit(BATCH_SIZE).all()
+        if not batch:
+            return
+        yield from batch
+        last_id = batch[-1].id
+
+
+def _claim_cached(cache, data, pdf_file):
+    """Link the cached PDF for ``data`` to ``pdf_file``; False when there is none"""
+    cached_file = cache.lookup(cache.key_for(data))
+    if cached_file is None:
+        return False
+    try:
+        os.link(cached_file, pdf_file)
+    except FileNotFoundError:
+        # Evicted since the lookup
+        return False
+    except OSError:
+        # Cache and scratch directory on different filesystems
+        try:
+            shutil.copyfile(cached_file, pdf_file)
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def export_invoices_zip(query, out_path, workers=None, window=None, cache=None):
+    """Render every invoice matched by an id-ordered ``query`` into a ZIP at ``out_path``.
+
+    ``workers`` defaults to the number of CPUs; 0 renders in this process.
+    When a ``PdfCache`` is given, cached PDFs are used as they are.
+    Returns the number of invoices written. The archive only appears at
+    ``out_path`` once every render has succeeded.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if window is None:
+        window = max(workers, 1) * 4
+
+    tmp_zip = f"{out_path}.tmp"
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    count = 0
+    try:
+        with tempfile.TemporaryDirectory() as scratch_dir, \
+                zipfile.ZipFile(tmp_zip, 'w', zipfile.ZIP_DEFLATED) as archive:
+            pending = deque()
+
+            def drain(limit):
+                nonlocal count
+                while len(pending) > limit:
+                    arcname, pdf_file, future = pending.popleft()
+                    if future is not None:
+                        future.result()
+                    archive.write(pdf_file, arcname)
+                    os.remove(pdf_file)
+                    count += 1
+
+            for invoice in _in_batches(query):
+                data = invoice_pdf_data(invoice)
+                arcname = f"invoice_{invoice.id}.pdf"
+                pdf_file = os.path.join(scratch_dir, arcname)
+                if cache is not None and _claim_cached(cache, data, pdf_file):
+                    pending.append((arcname, pdf_file, None))
+                elif executor is None:
+                    render_invoice_pdf(data, pdf_file)
+                    pending.append((arcname, pdf_file, None))
+                else:
+                    pending.append((arcname, pdf_file, executor.submit(render_invoice_pdf, data, pdf_file)))
+                drain(window)
+            drain(0)
+        os.replace(tmp_zip, out_path)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if os.path.exists(tmp_zip):
+            os.remove(tmp_zip)
+    return count
@@ -0,0 +1,170 @@
+"""Background rendering of invoice PDFs.
+
+Creating an invoice used to build its PDF inside the request, so ReportLab
+held the worker for the whole layout. Now the request only records a
+``PdfJob`` row and hands a snapshot of the invoice to a process pool; the
+job row tracks the render through ``queued`` -> ``rendering`` -> ``done``
+(or ``failed`` once every retry is used up).
+
+Renders land in the content-addressed ``pdf_cache`` and the job records
+the cache key it rendered. Jobs that were still pending when the app
+stopped are picked up again by ``PdfJobQueue.resume_pending``. Setting
+``PDF_WORKERS`` to 0 renders inline, which is what the CLI and the test
+client want.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from models import db
+from queries import invoice_query
+from invoice_pdf import invoice_pdf_data, render_invoice_pdf
+from pdf_cache import pdf_cache
+
+JOB_QUEUED = 'queued'
+JOB_RENDERING = 'rendering'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class PdfJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    invoice_id = db.Column(db.Integer, db.ForeignKey('invoice.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default=JOB_QUEUED, index=True)
+    content_key = db.Column(db.String(64))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+def latest_job(invoice_id):
+    return PdfJob.query.filter_by(invoice_id=invoice_id).order_by(PdfJob.id.desc()).first()
+
+
+class PdfJobQueue:
+    """Process-pool backed queue of invoice PDF renders"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PDF_WORKERS', 2)
+        app.config.setdefault('PDF_MAX_ATTEMPTS', 3)
+        app.config.setdefault('PDF_RETRY_DELAY', 2)
+        self.app = app
+
+    @property
+    def executor(self):
+        # Created on first use so importing the app never forks workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.app.config['PDF_WORKERS'])
+            return self._executor
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+    def enqueue(self, invoice_id):
+        """Record a render job for an invoice and start it; returns the job id"""
+        job = PdfJob(invoice_id=invoice_id, status=JOB_QUEUED)
+        db.session.add(job)
+        db.session.commit()
+        self._start(job.id)
+        return job.id
+
+    def resume_pending(self):
+        """Restart jobs left queued or rendering by a previous process"""
+        pending = PdfJob.query.filter(PdfJob.status.in_([JOB_QUEUED, JOB_RENDERING])).all()
+        for job in pending:
+            job.status = JOB_QUEUED
+        db.session.commit()
+        for job in pending:
+            self._start(job.id)
+        return len(pending)
+
+    def _start(self, job_id):
+        job = db.session.get(PdfJob, job_id)
+        if job is None:
+            # The invoice, and its jobs with it, was deleted before a retry
+            return
+        invoice = invoice_query().filter_by(id=job.invoice_id).first()
+        if invoice is None:
+            self._finish(job_id, JOB_FAILED, 'Invoice no longer exists')
+            return
+
+        data = invoice_pdf_data(invoice)
+        job.content_key = pdf_cache.key_for(data)
+        pdf_file = pdf_cache.lookup(job.content_key)
+        if pdf_file is not None:
+            # Already rendered from identical inputs
+            self._finish(job_id, JOB_DONE)
+            return
+
+        pdf_file = pdf_cache.path_for(job.content_key)
+        job.status = JOB_RENDERING
+        job.attempts += 1
+        db.session.commit()
+
+        if not self.app.config['PDF_WORKERS']:
+            try:
+                render_invoice_pdf(data, pdf_file)
+            except Exception as e:
+                self._failed(job_id, e)
+            else:
+                self._finish(job_id, JOB_DONE)
+            return
+
+        future = self.executor.submit(render_invoice_pdf, data, pdf_file)
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+
+    def _on_done(self, job_id, future):
+        # Runs on the executor's management thread, outside any request
+        with self.app.app_context():
+            error = future.exception()
+            if error is None:
+                self._finish(job_id, JOB_DONE)
+            else:
+                self._failed(job_id, error)
+
+    def _failed(self, job_id, error):
+        job = db.session.get(PdfJob, job_id)
+        if job is None:
+            # The invoice was deleted while it rendered
+            return
+        if job.attempts >= self.app.config['PDF_MAX_ATTEMPTS']:
+            self._finish(job_id, JOB_FAILED, str(error))
+            return
+        job.status = JOB_QUEUED
+        job.error = str(error)
+        db.session.commit()
+        if not self.app.config['PDF_WORKERS']:
+            self._start(job_id)
+            return
+        delay = self.app.config['PDF_RETRY_DELAY'] * 2 ** (job.attempts - 1)
+        timer = threading.Timer(delay, self._retry, args=(job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _retry(self, job_id):
+        with self.app.app_context():
+            self._start(job_id)
+
+    def _finish(self, job_id, status, error=None):
+        job = db.session.get(PdfJob, job_id)
+        if job is not None:
+            job.status = status
+            job.error = error
+            db.session.commit()
+        if status == JOB_DONE:
+            pdf_cache.evict()
+
+
+pdf_queue = PdfJobQueue()
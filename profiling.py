@@ -0,0 +1,191 @@
+"""Per-request timing, SQL instrumentation and sampled profiling.
+
+With ``PROFILING_ENABLED`` on, every request records:
+
+* its wall time,
+* how many SQL statements it ran and how long they took (SQLAlchemy
+  ``before_cursor_execute`` / ``after_cursor_execute`` events), and
+* the time spent rendering templates (Flask's template signals).
+
+Each response carries them in a ``Server-Timing`` header, which browser
+dev tools show next to the request. They are also added to per-endpoint
+totals and a latency histogram that ``metrics_text()`` renders in the
+Prometheus text format for the ``/metrics`` endpoint.
+
+``PROFILE_SAMPLE_RATE`` runs cProfile on that fraction of requests; a
+sampled request slower than ``PROFILE_SLOW_MS`` has its profile written to
+``PROFILE_DIR`` (open it with ``python -m pstats`` or snakeviz). Only the
+newest ``PROFILE_MAX_DUMPS`` files are kept.
+"""
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _current():
+    """The profile of the request being handled, if it is being profiled"""
+    return g.get('request_profile') if has_app_context() else None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        context._profiling_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    profile = _current()
+    started = getattr(context, '_profiling_start', None)
+    if profile is not None and started is not None:
+        profile['sql_count'] += 1
+        profile['sql_time'] += time.perf_counter() - started
+
+
+def _start_render(sender, template, context, **extra):
+    profile = _current()
+    if profile is not None:
+        profile['render_started'].append(time.perf_counter())
+
+
+def _end_render(sender, template, context, **extra):
+    profile = _current()
+    if profile is not None and profile['render_started']:
+        elapsed = time.perf_counter() - profile['render_started'].pop()
+        # Only the outermost render counts; nested ones are part of it
+        if not profile['render_started']:
+            profile['render_time'] += elapsed
+
+
+class RequestProfiler:
+    """Flask extension timing requests, their SQL and their templates"""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)  # (endpoint, method, status) -> count
+        self._totals = defaultdict(lambda: {'sql_statements': 0, 'sql_seconds': 0.0, 'render_seconds': 0.0})
+        self._latency = defaultdict(lambda: {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0})
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILING_ENABLED', True)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_SLOW_MS', 500)
+        app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        app.config.setdefault('PROFILE_MAX_DUMPS', 100)
+        self.enabled = app.config['PROFILING_ENABLED']
+        if not self.enabled:
+            return
+        self.sample_rate = app.config['PROFILE_SAMPLE_RATE']
+        self.slow_seconds = app.config['PROFILE_SLOW_MS'] / 1000
+        self.profile_dir = app.config['PROFILE_DIR']
+        self.max_dumps = app.config['PROFILE_MAX_DUMPS']
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(_start_render, app)
+        template_rendered.connect(_end_render, app)
+
+    def _before_request(self):
+        g.request_profile = {'started': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                             'render_time': 0.0, 'render_started': [], 'cprofile': None}
+        if self.sample_rate and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return  # Another profiler is already running in this process
+            g.request_profile['cprofile'] = profiler
+
+    def _after_request(self, response):
+        profile = g.pop('request_profile', None)
+        if profile is None:
+            return response
+        elapsed = time.perf_counter() - profile['started']
+        if profile['cprofile'] is not None:
+            profile['cprofile'].disable()
+            if elapsed >= self.slow_seconds:
+                self._dump(profile['cprofile'], elapsed)
+        response.headers.add('Server-Timing', ', '.join([
+            f"app;dur={elapsed * 1000:.1f}",
+            f"db;dur={profile['sql_time'] * 1000:.1f};desc=\"{profile['sql_count']} queries\"",
+            f"render;dur={profile['render_time'] * 1000:.1f}",
+        ]))
+        self._record(request.endpoint or 'unmatched', request.method, response.status_code, elapsed, profile)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request is skipped when a response could not be built at all
+        profile = g.pop('request_profile', None)
+        if profile is not None and profile['cprofile'] is not None:
+            profile['cprofile'].disable()
+
+    def _record(self, endpoint, method, status, elapsed, profile):
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            totals = self._totals[endpoint]
+            totals['sql_statements'] += profile['sql_count']
+            totals['sql_seconds'] += profile['sql_time']
+            totals['render_seconds'] += profile['render_time']
+            latency = self._latency[endpoint]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    latency['buckets'][index] += 1
+            latency['sum'] += elapsed
+            latency['count'] += 1
+
+    def _dump(self, profiler, elapsed):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{elapsed * 1000:.0f}ms.prof"
+        profiler.dump_stats(os.path.join(self.profile_dir, name))
+        dumps = sorted(entry.path for entry in os.scandir(self.profile_dir) if entry.name.endswith('.prof'))
+        for path in dumps[:-self.max_dumps]:
+            os.remove(path)
+
+    def metrics_text(self):
+        """Request counts, latency histograms and SQL / render totals in Prometheus text format"""
+        with self._lock:
+            requests = dict(self._requests)
+            totals = {endpoint: dict(values) for endpoint, values in self._totals.items()}
+            latency = {endpoint: {'buckets': list(values['buckets']), 'sum': values['sum'], 'count': values['count']}
+                       for endpoint, values in self._latency.items()}
+        lines = [
+            '# HELP repair_center_requests_total Requests handled',
+            '# TYPE repair_center_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(f'repair_center_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+        lines += [
+            '# HELP repair_center_request_duration_seconds Request wall time',
+            '# TYPE repair_center_request_duration_seconds histogram',
+        ]
+        for endpoint, values in sorted(latency.items()):
+            for bound, count in zip(LATENCY_BUCKETS, values['buckets']):
+                lines.append(f'repair_center_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(f'repair_center_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {values["count"]}')
+            lines.append(f'repair_center_request_duration_seconds_sum{{endpoint="{endpoint}"}} {values["sum"]:.6f}')
+            lines.append(f'repair_center_request_duration_seconds_count{{endpoint="{endpoint}"}} {values["count"]}')
+        for key, kind, description in (
+            ('sql_statements', 'repair_center_sql_statements_total', 'SQL statements executed by requests'),
+            ('sql_seconds', 'repair_center_sql_seconds_total', 'Time requests spent in SQL'),
+            ('render_seconds', 'repair_center_template_render_seconds_total', 'Time requests spent rendering templates'),
+        ):
+            lines += [f'# HELP {kind} {description}', f'# TYPE {kind} counter']
+            for endpoint, values in sorted(totals.items()):
+                lines.append(f'{kind}{{endpoint="{endpoint}"}} {values[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,62 @@
+"""Eager-loading queries for the list pages.
+
+The templates walk ``invoice.ticket.device.customer``, ``ticket.services``
+and friends for every row. Loading those relationships lazily costs one
+SELECT per row per hop, so each helper here returns a query with the
+relationships its page needs already attached. Many-to-one hops are joined
+into the main SELECT and collections are fetched with one extra
+``SELECT ... WHERE id IN (...)``, which keeps the query count per page
+fixed no matter how many rows are rendered.
+
+Service totals are added up by the database (``SUM(cost)``) instead of
+loading every ``Service`` row to sum it in Python.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import db, Device, Ticket, Service, Invoice
+
+
+def device_query():
+    """Devices with their customer"""
+    return Device.query.options(joinedload(Device.customer))
+
+
+def ticket_query():
+    """Tickets with device, customer, technician, services and invoice"""
+    return Ticket.query.options(
+        joinedload(Ticket.device).joinedload(Device.customer),
+        joinedload(Ticket.technician),
+        joinedload(Ticket.invoice),
+        selectinload(Ticket.services),
+    )
+
+
+def service_query():
+    """Services with their ticket, device and customer"""
+    return Service.query.options(
+        joinedload(Service.ticket).joinedload(Ticket.device).joinedload(Device.customer),
+    )
+
+
+def invoice_query():
+    """Invoices with ticket, device, customer and services"""
+    return Invoice.query.options(
+        joinedload(Invoice.ticket).joinedload(Ticket.device).joinedload(Device.customer),
+        joinedload(Invoice.ticket).selectinload(Ticket.services),
+    )
+
+
+def service_total(ticket_id):
+    """Sum of a ticket's service costs"""
+    return db.session.scalar(
+        select(func.coalesce(func.sum(Service.cost), 0)).where(Service.ticket_id == ticket_id))
+
+
+def service_totals(ticket_ids):
+    """Map each of ``ticket_ids`` that has services to the sum of their costs"""
+    rows = db.session.execute(
+        select(Service.ticket_id, func.sum(Service.cost))
+        .where(Service.ticket_id.in_(ticket_ids))
+        .group_by(Service.ticket_id))
+    return dict(rows.all())
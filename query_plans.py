@@ -0,0 +1,69 @@
+"""EXPLAIN QUERY PLAN checks for the hot queries.
+
+Each entry of ``HOT_QUERIES`` is a filter or join the app runs constantly.
+``flask check-query-plans`` asks the database how it would run each of them
+and exits non-zero if any plan reads a whole table where an index lookup
+was expected: a ``SCAN`` step on SQLite, a ``Seq Scan`` on PostgreSQL. A
+dropped or missing index then shows up before it shows up in response
+times.
+
+PostgreSQL happily scans small tables even when an index exists, so its
+plans are taken with sequential scans switched off for the transaction;
+a ``Seq Scan`` that remains means there is no usable index.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+
+from models import db, Customer, Device, Ticket, Service, Invoice
+from pdf_jobs import PdfJob, JOB_QUEUED, JOB_RENDERING
+
+
+def _customer_ticket_ids():
+    devices = select(Device.id).where(Device.customer_id == 1)
+    return select(Ticket.id).where(Ticket.device_id.in_(devices))
+
+
+HOT_QUERIES = {
+    'devices of a customer': lambda: select(Device).where(Device.customer_id == 1),
+    'tickets of a device': lambda: select(Ticket).where(Ticket.device_id == 1),
+    'tickets of a technician': lambda: select(Ticket).where(Ticket.technician_id == 1),
+    'tickets by status': lambda: select(Ticket).where(Ticket.status == 'Completed'),
+    'services of a ticket': lambda: select(Service).where(Service.ticket_id == 1),
+    'invoice of a ticket': lambda: select(Invoice).where(Invoice.ticket_id == 1),
+    'invoices by paid status': lambda: select(Invoice).where(Invoice.paid_status == 'Unpaid'),
+    'invoices in a date range': lambda: select(Invoice).where(
+        Invoice.date >= datetime(2024, 1, 1), Invoice.date < datetime(2024, 2, 1)),
+    'tickets completed in a date range': lambda: select(Ticket).where(
+        Ticket.completed_date >= datetime(2024, 1, 1), Ticket.completed_date < datetime(2024, 1, 2)),
+    'invoice with ticket, device and customer': lambda: (
+        select(Invoice, Ticket, Device, Customer)
+        .join(Ticket, Invoice.ticket_id == Ticket.id)
+        .join(Device, Ticket.device_id == Device.id)
+        .join(Customer, Device.customer_id == Customer.id)
+        .where(Invoice.id == 1)),
+    'services of a customer (cascade delete)': lambda: select(Service).where(
+        Service.ticket_id.in_(_customer_ticket_ids())),
+    'invoices of a customer (cascade delete)': lambda: select(Invoice).where(
+        Invoice.ticket_id.in_(_customer_ticket_ids())),
+    'customer by phone key': lambda: select(Customer).where(Customer.phone_key == '9845012345'),
+    'device by serial key': lambda: select(Device).where(Device.serial_key == 'sn7a3b'),
+    'PDF jobs of an invoice': lambda: select(PdfJob).where(PdfJob.invoice_id == 1),
+    'pending PDF jobs': lambda: select(PdfJob).where(PdfJob.status.in_([JOB_QUEUED, JOB_RENDERING])),
+}
+
+
+def explain(stmt):
+    """The query plan for ``stmt`` as a list of step descriptions"""
+    connection = db.session.connection()
+    sql = stmt.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return [row[0].strip() for row in connection.exec_driver_sql(f"EXPLAIN {sql}")]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    return [row[-1] for row in rows]
+
+
+def scans(plan):
+    """True if the plan reads a whole table"""
+    return any(step.startswith('SCAN ') or 'Seq Scan' in step for step in plan)
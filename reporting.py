@@ -0,0 +1,278 @@
+"""Revenue and operations reports served from daily rollups.
+
+Reports over the raw invoice and ticket tables would scan every row ever
+written. Instead two rollup tables keep one row per day:
+
+* ``daily_invoice_stat``: invoices raised that day, their revenue and the
+  part of it still unpaid (keyed by invoice date);
+* ``daily_ticket_stat``: per technician, tickets opened that day (by
+  ``created_date``), tickets completed that day (by ``completed_date``)
+  and the summed turnaround of those completions.
+
+The rollups are kept current the same way as the dashboard counters in
+stats.py. ``after_flush`` collects the days touched by every inserted,
+updated or deleted invoice and ticket (old and new dates) and recomputes
+just those days from the source tables inside the same transaction; each
+recompute is an indexed range scan over one day. Bulk ``update()`` and
+``delete()`` statements bypass the unit of work, so whoever issues them
+does the same by hand: the cascading deletes in deletes.py look up the
+days of the rows they are about to delete with ``days_where`` and pass
+them to ``refresh_days`` afterwards. ``rebuild_reports`` (``flask
+rebuild-reports``) recomputes every day, to repair the rollups.
+
+The report functions read rollup rows only, so a year of history is a few
+hundred rows per report however many invoices and tickets it covers.
+``Ticket.completed_date`` is stamped here whenever a ticket's status
+becomes ``Completed``.
+"""
+from collections import OrderedDict
+from datetime import date, datetime, time as day_start, timedelta
+
+from sqlalchemy import and_, case, delete, event, func, inspect, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import db, User, Ticket, Invoice
+from money import Hundredths
+
+PERIODS = ('day', 'week', 'month')
+REFRESH_CHUNK_DAYS = 200
+AGING_BUCKETS = [(30, '0-30 days'), (60, '31-60 days'), (90, '61-90 days'), (None, 'Over 90 days')]
+
+
+class DailyInvoiceStat(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    invoices = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(Hundredths, nullable=False, default=0)
+    unpaid_invoices = db.Column(db.Integer, nullable=False, default=0)
+    unpaid_amount = db.Column(Hundredths, nullable=False, default=0)
+
+
+class DailyTicketStat(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    technician_id = db.Column(db.Integer, primary_key=True)
+    opened = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    turnaround_seconds = db.Column(db.Float, nullable=False, default=0)
+
+
+@event.listens_for(Ticket.status, 'set', active_history=True)
+def _stamp_completion(ticket, value, oldvalue, initiator):
+    if value == 'Completed' and oldvalue != 'Completed':
+        ticket.completed_date = datetime.utcnow()
+    elif value != 'Completed':
+        ticket.completed_date = None
+
+
+def _day(value):
+    if value is None or (isinstance(value, date) and not isinstance(value, datetime)):
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value.date()
+
+
+def _old_and_new(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    new = history.added[0] if history.added else getattr(obj, attr)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+def _touched_days(session):
+    """Days whose invoice rollup and ticket rollup rows this flush changed"""
+    invoice_days, ticket_days = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Invoice):
+            invoice_days.update(_day(value) for value in _old_and_new(obj, 'date'))
+        elif isinstance(obj, Ticket):
+            for attr in ('created_date', 'completed_date'):
+                ticket_days.update(_day(value) for value in _old_and_new(obj, attr))
+    invoice_days.discard(None)
+    ticket_days.discard(None)
+    return invoice_days, ticket_days
+
+
+def _on_days(column, days):
+    """``column`` falls on one of ``days``, as range conditions an index can use"""
+    return or_(*(
+        and_(column >= datetime.combine(day, day_start()), column < datetime.combine(day + timedelta(days=1), day_start()))
+        for day in sorted(days)
+    ))
+
+
+def _seconds_between(connection, start, end):
+    if connection.dialect.name == 'postgresql':
+        return func.extract('epoch', end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400
+
+
+def _refresh_invoice_days(connection, days=None):
+    day = func.date(Invoice.date)
+    unpaid = Invoice.paid_status != 'Paid'
+    stmt = select(
+        day,
+        func.count(Invoice.id),
+        func.sum(Invoice.total_amount),
+        func.sum(case((unpaid, 1), else_=0)),
+        func.sum(case((unpaid, Invoice.total_amount), else_=0)),
+    ).group_by(day)
+    table = DailyInvoiceStat.__table__
+    if days is None:
+        connection.execute(delete(table))
+    else:
+        stmt = stmt.where(_on_days(Invoice.date, days))
+        connection.execute(delete(table).where(table.c.day.in_(days)))
+    rows = [
+        {'day': _day(row[0]), 'invoices': row[1], 'revenue': row[2],
+         'unpaid_invoices': row[3], 'unpaid_amount': row[4]}
+        for row in connection.execute(stmt)
+    ]
+    if rows:
+        connection.execute(insert(table), rows)
+
+
+def _refresh_ticket_days(connection, days=None):
+    opened_day = func.date(Ticket.created_date)
+    completed_day = func.date(Ticket.completed_date)
+    opened = select(opened_day, Ticket.technician_id, func.count(Ticket.id)).group_by(opened_day, Ticket.technician_id)
+    completed = (
+        select(completed_day, Ticket.technician_id, func.count(Ticket.id),
+               func.sum(_seconds_between(connection, Ticket.created_date, Ticket.completed_date)))
+        .where(Ticket.completed_date.isnot(None))
+        .group_by(completed_day, Ticket.technician_id)
+    )
+    table = DailyTicketStat.__table__
+    if days is None:
+        connection.execute(delete(table))
+    else:
+        opened = opened.where(_on_days(Ticket.created_date, days))
+        completed = completed.where(_on_days(Ticket.completed_date, days))
+        connection.execute(delete(table).where(table.c.day.in_(days)))
+
+    rows = {}
+    for day, technician_id, count in connection.execute(opened):
+        key = (_day(day), technician_id)
+        rows[key] = {'day': key[0], 'technician_id': technician_id, 'opened': count,
+                     'completed': 0, 'turnaround_seconds': 0.0}
+    for day, technician_id, count, seconds in connection.execute(completed):
+        key = (_day(day), technician_id)
+        row = rows.setdefault(key, {'day': key[0], 'technician_id': technician_id, 'opened': 0})
+        row['completed'] = count
+        row['turnaround_seconds'] = float(seconds or 0)
+    if rows:
+        connection.execute(insert(table), list(rows.values()))
+
+
+def rebuild_reports(session=None):
+    """Recompute every rollup row from the source tables (does not commit)"""
+    connection = (session or db.session).connection()
+    _refresh_invoice_days(connection)
+    _refresh_ticket_days(connection)
+
+
+def days_where(session, invoice_criterion, ticket_criterion):
+    """The invoice days and ticket days of the rows matching the criteria, for ``refresh_days``"""
+    invoice_days = {_day(day) for day in session.scalars(
+        select(func.date(Invoice.date)).where(invoice_criterion).distinct())}
+    ticket_days = set()
+    rows = session.execute(
+        select(func.date(Ticket.created_date), func.date(Ticket.completed_date)).where(ticket_criterion).distinct())
+    for created, completed in rows:
+        ticket_days.update((_day(created), _day(completed)))
+    invoice_days.discard(None)
+    ticket_days.discard(None)
+    return invoice_days, ticket_days
+
+
+def refresh_days(session, invoice_days, ticket_days):
+    """Recompute the rollup rows of the given days from the source tables (does not commit)"""
+    # Each day is one OR'ed range condition, and SQLite caps expression depth at 1000
+    connection = session.connection()
+    for refresh, days in ((_refresh_invoice_days, invoice_days), (_refresh_ticket_days, ticket_days)):
+        days = sorted(days)
+        for start in range(0, len(days), REFRESH_CHUNK_DAYS):
+            refresh(connection, days[start:start + REFRESH_CHUNK_DAYS])
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_touched_days(session, flush_context):
+    refresh_days(session, *_touched_days(session))
+
+
+def ensure_rollups():
+    """Build the rollups once for databases that have data but no rollup rows yet"""
+    has_rollups = db.session.scalar(select(DailyInvoiceStat.day).limit(1)) is not None or \
+        db.session.scalar(select(DailyTicketStat.day).limit(1)) is not None
+    has_data = db.session.scalar(select(Ticket.id).limit(1)) is not None
+    if has_data and not has_rollups:
+        rebuild_reports()
+        db.session.commit()
+
+
+def period_start(day, period):
+    """First day of the day/week/month that ``day`` falls in"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def revenue_report(start, end, period='day'):
+    """Invoices, revenue and unpaid amount per period between two dates (inclusive)"""
+    rows = db.session.execute(
+        select(DailyInvoiceStat).where(DailyInvoiceStat.day.between(start, end)).order_by(DailyInvoiceStat.day)
+    ).scalars()
+    periods = OrderedDict()
+    for row in rows:
+        totals = periods.setdefault(period_start(row.day, period), {'invoices': 0, 'revenue': 0, 'unpaid_amount': 0})
+        totals['invoices'] += row.invoices
+        totals['revenue'] += row.revenue
+        totals['unpaid_amount'] += row.unpaid_amount
+    return [dict(totals, period=key) for key, totals in periods.items()]
+
+
+def technician_report(start, end):
+    """Per technician: tickets opened and completed, and average turnaround in hours"""
+    rows = db.session.execute(
+        select(User.username,
+               func.sum(DailyTicketStat.opened),
+               func.sum(DailyTicketStat.completed),
+               func.sum(DailyTicketStat.turnaround_seconds))
+        .join(User, User.id == DailyTicketStat.technician_id)
+        .where(DailyTicketStat.day.between(start, end))
+        .group_by(User.username)
+        .order_by(func.sum(DailyTicketStat.completed).desc())
+    )
+    return [
+        {'technician': name, 'opened': opened, 'completed': completed,
+         'avg_turnaround_hours': seconds / completed / 3600 if completed else None}
+        for name, opened, completed, seconds in rows
+    ]
+
+
+def average_turnaround_hours(start, end):
+    """Average hours from ticket creation to completion for tickets completed in the range"""
+    completed, seconds = db.session.execute(
+        select(func.sum(DailyTicketStat.completed), func.sum(DailyTicketStat.turnaround_seconds))
+        .where(DailyTicketStat.day.between(start, end))
+    ).one()
+    return seconds / completed / 3600 if completed else None
+
+
+def unpaid_aging(today=None):
+    """Unpaid invoices and amounts grouped by how many days ago they were raised"""
+    today = today or datetime.utcnow().date()
+    buckets = [{'label': label, 'invoices': 0, 'amount': 0} for _, label in AGING_BUCKETS]
+    rows = db.session.execute(
+        select(DailyInvoiceStat.day, DailyInvoiceStat.unpaid_invoices, DailyInvoiceStat.unpaid_amount)
+        .where(DailyInvoiceStat.unpaid_invoices > 0)
+    )
+    for day, invoices, amount in rows:
+        age = (today - day).days
+        for bucket, (oldest, _) in zip(buckets, AGING_BUCKETS):
+            if oldest is None or age <= oldest:
+                bucket['invoices'] += invoices
+                bucket['amount'] += amount
+                break
+    return buckets
@@ -0,0 +1,109 @@
+"""Full-text search across customers, devices and service descriptions.
+
+On SQLite each searchable table has an FTS5 index over its text columns
+(``customer_fts``, ``device_fts`` and ``service_fts``). They are
+external-content tables: the text itself stays in the source table and the
+FTS index holds only the tokens, so nothing is stored twice. Triggers
+created by migration 0005 keep them in step with every INSERT, UPDATE and
+DELETE, including the bulk statements in deletes.py and the legacy import,
+which never pass through the session.
+
+Every word of the query is matched as a prefix (``len`` finds "Lenovo"),
+all words must match, and results are ordered by bm25 relevance. The
+indexes also store two and three character prefixes, so short prefixes are
+looked up directly instead of walking every term in the index.
+
+Every match is ranked, however old, so the best result is never dropped
+for being early in the table. ``ORDER BY rank LIMIT`` lets FTS5 keep only
+the top ``limit`` rows while it scores, so a common word costs one bm25
+pass over its matches and no sort of the whole set.
+
+On PostgreSQL the same search runs against GIN expression indexes over
+``to_tsvector('simple', ...)`` of the same columns, ranked with
+``ts_rank``; they are maintained by PostgreSQL itself.
+"""
+import re
+
+from sqlalchemy import desc, func, literal_column, select, text
+
+from models import db, Customer, Device, Service
+from queries import device_query, service_query
+
+# Table searched: its FTS5 index and the columns indexed
+SEARCH_TABLES = {
+    'customers': (Customer, 'customer_fts', ('name', 'phone', 'email')),
+    'devices': (Device, 'device_fts', ('brand', 'model', 'serial_number', 'issue')),
+    'services': (Service, 'service_fts', ('description',)),
+}
+DEFAULT_LIMIT = 20
+MAX_TERMS = 8
+
+# Letters and digits; everything else separates words, as in FTS5's unicode61 tokenizer
+_WORD = re.compile(r'[^\W_]+')
+
+
+def search_terms(query):
+    """Lower-cased words of a search box query"""
+    return _WORD.findall(query.lower())[:MAX_TERMS]
+
+
+def _fts5_match(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _tsquery(terms):
+    return ' & '.join(f'{term}:*' for term in terms)
+
+
+def pg_document(columns):
+    """The tsvector expression the PostgreSQL search indexes are built on"""
+    joined = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('simple', {joined})"
+
+
+def _ranked_ids(kind, terms, limit):
+    model, fts_table, columns = SEARCH_TABLES[kind]
+    if db.session.get_bind().dialect.name == 'postgresql':
+        document = literal_column(pg_document(columns))
+        tsquery = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+        stmt = (select(model.id, func.ts_rank(document, tsquery).label('rank'))
+                .where(document.op('@@')(tsquery))
+                .order_by(desc('rank'), model.id)
+                .limit(limit))
+        return [row[0] for row in db.session.execute(stmt)]
+    stmt = text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :match ORDER BY rank LIMIT :limit")
+    params = {'match': _fts5_match(terms), 'limit': limit}
+    return [row[0] for row in db.session.execute(stmt, params)]
+
+
+def _load(kind, ids):
+    """The rows for ``ids``, kept in rank order"""
+    if not ids:
+        return []
+    loaders = {
+        'customers': Customer.query,
+        'devices': device_query(),
+        'services': service_query(),
+    }
+    model = SEARCH_TABLES[kind][0]
+    rows = {row.id: row for row in loaders[kind].filter(model.id.in_(ids))}
+    return [rows[row_id] for row_id in ids if row_id in rows]
+
+
+def search(query, limit=DEFAULT_LIMIT):
+    """Best matches for ``query`` as ``{'customers': [...], 'devices': [...], 'services': [...]}``"""
+    terms = search_terms(query)
+    if not terms:
+        return {kind: [] for kind in SEARCH_TABLES}
+    return {kind: _load(kind, _ranked_ids(kind, terms, limit)) for kind in SEARCH_TABLES}
+
+
+def rebuild_search_index():
+    """Re-read every row into the FTS5 indexes and merge their segments (SQLite only)"""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return False
+    for _, fts_table, _ in SEARCH_TABLES.values():
+        db.session.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+        db.session.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('optimize')"))
+    db.session.commit()
+    return True
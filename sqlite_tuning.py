@@ -0,0 +1,73 @@
+"""SQLite connection profiles.
+
+With SQLite's stock settings every write takes an exclusive lock on the
+whole database file, readers block the writer at commit time, and a
+connection that cannot get a lock gives up with "database is locked". The
+``production`` profile makes concurrent counter traffic workable:
+
+* ``journal_mode = WAL``: readers see the last committed state and never
+  block, or are blocked by, the single writer.
+* ``synchronous = NORMAL``: in WAL mode this only fsyncs at checkpoints; a
+  power cut can lose the last few commits but never corrupts the file.
+* ``mmap_size``: reads are served from a memory map instead of read() calls.
+* ``busy_timeout``: how long a writer waits for the lock before failing
+  with "database is locked".
+
+The pragmas are per connection (WAL itself is stored in the file), so they
+are applied from a ``connect`` event on every new pooled connection. Select
+the profile with the ``DB_PROFILE`` setting; ``default`` leaves SQLite and
+the pool as they are. On other backends (PostgreSQL) only the pool settings
+apply.
+"""
+from sqlalchemy import event
+
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'busy_timeout': 5000,  # ms; first, so the other pragmas wait for locks too
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# One pooled connection per request thread, a few spare for the PDF queue
+# and reconciler threads, and a short wait before giving up on the pool.
+POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 10,
+    'pool_timeout': 10,
+}
+
+
+def engine_options(database_uri, profile):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``profile``"""
+    in_memory = database_uri in ('sqlite://', 'sqlite:///:memory:')
+    if profile == 'default' or in_memory:
+        return {}
+    options = dict(POOL_OPTIONS)
+    if not database_uri.startswith('sqlite'):
+        # Server connections can be dropped while idle in the pool
+        options['pool_pre_ping'] = True
+    return options
+
+
+def apply_pragmas(engine, pragmas):
+    """Run ``PRAGMA name = value`` on every new connection of ``engine``"""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def init_app(app, db):
+    """Apply the ``DB_PROFILE`` pragmas to the app's engine"""
+    profile = app.config.setdefault('DB_PROFILE', 'production')
+    with app.app_context():
+        apply_pragmas(db.engine, SQLITE_PROFILES[profile])
@@ -0,0 +1,193 @@
+"""Materialized dashboard counters.
+
+The dashboard used to run six COUNT/SUM queries over whole tables on every
+page load. The figures now live in the ``dashboard_stat`` table and are
+kept current from SQLAlchemy session events:
+
+* ``after_flush`` turns inserts, deletes and relevant attribute changes on
+  customers, devices, tickets and invoices into ``value = value + delta``
+  updates issued in the same transaction as the change itself;
+* bulk ``update()``/``delete()`` statements bypass the unit of work, so
+  whoever issues them adjusts the counters: the cascading deletes in
+  deletes.py count the rows their WHERE clauses match (one filtered
+  aggregate per table) before deleting them and pass the negated counts to
+  ``apply_deltas``.
+
+Values are stored as hundredths (``money.Hundredths``), so the revenue
+counter adds up exact paise and the deltas are ``Decimal`` amounts.
+
+``reconcile_stats`` rebuilds every counter from the source tables and
+reports how far the stored values had drifted. It runs from the
+``flask reconcile-stats`` command and, when ``STATS_RECONCILE_INTERVAL`` is
+set, from a background thread.
+"""
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from models import db, Customer, Device, Ticket, Invoice
+from money import Hundredths, to_decimal
+
+STAT_KEYS = (
+    'total_customers',
+    'total_devices',
+    'total_tickets',
+    'completed_tickets',
+    'total_invoices',
+    'total_revenue',
+)
+
+TRACKED_MODELS = (Customer, Device, Ticket, Invoice)
+
+
+class DashboardStat(db.Model):
+    key = db.Column(db.String(40), primary_key=True)
+    value = db.Column(Hundredths, nullable=False, default=0)  # Counts and revenue, stored in hundredths
+
+
+def _old_and_new(obj, attr):
+    """Return (value before this flush, value after it) for an attribute"""
+    history = inspect(obj).attrs[attr].history
+    new = history.added[0] if history.added else getattr(obj, attr)
+    old = history.deleted[0] if history.deleted else new
+    return old, new
+
+
+def _committed(obj, attr):
+    return _old_and_new(obj, attr)[0]
+
+
+def _collect_deltas(session):
+    deltas = defaultdict(Decimal)
+    for obj in session.new:
+        if isinstance(obj, Customer):
+            deltas['total_customers'] += 1
+        elif isinstance(obj, Device):
+            deltas['total_devices'] += 1
+        elif isinstance(obj, Ticket):
+            deltas['total_tickets'] += 1
+            if obj.status == 'Completed':
+                deltas['completed_tickets'] += 1
+        elif isinstance(obj, Invoice):
+            deltas['total_invoices'] += 1
+            deltas['total_revenue'] += to_decimal(obj.total_amount or 0)
+
+    for obj in session.deleted:
+        if isinstance(obj, Customer):
+            deltas['total_customers'] -= 1
+        elif isinstance(obj, Device):
+            deltas['total_devices'] -= 1
+        elif isinstance(obj, Ticket):
+            deltas['total_tickets'] -= 1
+            if _committed(obj, 'status') == 'Completed':
+                deltas['completed_tickets'] -= 1
+        elif isinstance(obj, Invoice):
+            deltas['total_invoices'] -= 1
+            deltas['total_revenue'] -= to_decimal(_committed(obj, 'total_amount') or 0)
+
+    for obj in session.dirty:
+        if isinstance(obj, Ticket):
+            old, new = _old_and_new(obj, 'status')
+            deltas['completed_tickets'] += (new == 'Completed') - (old == 'Completed')
+        elif isinstance(obj, Invoice):
+            old, new = _old_and_new(obj, 'total_amount')
+            deltas['total_revenue'] += to_decimal(new or 0) - to_decimal(old or 0)
+
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_deltas(session, deltas):
+    """Add each ``key: delta`` of ``deltas`` to its counter, in the session's transaction"""
+    connection = session.connection()
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        connection.execute(
+            update(DashboardStat.__table__)
+            .where(DashboardStat.__table__.c.key == key)
+            .values(value=DashboardStat.__table__.c.value + delta)
+        )
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_flush_deltas(session, flush_context):
+    apply_deltas(session, _collect_deltas(session))
+
+
+def compute_stats(session):
+    """Compute every dashboard figure from the source tables"""
+    return {
+        'total_customers': session.scalar(select(func.count(Customer.id))),
+        'total_devices': session.scalar(select(func.count(Device.id))),
+        'total_tickets': session.scalar(select(func.count(Ticket.id))),
+        'completed_tickets': session.scalar(
+            select(func.count(Ticket.id)).where(Ticket.status == 'Completed')),
+        'total_invoices': session.scalar(select(func.count(Invoice.id))),
+        'total_revenue': session.scalar(select(func.sum(Invoice.total_amount))) or Decimal('0.00'),
+    }
+
+
+def _write_stats(session, values):
+    # Through the session, so the page cache sees dashboard_stat change
+    table = DashboardStat.__table__
+    session.execute(table.delete())
+    session.execute(table.insert(), [{'key': key, 'value': value} for key, value in values.items()])
+
+
+def _drifted(stored, actual):
+    return stored is None or stored != actual
+
+
+def reconcile_stats():
+    """Rebuild every counter and return the ones that had drifted.
+
+    The result maps each drifted key to a (stored, actual) pair; a stored
+    value of None means the counter was missing altogether.
+    """
+    session = db.session
+    stored = {row.key: row.value for row in DashboardStat.query.all()}
+    actual = compute_stats(session)
+    drift = {
+        key: (stored.get(key), actual[key])
+        for key in STAT_KEYS
+        if _drifted(stored.get(key), actual[key])
+    }
+    _write_stats(session, actual)
+    session.commit()
+    return drift
+
+
+def get_dashboard_stats():
+    """Return the dashboard figures, rebuilding them if they were never stored"""
+    values = {row.key: row.value for row in DashboardStat.query.all()}
+    if any(key not in values for key in STAT_KEYS):
+        reconcile_stats()
+        values = {row.key: row.value for row in DashboardStat.query.all()}
+    stats = {key: int(values[key]) for key in STAT_KEYS if key != 'total_revenue'}
+    # A string keeps the paise exact and the result JSON-serializable for the page cache
+    stats['total_revenue'] = str(values['total_revenue'])
+    return stats
+
+
+def start_reconciler(app, interval):
+    """Run reconcile_stats every ``interval`` seconds on a daemon thread"""
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    drift = reconcile_stats()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Dashboard stats reconciliation failed')
+                    continue
+                for key, (stored, actual) in drift.items():
+                    app.logger.warning('Dashboard stat %s drifted: stored %s, actual %s', key, stored, actual)
+
+    thread = threading.Thread(target=run, name='stats-reconciler', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,185 @@
+"""Shared fixtures: the app on a fresh, migrated database per test.
+
+Every test that uses ``app`` runs twice, once per backend:
+
+* ``sqlite``: app.py reads ``DATABASE_URL`` when it is imported, so it is
+  pointed at a file in a temporary directory first. Each test gets that
+  file deleted and migrated again with ``flask db upgrade``, so tests never
+  see each other's rows and never touch instance/repair_center.db.
+* ``postgresql``: the server named by ``TEST_POSTGRES_URL`` or, when that is
+  unset and ``initdb`` and ``pg_ctl`` are on PATH, a throwaway cluster
+  started for the session. Each test swaps the app's engine for one that
+  works in a schema of its own, dropped afterwards. Without either, the
+  PostgreSQL cases are skipped.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEST_DB = os.path.join(tempfile.mkdtemp(prefix='repair-center-tests-'), 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{TEST_DB}'
+
+from flask_migrate import upgrade  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import app as flask_app  # noqa: E402
+from models import db, User, Customer, Device, Ticket, Service, Invoice  # noqa: E402
+from money import invoice_total, to_decimal  # noqa: E402
+from page_cache import page_cache  # noqa: E402
+
+BACKENDS = ['sqlite', 'postgresql']
+
+
+def _throwaway_cluster():
+    """Start a PostgreSQL cluster in a temporary directory; yields its URL"""
+    if not (shutil.which('initdb') and shutil.which('pg_ctl')):
+        pytest.skip('TEST_POSTGRES_URL is not set and initdb / pg_ctl are not on PATH')
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        pytest.skip('TEST_POSTGRES_URL is not set and initdb refuses to run as root')
+    data_dir = tempfile.mkdtemp(prefix='repair-center-pg-')
+    try:
+        subprocess.run(['initdb', '-D', data_dir, '-U', 'postgres', '--auth=trust', '--no-sync'],
+                       check=True, capture_output=True)
+        # Unix socket only, in the data directory: no port to collide with
+        subprocess.run(['pg_ctl', '-D', data_dir, '-l', os.path.join(data_dir, 'server.log'), '-w',
+                        '-o', f"-k {data_dir} -c listen_addresses='' -c fsync=off", 'start'],
+                       check=True, capture_output=True)
+        try:
+            yield f'postgresql://postgres@/postgres?host={data_dir}'
+        finally:
+            subprocess.run(['pg_ctl', '-D', data_dir, '-m', 'immediate', '-w', 'stop'], capture_output=True)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def postgres_url():
+    """URL of the PostgreSQL server the tests may use for the whole session"""
+    url = os.environ.get('TEST_POSTGRES_URL')
+    if url:
+        engine = create_engine(url)
+        try:
+            with engine.connect():
+                pass
+        except OperationalError as e:
+            pytest.skip(f'PostgreSQL at TEST_POSTGRES_URL is unreachable: {e.orig}')
+        finally:
+            engine.dispose()
+        yield url
+    else:
+        yield from _throwaway_cluster()
+
+
+@contextmanager
+def _postgresql_schema(url):
+    """Engine options that confine connections to ``url`` to a new schema, dropped afterwards"""
+    admin = create_engine(url, isolation_level='AUTOCOMMIT')
+    schema = f'test_{uuid.uuid4().hex[:12]}'
+    with admin.connect() as connection:
+        connection.execute(text(f'CREATE SCHEMA {schema}'))
+    try:
+        yield {'connect_args': {'options': f'-csearch_path={schema}'}}
+    finally:
+        with admin.connect() as connection:
+            connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        admin.dispose()
+
+
+def _reset_sqlite():
+    db.engine.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(TEST_DB + suffix):
+            os.remove(TEST_DB + suffix)
+
+
+@contextmanager
+def _database(backend, request):
+    """The app's engine on a fresh, empty database of ``backend``"""
+    if backend == 'sqlite':
+        _reset_sqlite()
+        yield
+        return
+    url = request.getfixturevalue('postgres_url')
+    with _postgresql_schema(url) as options:
+        sqlite_engine = db.engines[None]
+        db.engines[None] = create_engine(url, pool_pre_ping=True, **options)
+        try:
+            yield
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+            db.engines[None] = sqlite_engine
+
+
+@pytest.fixture(params=BACKENDS)
+def app(request):
+    flask_app.config.update(TESTING=True, PDF_WORKERS=0, STATS_RECONCILE_INTERVAL=0, PAGE_CACHE_BACKEND='none')
+    page_cache.init_app(flask_app)
+    with flask_app.app_context(), _database(request.param, request):
+        upgrade()
+        db.session.add(User(username='admin', password_hash=generate_password_hash('admin123'),
+                            email='admin@repaircenter.com', role='admin'))
+        db.session.commit()
+        yield flask_app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    """A test client logged in as admin"""
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    """The SQL of every statement the app's engine runs, in order"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_customer(name='Ravi Kumar', devices=1, costs=('1500.00',), description='Board repair', invoiced=True,
+                 tax_rate='18', discount='0', **device):
+    """A customer owning ``devices`` devices, each with one completed ticket.
+
+    Each ticket has a service per amount in ``costs`` and, if ``invoiced``,
+    an unpaid invoice for them. ``device`` overrides the device columns.
+    Commits and returns the customer.
+    """
+    technician = db.session.scalar(select(User).order_by(User.id).limit(1))
+    if technician is None:
+        technician = User(username='tech', password_hash='x', email='tech@example.com')
+    customer = Customer(name=name, phone='98450 12345', email=f"{name.split()[0].lower()}@example.com")
+    for n in range(devices):
+        columns = dict({'brand': 'Lenovo', 'model': 'ThinkPad T14', 'serial_number': f'{name}-{n}'}, **device)
+        ticket = Ticket(device=Device(customer=customer, **columns), technician=technician, status='Completed')
+        for cost in costs:
+            ticket.services.append(Service(description=description, cost=to_decimal(cost)))
+        if invoiced:
+            _, total = invoice_total(sum(to_decimal(cost) for cost in costs), tax_rate, discount)
+            ticket.invoice = Invoice(total_amount=total, paid_status='Unpaid',
+                                     tax_rate=to_decimal(tax_rate), discount=to_decimal(discount))
+        db.session.add(ticket)
+    db.session.add(customer)
+    db.session.commit()
+    return customer
@@ -0,0 +1,65 @@
+"""Migrations, search and money, where SQLite and PostgreSQL differ most.
+
+Like every test on the shared ``app`` fixture, these run on both backends;
+see conftest.py for how the PostgreSQL server is found or started.
+"""
+from decimal import Decimal
+
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import insert, inspect, select, text
+
+from conftest import add_customer
+from models import db, Ticket, Service, Invoice
+from money import invoice_total
+from queries import service_total
+from search import search
+
+
+def test_migrations_downgrade_and_upgrade_again(app):
+    head = db.session.scalar(text('SELECT version_num FROM alembic_version'))
+    tables = set(inspect(db.engine).get_table_names())
+    assert {'customer', 'device', 'ticket', 'service', 'invoice', 'dashboard_stat', 'daily_invoice_stat'} <= tables
+    db.session.remove()
+
+    downgrade(revision='base')
+    assert set(inspect(db.engine).get_table_names()) <= {'alembic_version'}
+    upgrade()
+    assert db.session.scalar(text('SELECT version_num FROM alembic_version')) == head
+    assert set(inspect(db.engine).get_table_names()) == tables
+
+
+def test_search_finds_prefixes(app):
+    customer = add_customer(serial_number='SN-7A3B', issue='No power', description='Motherboard replacement')
+
+    results = search('len think')
+    assert [device.id for device in results['devices']] == [customer.devices[0].id]
+    assert [customer.name for customer in search('ravi')['customers']] == ['Ravi Kumar']
+    assert [service.description for service in search('mother')['services']] == ['Motherboard replacement']
+    assert search('nokia') == {'customers': [], 'devices': [], 'services': []}
+
+
+def test_money_round_trips_exactly(app):
+    customer = add_customer(brand='HP', model='EliteBook 840', costs=('0.10', '0.20', '1500.55'), discount='0.05')
+    ticket_id = customer.devices[0].tickets[0].id
+    db.session.expire_all()
+
+    assert service_total(ticket_id) == Decimal('1500.85')
+    ticket = db.session.get(Ticket, ticket_id)
+    assert sorted(service.cost for service in ticket.services) == [Decimal('0.10'), Decimal('0.20'), Decimal('1500.55')]
+    assert invoice_total(Decimal('1500.85'), '18', '0.05') == (Decimal('270.15'), Decimal('1770.95'))
+    invoice = db.session.scalar(select(Invoice).where(Invoice.ticket_id == ticket_id))
+    assert (invoice.total_amount, invoice.tax_rate, invoice.discount) == (
+        Decimal('1770.95'), Decimal('18.00'), Decimal('0.05'))
+
+
+def test_search_ranks_every_match(app):
+    customer = add_customer(description='Screen screen replacement')
+    ticket_id = customer.devices[0].tickets[0].id
+    # Many newer, weaker matches must not push the best, oldest one out
+    db.session.execute(insert(Service), [
+        {'ticket_id': ticket_id, 'description': f'Cleaned the screen and checked port {n}', 'cost': 100}
+        for n in range(2500)
+    ])
+    db.session.commit()
+
+    assert search('screen', limit=1)['services'][0].description == 'Screen screen replacement'
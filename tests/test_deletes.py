@@ -0,0 +1,50 @@
+from sqlalchemy import select
+
+from conftest import add_customer
+from deletes import delete_customers_where, delete_tickets_where
+from models import db, Customer, Device, Ticket
+from reporting import DailyInvoiceStat, DailyTicketStat, rebuild_reports
+from stats import reconcile_stats
+
+
+def unfiltered(sql):
+    """True for an aggregate, UPDATE or DELETE that covers a whole table"""
+    sql = sql.upper()
+    return ('COUNT(' in sql or 'SUM(' in sql or sql.startswith(('UPDATE', 'DELETE'))) and 'WHERE' not in sql
+
+
+def rollup_rows():
+    return [sorted(tuple(row) for row in db.session.execute(select(model.__table__)))
+            for model in (DailyInvoiceStat, DailyTicketStat)]
+
+
+def test_customer_delete_statement_count_is_constant(app, statements):
+    # Keeps rows on the same days, so every delete refreshes rollup days that still have data
+    add_customer('bystander', 1)
+    reconcile_stats()  # Store the dashboard counters, as the first dashboard view would
+    counts = {}
+    for devices in (1, 50, 300):
+        customer_id = add_customer(f'owner of {devices}', devices).id
+        statements.clear()
+        delete_customers_where(Customer.id == customer_id)
+        db.session.commit()
+        counts[devices] = len(statements)
+        assert [sql for sql in statements if unfiltered(sql)] == []
+        assert db.session.get(Customer, customer_id) is None
+    assert len(set(counts.values())) == 1, counts
+    assert db.session.scalar(select(Device.id).where(Device.serial_number.like('owner%'))) is None
+
+
+def test_bulk_deletes_keep_counters_and_rollups_current(app):
+    add_customer('bystander', 2)
+    reconcile_stats()
+    customer_id = add_customer('leaving', 5).id
+    delete_customers_where(Customer.id == customer_id)
+    db.session.commit()
+    delete_tickets_where(Ticket.id == db.session.scalar(select(Ticket.id).limit(1)))
+    db.session.commit()
+
+    assert reconcile_stats() == {}
+    incremental = rollup_rows()
+    rebuild_reports()
+    assert rollup_rows() == incremental
@@ -0,0 +1,17 @@
+import os
+import sys
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from bench_desktop import measure, scaling  # noqa: E402
+
+# Small enough to run in a few seconds, spread wide enough that a quadratic path shows k near 2
+SIZES = [500, 2000, 8000]
+
+
+def test_desktop_operations_scale_within_their_bounds():
+    exponents = scaling(SIZES, measure(SIZES, repeat=7))
+    too_slow = {name: round(k, 2) for name, (k, bound) in exponents.items() if k > bound}
+    assert too_slow == {}
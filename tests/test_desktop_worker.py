@@ -0,0 +1,49 @@
+import threading
+import time
+
+from desktop_worker import BackgroundWorker
+
+
+class FakeRoot:
+    """Stands in for the Tk root: records ``after`` calls instead of running a main loop"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback, *args):
+        self.scheduled.append((callback, args))
+
+
+def test_shutdown_delivers_results_of_work_running_at_close():
+    worker = BackgroundWorker(FakeRoot())
+    started = threading.Event()
+    events = []
+    callback_threads = set()
+
+    def create():
+        started.set()
+        time.sleep(0.05)  # Still saving when the window closes
+        return 7
+
+    def created(invoice_id):
+        callback_threads.add(threading.current_thread())
+        events.append(('created', invoice_id))
+        # As main.py does: refresh the list and render the PDF
+        worker.submit(lambda: 'invoices loaded', events.append)
+        worker.render(lambda: f'invoice_{invoice_id}.pdf', lambda path: events.append(('rendered', path)))
+
+    worker.submit(create, created)
+    started.wait()
+    worker.shutdown()
+
+    assert events[0] == ('created', 7)
+    assert sorted(events[1:], key=str) == [('rendered', 'invoice_7.pdf'), 'invoices loaded']
+    assert callback_threads == {threading.current_thread()}
+
+
+def test_shutdown_delivers_errors():
+    worker = BackgroundWorker(FakeRoot())
+    errors = []
+    worker.submit(lambda: 1 / 0, on_error=errors.append)
+    worker.shutdown()
+    assert [type(e) for e in errors] == [ZeroDivisionError]
@@ -0,0 +1,12 @@
+import json
+
+from conftest import add_customer
+
+
+def test_amounts_are_exported_exactly(client):
+    add_customer(costs=('0.10', '0.20', '1500.55'), discount='0.05')
+
+    rows = [json.loads(line) for line in client.get('/export/invoices.jsonl').get_data(as_text=True).splitlines()]
+    assert [(row['total_amount'], row['discount']) for row in rows] == [('1770.95', '0.05')]
+    services = client.get('/export/services.csv').get_data(as_text=True).splitlines()
+    assert [line.split(',')[-1] for line in services[1:]] == ['0.10', '0.20', '1500.55']
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from legacy_import import LegacyImporter
+from models import db, Ticket
+
+CSV_FILES = {
+    'customers': 'customer_id,name,phone,email,address\n1,Ravi Kumar,9845012345,ravi@example.com,Jayanagar\n',
+    'devices': 'device_id,customer_id,brand,model,serial_number,issue\n1,1,Lenovo,ThinkPad T14,SN-7A3B,No power\n',
+    'tickets': ('ticket_id,device_id,technician,status,created_date\n'
+                '1,1,admin,Completed,2024-03-01 10:00:00\n'
+                '2,1,admin,Completed,2024-03-02 10:00:00\n'
+                '3,1,admin,In Progress,2024-03-03 10:00:00\n'),
+    'services': 'ticket_id,description,cost\n1,Board repair,1500.00\n',
+    'invoices': ('invoice_id,ticket_id,total_amount,paid_status,date,tax_rate,discount\n'
+                 '1,1,1770.00,Paid,2024-03-04 16:30:00,18,0\n'),
+}
+
+
+def test_completed_tickets_get_a_completed_date(app, tmp_path):
+    for name, text in CSV_FILES.items():
+        (tmp_path / f'{name}.csv').write_text(text)
+    LegacyImporter(str(tmp_path), report=lambda message: None).run()
+
+    tickets = db.session.execute(select(Ticket.status, Ticket.completed_date).order_by(Ticket.id)).all()
+    assert tickets == [
+        ('Completed', datetime(2024, 3, 4, 16, 30)),  # Its invoice date
+        ('Completed', datetime(2024, 3, 2, 10, 0)),  # No invoice: its created date
+        ('In Progress', None),
+    ]
@@ -0,0 +1,44 @@
+import zipfile
+
+import pytest
+
+from conftest import add_customer
+from invoice_pdf import invoice_pdf_data, render_invoice_pdf
+from models import Invoice
+from pdf_cache import PdfCache
+from pdf_export import export_invoices_zip, invoice_export_query
+
+
+class EvictingCache(PdfCache):
+    """A cache emptied by a concurrent ``evict()`` around every lookup"""
+
+    def __init__(self, directory, evict_first):
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = 0
+        self.evict_first = evict_first
+
+    def lookup(self, key):
+        if self.evict_first:
+            # Gone before the export can claim it
+            pdf_file = self.path_for(key)
+            self.evict()
+            return pdf_file
+        pdf_file = super().lookup(key)
+        self.evict()
+        return pdf_file
+
+
+@pytest.mark.parametrize('evict_first', [False, True])
+def test_export_survives_cache_eviction(app, tmp_path, evict_first):
+    for n in range(3):
+        add_customer(f'Customer {n}')
+    cache = EvictingCache(str(tmp_path / 'cache'), evict_first)
+    for invoice in Invoice.query.all():
+        data = invoice_pdf_data(invoice)
+        render_invoice_pdf(data, cache.path_for(cache.key_for(data)))
+
+    out_path = tmp_path / 'invoices.zip'
+    assert export_invoices_zip(invoice_export_query(), str(out_path), workers=0, cache=cache) == 3
+    with zipfile.ZipFile(out_path) as archive:
+        assert [archive.read(name)[:4] for name in archive.namelist()] == [b'%PDF'] * 3
@@ -0,0 +1,22 @@
+from sqlalchemy import select
+
+from conftest import add_customer
+from deletes import delete_tickets_where
+from models import db, Ticket, Invoice
+from pdf_jobs import pdf_queue, PdfJob, JOB_FAILED, JOB_RENDERING
+
+
+def test_invoice_deleted_while_rendering(app):
+    add_customer()
+    job = PdfJob(invoice_id=db.session.scalar(select(Invoice.id)), status=JOB_RENDERING, attempts=1)
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    delete_tickets_where(Ticket.id.isnot(None))
+    db.session.commit()
+
+    pdf_queue._failed(job_id, RuntimeError('render crashed'))
+    pdf_queue._finish(job_id, JOB_FAILED, 'render crashed')
+    pdf_queue._retry(job_id)
+    assert db.session.get(PdfJob, job_id) is None
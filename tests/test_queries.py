@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import add_customer
+
+LIST_PAGES = ['/invoices', '/tickets', '/services', '/devices']
+
+
+def add_invoices(count):
+    """``count`` invoices, each for its own customer, device and ticket with two services"""
+    for n in range(count):
+        add_customer(f'Customer {n}', costs=('1500.00', '250.00'))
+
+
+def selects_for(client, statements, path):
+    statements.clear()
+    response = client.get(path, query_string={'per_page': 200})
+    assert response.status_code == 200
+    return len([sql for sql in statements if sql.lstrip().upper().startswith('SELECT')])
+
+
+@pytest.mark.parametrize('path', LIST_PAGES)
+def test_list_page_select_count_does_not_grow_with_rows(client, statements, path):
+    add_invoices(10)
+    small = selects_for(client, statements, path)
+    add_invoices(90)
+    large = selects_for(client, statements, path)
+    assert large == small
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import text
+
+from conftest import ROOT
+from models import db
+from query_plans import HOT_QUERIES, explain
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic_data import generate  # noqa: E402
+
+# Tables that grow with the business; scanning one of them gets slower every month
+LARGE_TABLES = {'customer', 'device', 'ticket', 'service', 'invoice', 'pdf_job'}
+
+
+def scanned_table(step):
+    """The table a plan step reads in full: ``SCAN t`` on SQLite, ``Seq Scan on t`` on PostgreSQL"""
+    if step.startswith('SCAN '):
+        return step.split()[1]
+    if 'Seq Scan on ' in step:
+        return step.split('Seq Scan on ')[1].split()[0]
+    return None
+
+
+def large_table_scans(plan):
+    return [step for step in plan if scanned_table(step) in LARGE_TABLES]
+
+
+@pytest.fixture
+def analyzed(app):
+    """The migrated test database with a few thousand synthetic tickets and planner statistics"""
+    generate(2000, report=lambda *args: None)
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return app
+
+
+def test_hot_queries_use_an_index(analyzed):
+    scanning = {}
+    for name, build in HOT_QUERIES.items():
+        plan = explain(build())
+        if large_table_scans(plan):
+            scanning[name] = plan
+    assert scanning == {}
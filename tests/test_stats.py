@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+from sqlalchemy import select, update
+
+from conftest import add_customer
+from deletes import delete_tickets_where
+from models import db, Customer, Ticket, Invoice
+from page_cache import page_cache
+from stats import DashboardStat, get_dashboard_stats, reconcile_stats
+
+
+def test_revenue_counter_is_exact(app):
+    reconcile_stats()
+    # 0.10 + 0.20 is not 0.30 in floating point; a float counter drifts from the summed invoices
+    for n in range(30):
+        add_customer(f'Customer {n}', costs=('0.10', '0.20'), tax_rate='0')
+    invoice = db.session.scalar(select(Invoice).limit(1))
+    invoice.total_amount = Decimal('1500.55')
+    db.session.commit()
+    delete_tickets_where(Ticket.device.has(customer_id=db.session.scalar(select(Customer.id).limit(1))))
+    db.session.commit()
+
+    assert get_dashboard_stats()['total_revenue'] == '8.70'
+    assert reconcile_stats() == {}
+
+
+def test_reconcile_refreshes_the_cached_dashboard(app, client):
+    app.config['PAGE_CACHE_BACKEND'] = 'memory'
+    page_cache.init_app(app)
+    add_customer(costs=('1234.56',), tax_rate='0')
+    reconcile_stats()
+    # Drift the counter behind the session's back, as a crashed writer might
+    with db.engine.begin() as connection:
+        connection.execute(update(DashboardStat.__table__).where(DashboardStat.key == 'total_revenue').values(value=0))
+    assert '₹0.00' in client.get('/dashboard').get_data(as_text=True)
+
+    reconcile_stats()
+    assert '₹1234.56' in client.get('/dashboard').get_data(as_text=True)